@@ -0,0 +1,45 @@
+"""weather_journal natural key
+
+Revision ID: 5c1d7e2a9b40
+Revises: 33ef507f9872
+Create Date: 2024-02-10 14:21:37.102394
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1d7e2a9b40'
+down_revision: str | None = '33ef507f9872'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # * Every re-run used to insert the same hours again, keeping only the most recent
+    # * copy of each row
+    op.execute(
+        """
+        DELETE FROM weather_journal AS duplicate
+        USING weather_journal AS kept
+        WHERE duplicate.city_id = kept.city_id
+            AND duplicate.data_source = kept.data_source
+            AND duplicate.date = kept.date
+            AND duplicate.id < kept.id
+        """
+    )
+    op.create_unique_constraint(
+        'uq_weather_journal_city_id_data_source_date',
+        'weather_journal',
+        ['city_id', 'data_source', 'date'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        'uq_weather_journal_city_id_data_source_date',
+        'weather_journal',
+        type_='unique',
+    )
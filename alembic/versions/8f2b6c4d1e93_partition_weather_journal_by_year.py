@@ -0,0 +1,176 @@
+"""partition weather_journal by year
+
+Revision ID: 8f2b6c4d1e93
+Revises: 5c1d7e2a9b40
+Create Date: 2024-02-14 19:02:51.448120
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2b6c4d1e93'
+down_revision: str | None = '5c1d7e2a9b40'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+COLUMNS = (
+    'id, data_source, date, temperature, pressure, wind_speed, wind_direction, '
+    'humidity, clouds, precipitation, snow, city_id'
+)
+
+
+def _weather_columns() -> list[sa.Column]:
+    return [
+        sa.Column(
+            'id',
+            sa.Integer(),
+            server_default=sa.text("nextval('weather_journal_id_seq')"),
+            nullable=False,
+        ),
+        sa.Column('data_source', sa.String(), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.Column('temperature', sa.Float(), nullable=True),
+        sa.Column('pressure', sa.Float(), nullable=True),
+        sa.Column('wind_speed', sa.Float(), nullable=True),
+        sa.Column('wind_direction', sa.Float(), nullable=True),
+        sa.Column('humidity', sa.Float(), nullable=True),
+        sa.Column('clouds', sa.Float(), nullable=True),
+        sa.Column('precipitation', sa.Float(), nullable=True),
+        sa.Column('snow', sa.Float(), nullable=True),
+        sa.Column('city_id', sa.Integer(), nullable=False),
+        # * Named explicitly, the partitions keep their own copies of the old name which
+        # * postgres would avoid
+        sa.ForeignKeyConstraint(
+            ['city_id'], ['city.id'], name='weather_journal_city_id_fkey'
+        ),
+        sa.UniqueConstraint(
+            'city_id',
+            'data_source',
+            'date',
+            name='uq_weather_journal_city_id_data_source_date',
+        ),
+    ]
+
+
+def _move_aside_old_table() -> None:
+    # * Freeing up the table, constraint and index names for the new table, the id
+    # * sequence is kept for it
+    op.execute('ALTER SEQUENCE weather_journal_id_seq OWNED BY NONE')
+    op.execute('ALTER TABLE weather_journal RENAME TO weather_journal_old')
+    op.execute(
+        'ALTER TABLE weather_journal_old '
+        'RENAME CONSTRAINT weather_journal_pkey TO weather_journal_old_pkey'
+    )
+    op.execute(
+        'ALTER TABLE weather_journal_old RENAME CONSTRAINT '
+        'uq_weather_journal_city_id_data_source_date '
+        'TO uq_weather_journal_old_city_id_data_source_date'
+    )
+    op.execute(
+        'ALTER TABLE weather_journal_old RENAME CONSTRAINT '
+        'weather_journal_city_id_fkey '
+        'TO weather_journal_old_city_id_fkey'
+    )
+
+
+def _move_data_and_drop_old_table() -> None:
+    op.execute(
+        f'INSERT INTO weather_journal ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM weather_journal_old'
+    )
+    op.drop_table('weather_journal_old')
+    op.execute('ALTER SEQUENCE weather_journal_id_seq OWNED BY weather_journal.id')
+
+
+def upgrade() -> None:
+    # * Nothing queries by temperature or precipitation, the date B-tree is replaced by
+    # * the BRIN below
+    op.drop_index('ix_weather_journal_temperature', table_name='weather_journal')
+    op.drop_index('ix_weather_journal_precipitation', table_name='weather_journal')
+    op.drop_index('ix_weather_journal_date', table_name='weather_journal')
+
+    _move_aside_old_table()
+
+    # * The partition key has to be a part of every unique constraint, hence (id, date)
+    op.create_table(
+        'weather_journal',
+        *_weather_columns(),
+        sa.PrimaryKeyConstraint('id', 'date', name='weather_journal_pkey'),
+        postgresql_partition_by='RANGE (date)',
+    )
+
+    # * A partition per year of the stored data, the rest of the years are created by
+    # * the collector before it writes
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            year integer;
+        BEGIN
+            FOR year IN
+                SELECT DISTINCT EXTRACT(YEAR FROM date)::integer
+                FROM weather_journal_old
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE weather_journal_y%s PARTITION OF weather_journal '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    year, make_date(year, 1, 1), make_date(year + 1, 1, 1)
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+    op.execute(
+        'CREATE TABLE weather_journal_default PARTITION OF weather_journal DEFAULT'
+    )
+
+    op.create_index(
+        'ix_weather_journal_city_id_date',
+        'weather_journal',
+        ['city_id', 'date'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_weather_journal_date_brin',
+        'weather_journal',
+        ['date'],
+        unique=False,
+        postgresql_using='brin',
+    )
+
+    _move_data_and_drop_old_table()
+    op.execute('ANALYZE weather_journal')
+
+
+def downgrade() -> None:
+    _move_aside_old_table()
+
+    op.create_table(
+        'weather_journal',
+        *_weather_columns(),
+        sa.PrimaryKeyConstraint('id', name='weather_journal_pkey'),
+    )
+    op.create_index(
+        'ix_weather_journal_date', 'weather_journal', ['date'], unique=False
+    )
+    op.create_index(
+        'ix_weather_journal_precipitation',
+        'weather_journal',
+        ['precipitation'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_weather_journal_temperature',
+        'weather_journal',
+        ['temperature'],
+        unique=False,
+    )
+
+    # * Dropping the partitioned table drops all of its partitions as well
+    _move_data_and_drop_old_table()
@@ -0,0 +1,72 @@
+"""weather rollups
+
+Revision ID: b47e0a9c3d25
+Revises: 8f2b6c4d1e93
+Create Date: 2024-02-17 11:40:08.913562
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b47e0a9c3d25'
+down_revision: str | None = '8f2b6c4d1e93'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+TABLES = ('weather_rollup_hourly', 'weather_rollup_daily', 'weather_rollup_monthly')
+VALUE_COLUMNS = (
+    'temperature',
+    'pressure',
+    'wind_speed',
+    'wind_direction',
+    'humidity',
+    'clouds',
+    'precipitation',
+    'snow',
+)
+
+
+def _backfill(target: str, source: str, bucket: str, samples: str) -> None:
+    averages = ', '.join(f'avg({column})' for column in VALUE_COLUMNS)
+    op.execute(
+        f'INSERT INTO {target} (city_id, date, {", ".join(VALUE_COLUMNS)}, samples) '
+        f'SELECT city_id, {bucket}, {averages}, {samples} FROM {source} '
+        f'GROUP BY city_id, {bucket}'
+    )
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.create_table(
+            table,
+            sa.Column('city_id', sa.Integer(), nullable=False),
+            sa.Column('date', sa.DateTime(), nullable=False),
+            *[sa.Column(column, sa.Float(), nullable=True) for column in VALUE_COLUMNS],
+            sa.Column('samples', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['city_id'], ['city.id']),
+            sa.PrimaryKeyConstraint('city_id', 'date'),
+        )
+
+    _backfill('weather_rollup_hourly', 'weather_journal', 'date', 'count(*)')
+    _backfill(
+        'weather_rollup_daily',
+        'weather_rollup_hourly',
+        "date_trunc('day', date)",
+        'sum(samples)',
+    )
+    _backfill(
+        'weather_rollup_monthly',
+        'weather_rollup_daily',
+        "date_trunc('month', date)",
+        'sum(samples)',
+    )
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_table(table)
@@ -2,55 +2,146 @@ import asyncio
 import sys
 import time
 from collections.abc import Callable
-from datetime import datetime
-
-import aiohttp
+from datetime import UTC, datetime, timedelta
 
+from forecast.cache import CacheInvalidator, RedisBackend
+from forecast.client_session_classes import ResponseCache
 from forecast.config import config
 from forecast.db.connect import connect, create_engine
+from forecast.db.pool_metrics import format_pool_stats, pool_stats, report_periodically
 from forecast.logging import logger_provider
 from forecast.parse_args import create_parser, parse_args
-from forecast.providers import Meteostat, WorldWeatherOnline
-from forecast.services import CollectorService, PopulateCitiesService
+from lib.fs_utils import format_path
 
 logger = logger_provider(__name__)
 
 
 async def run_gather(
-    event_loop: asyncio.AbstractEventLoop, start_date: datetime, end_date: datetime
+    event_loop: asyncio.AbstractEventLoop,
+    start_date: datetime,
+    end_date: datetime,
+    *,
+    incremental: bool = False,
 ) -> None:
+    # * The providers and the services pull in aiohttp and the scientific stack,
+    # * the runs skipping the gathering don't import them
+    import aiohttp
+
+    from forecast.providers import Meteostat
+    from forecast.services import CollectorService, PopulateCitiesService
+
     logger.info('Starting')
     start = time.perf_counter()
 
-    engine = create_engine(config.db.connection_string)
+    engine = create_engine(config.db.connection_string, config.db.collector_engine)
     session_factory = await connect(engine)
-
-    async with aiohttp.TCPConnector() as connector:
-        async with PopulateCitiesService(
-            session_factory, connector=connector
-        ) as populate_cities_service:
-            await populate_cities_service.run()
-
-        # open_meteo = OpenMeteo(connector, config.data_sources.open_meteo.api_key)
-        meteostat = Meteostat(connector, event_loop=event_loop)
-        # world_weather = WorldWeatherOnline(
-        #     connector, config.data_sources.world_weather_online.api_key
-        # )
-        # visual_crossing = VisualCrossing(connector, event_loop=event_loop)
-
-        async with CollectorService(
-            session_factory,
-            start_date,
-            end_date,
-            [meteostat],
-            event_loop,
-        ) as collector_service:
-            await collector_service.run()
+    pool_reporter = asyncio.create_task(report_periodically(engine))
+
+    # * The API processes are told about the new data, their cached responses of it are
+    # * dropped
+    shared_cache = None
+    if (
+        config.api.response_cache.enabled
+        and config.api.response_cache.redis_url is not None
+    ):
+        shared_cache = RedisBackend.from_url(config.api.response_cache.redis_url)
+    cache_invalidator = CacheInvalidator(shared_cache)
+
+    try:
+        response_cache = None
+        if config.cache.enabled:
+            response_cache = ResponseCache(
+                config.cache.folder,
+                config.cache.max_size_mb * 1024 * 1024,
+                timedelta(minutes=config.cache.ttl_minutes),
+            )
+
+        async with aiohttp.TCPConnector() as connector:
+            async with PopulateCitiesService(
+                session_factory,
+                connector=connector,
+                cache_invalidator=cache_invalidator,
+            ) as populate_cities_service:
+                await populate_cities_service.run()
+
+            # open_meteo = OpenMeteo(connector, config.data_sources.open_meteo.api_key)
+            meteostat = Meteostat(
+                connector,
+                event_loop=event_loop,
+                response_cache=response_cache,
+                rate_limit=config.data_sources.meteostat.rate_limit,
+                stations_max_age=timedelta(
+                    days=config.data_sources.meteostat.stations_max_age_days
+                ),
+            )
+            # world_weather = WorldWeatherOnline(
+            #     connector, config.data_sources.world_weather_online.api_key
+            # )
+            # visual_crossing = VisualCrossing(connector, event_loop=event_loop)
+
+            async with CollectorService(
+                session_factory,
+                start_date,
+                end_date,
+                [meteostat],
+                event_loop,
+                incremental=incremental,
+                collector_config=config.collector,
+                cache_invalidator=cache_invalidator,
+            ) as collector_service:
+                await collector_service.run()
+    finally:
+        pool_reporter.cancel()
+
+        stats = pool_stats(engine)
+        if stats is not None:
+            logger.info(format_pool_stats(stats))
+
+        if shared_cache is not None:
+            await shared_cache.close()
+
+        await engine.dispose()
 
     end = time.perf_counter()
     logger.info(f'Time taken - {end - start}')
 
 
+async def run_training() -> None:
+    from forecast.prediction import ArtifactStore
+    from forecast.prediction.training import fetch_training_data, fit_predictor
+
+    logger.info('Training the predictor')
+    start = time.perf_counter()
+
+    engine = create_engine(config.db.connection_string, config.db.collector_engine)
+    try:
+        session_factory = await connect(engine)
+        async with session_factory() as session:
+            # * The stored dates are naive UTC
+            since = datetime.now(UTC).replace(tzinfo=None) - timedelta(
+                days=config.predictor.training_days
+            )
+            dates, targets = await fetch_training_data(session, since)
+    finally:
+        await engine.dispose()
+
+    meta, weights = await asyncio.to_thread(
+        fit_predictor, dates, targets, config.predictor.epochs
+    )
+
+    # * The API processes pick the new version up on their own
+    store = ArtifactStore(config.predictor.folder)
+    folder = store.save(meta, weights)
+    removed = store.prune(config.predictor.keep_versions)
+
+    logger.info(
+        f'Saved the predictor {meta.version} to "{format_path(folder)}", trained on '
+        f'{meta.samples} samples '
+        f'with a loss of {meta.loss:.5f}, removed {len(removed)} older version(s) '
+        f'in {time.perf_counter() - start:.2f} s'
+    )
+
+
 START_DATE = datetime(2023, 1, 31)
 END_DATE = datetime(2024, 1, 31)
 
@@ -59,15 +150,34 @@ async def main(event_loop: asyncio.AbstractEventLoop) -> None:
     parser = create_parser()
     args = parse_args(parser)
 
-    if args.initial_run:
-        delta = END_DATE - START_DATE
+    if args.initial_run or args.incremental_run:
+        start_date = args.start_date or START_DATE
+        if args.end_date is not None:
+            end_date = args.end_date
+        elif args.incremental_run:
+            # * The stored dates are naive UTC
+            end_date = datetime.now(UTC).replace(
+                tzinfo=None, minute=0, second=0, microsecond=0
+            )
+        else:
+            end_date = END_DATE
+
+        delta = end_date - start_date
         logger.info(
-            f'Starting the gathering for {START_DATE.isoformat()} - {END_DATE.isoformat()}, a {delta = }'
+            f'Starting the {"incremental " if args.incremental_run else ""}gathering '
+            f'for {start_date.isoformat()} - {end_date.isoformat()}, a {delta = }'
         )
 
-        await run_gather(event_loop, START_DATE, END_DATE)
+        await run_gather(
+            event_loop, start_date, end_date, incremental=args.incremental_run
+        )
     else:
-        logger.info('Skipping the gather step. To gather provide --initial')
+        logger.info(
+            'Skipping the gather step. To gather provide --initial or --incremental'
+        )
+
+    if args.train_predictor:
+        await run_training()
 
 
 def get_loop_factory() -> Callable[..., asyncio.AbstractEventLoop]:
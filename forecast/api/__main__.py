@@ -2,13 +2,14 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from forecast.api.lifespan import lifespan
 from forecast.api.routes import root_router
 from forecast.config import config
 from forecast.logging import logger_provider
 
 logger = logger_provider(__name__)
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 logger.info('Including the root router')
 app.include_router(root_router)
@@ -0,0 +1,42 @@
+from datetime import UTC, datetime, timedelta
+
+from fastapi import Request, Response, status
+
+from forecast.cache import make_etag
+
+# * The data of the latest days is still being collected, the clients revalidate it on
+# * every request
+RECENT_DATA_SPAN = timedelta(days=2)
+
+
+def cache_control(max_age_secs: int, to_date: datetime | None = None) -> str:
+    now = datetime.now(UTC).replace(tzinfo=None)
+    if to_date is not None and to_date >= now - RECENT_DATA_SPAN:
+        return 'no-cache'
+
+    # * A backfill may still change the older data, the max-age bounds how long a client
+    # * may miss it
+    return f'public, max-age={max_age_secs}'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is None:
+        return False
+
+    candidates = {candidate.strip() for candidate in if_none_match.split(',')}
+    # * The weak comparison, a W/ prefix doesn't matter for a GET
+    return '*' in candidates or etag in {
+        candidate.removeprefix('W/') for candidate in candidates
+    }
+
+
+def json_response(request: Request, body: bytes, cache_control: str) -> Response:
+    """The serialized body with its ETag, or a 304 when the client already has it."""
+    etag = make_etag(body)
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(body, media_type='application/json', headers=headers)
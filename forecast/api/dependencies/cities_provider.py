@@ -4,19 +4,30 @@ from fastapi import Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from forecast.api.dependencies.db_session import session_factory_provider
 from forecast.db.models import City
 
 
 class CitiesProvider:
-    def __init__(self):
-        self._cities: list[City] | None = []
+    def __init__(self) -> None:
+        self._cities: list[City] | None = None
 
-    async def fetch_cities_and_cache(self, session: AsyncSession) -> None:
-        self._cities = list((await session.scalars(select(City))).all())
+    @property
+    def is_loaded(self) -> bool:
+        return self._cities is not None
 
-    async def __call__(self):
+    async def fetch_cities_and_cache(self, session: AsyncSession) -> list[City]:
+        cities = list((await session.scalars(select(City).order_by(City.id))).all())
+        self._cities = cities
+
+        return cities
+
+    async def __call__(self) -> list[City]:
+        # * Loaded by the app lifespan, this only happens outside of the app
         if self._cities is None:
-            await self.fetch_cities_and_cache()
+            session_factory = await session_factory_provider()
+            async with session_factory() as session:
+                return await self.fetch_cities_and_cache(session)
 
         return self._cities
 
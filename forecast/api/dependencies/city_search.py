@@ -0,0 +1,45 @@
+from typing import Annotated
+
+from fastapi import Depends
+
+from forecast.api.dependencies.cities_provider import InjectedCities
+from forecast.db.models import City
+from lib.search import PrefixIndex
+
+
+class CitySearchIndex:
+    """
+    The cities by the prefixes of their names, name words and countries, the most
+    populous first.
+    """
+
+    def __init__(self, cities: list[City]) -> None:
+        self._cities = cities
+        self._index = PrefixIndex(
+            [(city.name, city.country_name) for city in cities],
+            [city.population for city in cities],
+        )
+
+    def search(self, query: str, limit: int) -> list[City]:
+        return [self._cities[index] for index in self._index.search(query, limit)]
+
+
+class CitySearchProvider:
+    def __init__(self) -> None:
+        self._index: CitySearchIndex | None = None
+
+    def create_index_and_cache(self, cities: list[City]) -> None:
+        self._index = CitySearchIndex(cities)
+
+    async def __call__(self, cities: InjectedCities) -> CitySearchIndex:
+        # * Built by the app lifespan, this only happens outside of the app
+        if self._index is None:
+            self.create_index_and_cache(cities)
+
+            assert self._index is not None
+
+        return self._index
+
+
+city_search_provider = CitySearchProvider()
+InjectedCitySearch = Annotated[CitySearchIndex, Depends(city_search_provider)]
@@ -1,30 +1,92 @@
 import typing
+from collections.abc import Sequence
 
 import numpy as np
-import numpy.typing as npt
 from fastapi import HTTPException, Query, status
-from scipy.spatial.distance import cdist
-from sqlalchemy import select
 
-from forecast.api.dependencies import InjectedDBSesssion
 from forecast.api.dependencies.cities_provider import InjectedCities
+from forecast.api.models.weather import BatchLocation
 from forecast.db.models import City
+from lib.geo import SpatialIndex
 
 
 class ClosestCityProvider:
     def __init__(self) -> None:
-        self._cities_coordinates: npt.NDArray[np.float64] | None = None
+        self._cities_index: SpatialIndex | None = None
+        self._cities_by_name: dict[str, City] = {}
 
-    async def create_coordinates_and_cache(self, cities: list[City]) -> None:
-        coordinates: list[tuple[float, float]] = []
-        for city in cities:
-            coordinates.append((city.latitude, city.longitude))
+    @property
+    def is_loaded(self) -> bool:
+        return self._cities_index is not None
 
-        self._cities_coordinates = np.array(coordinates)
+    async def create_index_and_cache(self, cities: list[City]) -> None:
+        self._cities_index = SpatialIndex.from_points(
+            [(city.latitude, city.longitude) for city in cities]
+        )
+
+        # * The names aren't unique, the most populous city goes by the name.
+        # * The one rule for both the single and the batch lookups
+        self._cities_by_name = {
+            city.name: city for city in sorted(cities, key=lambda city: city.population)
+        }
+
+    async def _ensure_index(self, cities: list[City]) -> SpatialIndex:
+        # * Built by the app lifespan, this only happens outside of the app
+        if self._cities_index is None:
+            await self.create_index_and_cache(cities)
+
+            # * There isn't really a way to make a typing.TypeGuard for this. Just for
+            # * pyright
+            if typing.TYPE_CHECKING:
+                assert self._cities_index is not None
+
+        return self._cities_index
+
+    async def resolve_many(
+        self, cities: list[City], locations: Sequence[BatchLocation]
+    ) -> list[City | None]:
+        """
+        Resolves all the coordinates in a single pass over the index and the names from
+        memory. None for the names no city goes by.
+        """
+        cities_index = await self._ensure_index(cities)
+
+        resolved: list[City | None] = [
+            self._cities_by_name.get(location.city)
+            if location.city is not None
+            else None
+            for location in locations
+        ]
+
+        positions = [
+            position
+            for position, location in enumerate(locations)
+            if location.latitude is not None and location.longitude is not None
+        ]
+        if len(positions) == 0:
+            return resolved
+
+        if len(cities) == 0:
+            raise HTTPException(
+                status.HTTP_404_NOT_FOUND, detail='There are no cities to pick from'
+            )
+
+        coordinates = np.array(
+            [
+                (locations[position].latitude, locations[position].longitude)
+                for position in positions
+            ],
+            dtype=np.float64,
+        )
+        _, closest = cities_index.nearest(coordinates[:, 0], coordinates[:, 1])
+
+        for position, index in zip(positions, closest[:, 0].tolist()):
+            resolved[position] = cities[index]
+
+        return resolved
 
     async def __call__(
         self,
-        session: InjectedDBSesssion,
         cities: InjectedCities,
         latitude: float | None = Query(alias='lat', default=None, ge=-90, le=90),
         longitude: float | None = Query(alias='long', default=None, ge=-180, le=180),
@@ -50,19 +112,19 @@ class ClosestCityProvider:
                 detail="Please either provide the long and lat or the city, can't be both",
             )
 
-        if latitude is not None and longitude is not None:
-            if self._cities_coordinates is None:
-                await self.create_coordinates_and_cache(cities)
+        cities_index = await self._ensure_index(cities)
 
-                # * There isn't really a way to make a typing.TypeGuard for this. Just for pyright
-                if typing.TYPE_CHECKING:
-                    assert self._cities_coordinates is not None
+        if latitude is not None and longitude is not None:
+            if len(cities) == 0:
+                raise HTTPException(
+                    status.HTTP_404_NOT_FOUND, detail='There are no cities to pick from'
+                )
 
-            closest = cdist(np.array([(latitude, longitude)]), self._cities_coordinates)
+            _, closest = cities_index.nearest_one(latitude, longitude)
 
-            city = cities[closest.argmin()]
+            city = cities[closest]
         else:
-            city = await session.scalar(select(City).where(City.name == city_name))
+            city = self._cities_by_name.get(city_name)
             if city is None:
                 raise HTTPException(
                     status.HTTP_404_NOT_FOUND, detail=f'City {city_name} not found'
@@ -71,3 +133,6 @@ class ClosestCityProvider:
             return city
 
         return city
+
+
+closest_city_provider = ClosestCityProvider()
@@ -2,23 +2,49 @@ from collections.abc import AsyncIterator
 from typing import Annotated
 
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from forecast.config import config
-from forecast.db.connect import connect, create_engine
+from forecast.db.connect import connect, create_engine, warm_up
 
 
 class SessionFactoryProvider:
     def __init__(self) -> None:
-        self._engine = create_engine(config.db.connection_string)
+        self._engine: AsyncEngine | None = None
         self._session_factory: None | async_sessionmaker[AsyncSession] = None
 
+    async def start(
+        self, warm_connections: int = 0
+    ) -> async_sessionmaker[AsyncSession]:
+        if self._engine is None or self._session_factory is None:
+            self._engine = create_engine(
+                config.db.connection_string, config.db.api_engine
+            )
+            self._session_factory = await connect(self._engine)
+
+        if warm_connections > 0:
+            await warm_up(self._engine, warm_connections)
+
+        return self._session_factory
+
+    @property
+    def engine(self) -> AsyncEngine | None:
+        return self._engine
+
+    async def dispose(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+
+        self._engine = None
+        self._session_factory = None
+
     async def __call__(self) -> async_sessionmaker[AsyncSession]:
+        # * Started by the app lifespan, the lazy start is left for the callers outside
+        # * of the app
         if self._session_factory is not None:
             return self._session_factory
 
-        self._session_factory = await connect(self._engine)
-        return self._session_factory
+        return await self.start()
 
 
 session_factory_provider = SessionFactoryProvider()
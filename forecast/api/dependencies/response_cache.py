@@ -0,0 +1,91 @@
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from forecast.cache import (
+    CacheBackend,
+    InvalidationListener,
+    MemoryBackend,
+    RedisBackend,
+    ResponseStore,
+)
+from forecast.config import config
+from forecast.logging import logger_provider
+
+
+class ResponseCacheProvider:
+    def __init__(self) -> None:
+        self.logger = logger_provider(__name__)
+
+        self._store: ResponseStore | None = None
+        self._shared: RedisBackend | None = None
+        self._listener: InvalidationListener | None = None
+
+    def _create_store(self) -> ResponseStore:
+        cache_config = config.api.response_cache
+
+        shared: CacheBackend | None = None
+        if cache_config.enabled and cache_config.redis_url is not None:
+            self._shared = RedisBackend.from_url(cache_config.redis_url)
+            shared = self._shared
+
+        # * A disabled cache is an empty one, nothing fits in it
+        max_size_bytes = cache_config.max_size_mb * 1024 * 1024
+        return ResponseStore(
+            MemoryBackend(max_size_bytes if cache_config.enabled else 0),
+            shared,
+            ttl=timedelta(hours=cache_config.ttl_hours),
+        )
+
+    async def start(
+        self,
+        engine: AsyncEngine,
+        *,
+        on_invalidation: Callable[[list[str]], Awaitable[None]] | None = None,
+        on_reconnect: Callable[[], Awaitable[None]] | None = None,
+    ) -> None:
+        """
+        The hooks let the rest of the app's in-memory state follow the collector's
+        changes too.
+        """
+        store = self._store = self._create_store()
+
+        async def invalidate(keys: list[str]) -> None:
+            await store.invalidate_local(keys)
+            if on_invalidation is not None:
+                await on_invalidation(keys)
+
+        async def reconnected() -> None:
+            # * The invalidations sent in the meantime are lost
+            store.clear_local()
+            if on_reconnect is not None:
+                await on_reconnect()
+
+        self._listener = InvalidationListener(engine, invalidate, reconnected)
+        await self._listener.start()
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            await self._listener.stop()
+            self._listener = None
+
+        if self._shared is not None:
+            await self._shared.close()
+            self._shared = None
+
+        self._store = None
+
+    def __call__(self) -> ResponseStore:
+        # * Started by the app lifespan. Without it nothing would invalidate the
+        # * entries, so nothing is cached
+        if self._store is None:
+            return ResponseStore(
+                MemoryBackend(0),
+                ttl=timedelta(hours=config.api.response_cache.ttl_hours),
+            )
+
+        return self._store
+
+
+response_cache_provider = ResponseCacheProvider()
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+from forecast.api.dependencies.cities_provider import cities_provider
+from forecast.api.dependencies.city_search import city_search_provider
+from forecast.api.dependencies.closest_city_provider import closest_city_provider
+from forecast.api.dependencies.db_session import session_factory_provider
+from forecast.api.dependencies.prediction_model import predictor_provider
+from forecast.api.dependencies.response_cache import response_cache_provider
+from forecast.cache import CITIES_VERSION_KEY
+from forecast.config import config
+from forecast.logging import logger_provider
+from forecast.prediction import ArtifactStore
+
+logger = logger_provider(__name__)
+
+
+class Readiness:
+    """The warmup steps the app waits for before the healthcheck reports it as ready."""
+
+    def __init__(self) -> None:
+        self._pending: set[str] = {'startup'}
+
+    def reset(self) -> None:
+        self._pending = {'startup'}
+
+    @property
+    def is_ready(self) -> bool:
+        return len(self._pending) == 0
+
+    @property
+    def pending(self) -> list[str]:
+        return sorted(self._pending)
+
+    def expect(self, step: str) -> None:
+        self._pending.add(step)
+
+    def done(self, step: str) -> None:
+        self._pending.discard(step)
+
+
+readiness = Readiness()
+
+
+async def _load_cities() -> int:
+    session_factory = await session_factory_provider()
+    async with session_factory() as session:
+        cities = await cities_provider.fetch_cities_and_cache(session)
+
+    # * Nothing is awaited in between, the requests never see the cities and their
+    # * indexes disagree
+    await closest_city_provider.create_index_and_cache(cities)
+    city_search_provider.create_index_and_cache(cities)
+
+    return len(cities)
+
+
+async def _reload_cities() -> None:
+    try:
+        count = await _load_cities()
+    except Exception:
+        logger.exception('Could not reload the cities, serving the previous ones')
+        return
+
+    logger.info(f'Reloaded {count} cities')
+
+
+async def _on_invalidation(keys: list[str]) -> None:
+    if CITIES_VERSION_KEY in keys:
+        await _reload_cities()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    start = time.perf_counter()
+    readiness.reset()
+
+    await session_factory_provider.start(warm_connections=config.api.warm_connections)
+    city_count = await _load_cities()
+
+    assert session_factory_provider.engine is not None
+    await response_cache_provider.start(
+        session_factory_provider.engine,
+        on_invalidation=_on_invalidation,
+        on_reconnect=_reload_cities,
+    )
+
+    logger.info(
+        f'Warmed up {config.api.warm_connections} connections and '
+        f'{city_count} cities in {time.perf_counter() - start:.2f} s'
+    )
+
+    # * Trained offline, the newer versions are picked up while the app is running
+    predictor_store = ArtifactStore(config.predictor.folder)
+    if config.api.require_predictor:
+        readiness.expect('predictor')
+
+    if predictor_provider.load_latest(predictor_store):
+        readiness.done('predictor')
+    else:
+        logger.warning(
+            'There is no trained predictor yet, train one with python -m forecast '
+            '--train-predictor'
+        )
+
+    predictor_watcher = asyncio.create_task(
+        predictor_provider.watch(
+            predictor_store,
+            config.predictor.reload_interval_secs,
+            on_load=lambda: readiness.done('predictor'),
+        )
+    )
+
+    readiness.done('startup')
+
+    try:
+        yield
+    finally:
+        readiness.expect('shutdown')
+
+        predictor_watcher.cancel()
+        await asyncio.gather(predictor_watcher, return_exceptions=True)
+
+        await response_cache_provider.stop()
+        await session_factory_provider.dispose()
+        logger.info('Disposed of the db engine')
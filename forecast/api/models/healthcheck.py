@@ -1,7 +1,8 @@
-from typing import Literal
-
 from pydantic import BaseModel
 
 
 class HealthcheckResponse(BaseModel):
-    ok: Literal[True]
+    ok: bool
+    # * The warmup steps still running, the app only reports itself as ok once there are
+    # * none
+    pending: list[str] = []
@@ -1,6 +1,9 @@
 from datetime import datetime
+from typing import Self
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from forecast.db.rollups import Resolution
 
 
 class WeatherData(BaseModel):
@@ -20,3 +23,54 @@ class WeatherData(BaseModel):
 class WeatherResponse(BaseModel):
     data: list[WeatherData]
     next_date: datetime | None
+    next_cursor: str | None
+    resolution: Resolution
+
+
+class BatchLocation(BaseModel):
+    """
+    Either a city name or a lat and long pair, the latter resolves to the closest city.
+    """
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    city: str | None = None
+    latitude: float | None = Field(default=None, alias='lat', ge=-90, le=90)
+    longitude: float | None = Field(default=None, alias='long', ge=-180, le=180)
+
+    @model_validator(mode='after')
+    def check_city_or_coordinates(self) -> Self:
+        has_coordinates = self.latitude is not None and self.longitude is not None
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError('Both the lat and long have to be provided')
+
+        if has_coordinates == (self.city is not None):
+            raise ValueError('Either the lat and long or the city have to be provided')
+
+        return self
+
+
+class WeatherBatchRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    from_date: datetime = Field(alias='from')
+    to_date: datetime = Field(alias='to')
+    resolution: Resolution | None = None
+    locations: list[BatchLocation] = Field(min_length=1)
+
+
+class CityWeather(BaseModel):
+    name: str
+    country: str
+    latitude: float
+    longitude: float
+    data: list[WeatherData]
+
+
+class WeatherBatchResponse(BaseModel):
+    resolution: Resolution
+    # * Every city once, in the order the locations were requested in
+    cities: list[CityWeather]
+    # * The index of every requested location's city in cities, None when there is no
+    # * city by the name
+    locations: list[int | None]
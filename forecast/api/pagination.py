@@ -0,0 +1,33 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Self
+
+from pydantic import BaseModel, ValidationError
+
+from forecast.db.rollups import Resolution
+
+
+class InvalidCursorError(ValueError): ...
+
+
+class WeatherCursor(BaseModel):
+    """
+    The keyset position of a /weather page, the next page starts after (city_id, date).
+    Handed out as an opaque url-safe token, the clients shouldn't build or parse it
+    themselves.
+    """
+
+    resolution: Resolution
+    city_id: int
+    date: datetime
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(self.model_dump_json().encode()).decode()
+
+    @classmethod
+    def decode(cls, token: str) -> Self:
+        try:
+            return cls.model_validate_json(base64.urlsafe_b64decode(token.encode()))
+        except (binascii.Error, ValidationError) as error:
+            raise InvalidCursorError(f'Malformed cursor: {token}') from error
@@ -1,17 +1,23 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
 
+from forecast.api.lifespan import readiness
 from forecast.api.models.healthcheck import HealthcheckResponse
 from forecast.api.routes.cities import router as cities_router
+from forecast.api.routes.metrics import router as metrics_router
 from forecast.api.routes.weather import router as weather_router
+from forecast.api.routes.weather_export import router as weather_export_router
 
 root_router = APIRouter()
 
 
 @root_router.get('/')
-async def healthcheck() -> HealthcheckResponse:
-    return HealthcheckResponse(ok=True)
+async def healthcheck(response: Response) -> HealthcheckResponse:
+    if not readiness.is_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
 
+    return HealthcheckResponse(ok=readiness.is_ready, pending=readiness.pending)
 
-routers = [weather_router, cities_router]
+
+routers = [weather_router, weather_export_router, cities_router, metrics_router]
 for router in routers:
     root_router.include_router(router)
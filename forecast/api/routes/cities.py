@@ -1,9 +1,9 @@
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel
-from sqlalchemy import select
 
-from forecast.api.dependencies.db_session import InjectedDBSesssion
-from forecast.db.models import City
+from forecast.api.caching import cache_control, json_response
+from forecast.api.dependencies.city_search import InjectedCitySearch
+from forecast.config import config
 
 router = APIRouter(prefix='/cities')
 
@@ -19,28 +19,26 @@ class CitiesSearchResponse(BaseModel):
     cities: list[CityEntry]
 
 
-@router.get('/search')
+@router.get('/search', response_model=CitiesSearchResponse)
 async def get_cities(
-    db_session: InjectedDBSesssion, query: str = Query()
-) -> CitiesSearchResponse:
+    request: Request,
+    city_search: InjectedCitySearch,
+    query: str = Query(),
+) -> Response:
     if len(query) < 3:
         raise HTTPException(
             status.HTTP_400_BAD_REQUEST,
             detail='You may not search, unless the query is longer than 2 characters',
         )
 
-    search_query = (
-        select(City.name, City.country_name)
-        .where(
-            City.name.ilike(f'{query}%') |
-            City.country_name.ilike(f'{query}%')
-        )
-        .order_by(City.population.desc())
-        .limit(DEFAULT_RESULT_COUNT)
+    # * Served from memory, the typeahead fires on every keystroke
+    cities = city_search.search(query, DEFAULT_RESULT_COUNT)
+    response = CitiesSearchResponse(
+        cities=[CityEntry(name=city.name, country=city.country_name) for city in cities]
     )
 
-    query_data = await db_session.execute(search_query)
-
-    return CitiesSearchResponse(
-        cities=[CityEntry(name=city[0], country=city[1]) for city in query_data]
+    return json_response(
+        request,
+        response.model_dump_json().encode(),
+        cache_control(config.api.response_cache.max_age_secs),
     )
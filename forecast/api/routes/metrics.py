@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException, status
+
+from forecast.api.dependencies.db_session import session_factory_provider
+from forecast.db.pool_metrics import PoolStats, pool_stats
+
+router = APIRouter(prefix='/metrics')
+
+
+@router.get('/db')
+async def get_db_metrics() -> PoolStats:
+    stats = None
+    if session_factory_provider.engine is not None:
+        stats = pool_stats(session_factory_provider.engine)
+
+    if stats is None:
+        raise HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE, detail='The db pool is not started'
+        )
+
+    return stats
@@ -1,72 +1,292 @@
+from collections.abc import Sequence
 from datetime import datetime
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import Integer, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from forecast.api.caching import cache_control, json_response
 from forecast.api.dependencies import InjectedDBSesssion
-from forecast.api.dependencies.closest_city_provider import ClosestCityProvider
-from forecast.api.models.weather import WeatherData, WeatherResponse
-from forecast.db.models import City, WeatherJournal
+from forecast.api.dependencies.cities_provider import InjectedCities
+from forecast.api.dependencies.closest_city_provider import closest_city_provider
+from forecast.api.dependencies.response_cache import response_cache_provider
+from forecast.api.models.weather import (
+    CityWeather,
+    WeatherBatchRequest,
+    WeatherBatchResponse,
+    WeatherData,
+    WeatherResponse,
+)
+from forecast.api.pagination import InvalidCursorError, WeatherCursor
+from forecast.cache import ResponseStore, weather_version_keys
+from forecast.config import config
+from forecast.db.models import City
+from forecast.db.models.weather_rollup import WeatherRollupMixin
+from forecast.db.rollups import (
+    BUCKET_START,
+    ROLLUP_MODELS,
+    Resolution,
+    resolution_for_span,
+)
 from forecast.logging import logger_provider
 
 router = APIRouter(prefix='/weather')
 
 
-PAGE_SIZE = 500
+logger = logger_provider(__name__)
 
 
-logger = logger_provider(__name__)
-closest_city_provider = ClosestCityProvider()
+def _weather_columns(rollup: type[WeatherRollupMixin]) -> tuple[Any, ...]:
+    return (
+        rollup.date,
+        rollup.temperature,
+        rollup.pressure,
+        rollup.wind_speed,
+        rollup.wind_direction,
+        rollup.humidity,
+        rollup.precipitation,
+        rollup.snow,
+    )
 
 
-@router.get('/')
-async def get_weather(
-    session: InjectedDBSesssion,
-    from_date: datetime = Query(alias='from'),
-    to_date: datetime = Query(alias='to'),
-    city: City = Depends(closest_city_provider),
-    cursor: datetime | None = Query(default=None),
-) -> WeatherResponse:
+def _validate_range(
+    from_date: datetime, to_date: datetime
+) -> tuple[datetime, datetime]:
     if from_date > to_date:
         raise HTTPException(
             status.HTTP_400_BAD_REQUEST, detail='from should be earlier in time to'
         )
 
-    from_date = from_date.replace(tzinfo=None)
-    to_date = to_date.replace(tzinfo=None)
+    return from_date.replace(tzinfo=None), to_date.replace(tzinfo=None)
 
-    logger.info(f'Fetching further data for: {city.name}')
 
-    history_query = (
-        select(
-            WeatherJournal.date,
-            func.avg(WeatherJournal.temperature).label('temperature'),
-            func.avg(WeatherJournal.pressure).label('pressure'),
-            func.avg(WeatherJournal.wind_speed).label('wind_speed'),
-            func.avg(WeatherJournal.wind_direction).label('wind_direction'),
-            func.avg(WeatherJournal.humidity).label('humidity'),
-            func.avg(WeatherJournal.precipitation).label('precipitation'),
-            func.avg(WeatherJournal.snow).label('snow'),
+def _validate_limit(limit: int | None) -> int:
+    if limit is None:
+        return config.api.page_size
+
+    if limit > config.api.max_page_size:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f'limit may not be greater than {config.api.max_page_size}',
         )
+
+    return limit
+
+
+async def fetch_weather_page(
+    session: AsyncSession,
+    city: City,
+    from_date: datetime,
+    to_date: datetime,
+    resolution: Resolution,
+    after: datetime | None,
+    limit: int,
+) -> WeatherResponse:
+    rollup = ROLLUP_MODELS[resolution]
+
+    # * Keyset pagination over the (city_id, date) primary key, a page costs the same
+    # * wherever it starts
+    range_filters = [
+        rollup.date >= BUCKET_START[resolution](from_date),
+        rollup.date <= to_date,
+    ]
+    if after is not None:
+        range_filters.append(rollup.date > after)
+
+    logger.info(f'Fetching further {resolution} data for: {city.name}')
+
+    history_query = (
+        select(*_weather_columns(rollup))
         .where(
-            # WeatherJournal.date <= datetime(2023, 10, 3),
-            #WeatherJournal.date <= to_date,
-            WeatherJournal.city_id == city.id,
-            # WeatherJournal.precipitation.isnot(None),
-            # WeatherJournal.snow.isnot(None),
+            rollup.city_id == city.id,
+            *range_filters,
         )
-        .group_by(WeatherJournal.date)
-        .order_by(WeatherJournal.date)
-        .limit(PAGE_SIZE + 1)
+        .order_by(rollup.date)
+        .limit(limit + 1)
     )
 
     history = (await session.execute(history_query)).all()
-    print(history)
     data = [WeatherData.model_validate(model._mapping) for model in history]
 
+    # * The extra row only tells whether there is a next page, it's served as its first
+    # * row
     next_date = None
-    if len(data) > 0:
-        last_item = data.pop(-1)
-        next_date = last_item.date
+    next_cursor = None
+    if len(data) > limit:
+        next_date = data[limit].date
+        data = data[:limit]
+        next_cursor = WeatherCursor(
+            resolution=resolution, city_id=city.id, date=data[-1].date
+        ).encode()
+
+    return WeatherResponse(
+        data=data,
+        next_date=next_date,
+        next_cursor=next_cursor,
+        resolution=resolution,
+    )
+
+
+@router.get('/', response_model=WeatherResponse)
+async def get_weather(
+    request: Request,
+    session: InjectedDBSesssion,
+    from_date: datetime = Query(alias='from'),
+    to_date: datetime = Query(alias='to'),
+    city: City = Depends(closest_city_provider),
+    cursor: str | None = Query(default=None),
+    resolution: Resolution | None = Query(default=None),
+    # * Resolved against the config per request, nothing is read from it at import time
+    limit: int | None = Query(default=None, ge=1),
+    response_cache: ResponseStore = Depends(response_cache_provider),
+) -> Response:
+    from_date, to_date = _validate_range(from_date, to_date)
+    limit = _validate_limit(limit)
+
+    # * The providers are already merged in the rollups, the longer ranges are served
+    # * from the coarser tiers
+    if resolution is None:
+        resolution = resolution_for_span(from_date, to_date)
+
+    after = None
+    if cursor is not None:
+        try:
+            position = WeatherCursor.decode(cursor)
+        except InvalidCursorError as error:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+        if position.city_id != city.id or position.resolution != resolution:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                detail='The cursor belongs to a different city or resolution',
+            )
+
+        after = position.date
+
+    # * Only what the page depends on, e.g. the same cursor of another client hits the
+    # * same entry
+    key = await response_cache.key(
+        'weather',
+        weather_version_keys([city.id], BUCKET_START[resolution](from_date), to_date),
+        (city.id, resolution, from_date, to_date, after, limit),
+    )
+    body = await response_cache.get(key)
+    if body is None:
+        page = await fetch_weather_page(
+            session, city, from_date, to_date, resolution, after, limit
+        )
+        body = page.model_dump_json().encode()
+        await response_cache.set(key, body)
+
+    return json_response(
+        request, body, cache_control(config.api.response_cache.max_age_secs, to_date)
+    )
+
+
+async def fetch_weather_batch(
+    session: AsyncSession,
+    city_ids: Sequence[int],
+    from_date: datetime,
+    to_date: datetime,
+    resolution: Resolution,
+) -> dict[int, list[WeatherData]]:
+    rollup = ROLLUP_MODELS[resolution]
+
+    logger.info(f'Fetching {resolution} data for {len(city_ids)} cities')
+
+    # * A single array parameter, the statement is the same however many cities there
+    # * are
+    history_query = (
+        select(rollup.city_id, *_weather_columns(rollup))
+        .where(
+            rollup.city_id
+            == any_(bindparam('city_ids', list(city_ids), type_=ARRAY(Integer))),
+            rollup.date >= BUCKET_START[resolution](from_date),
+            rollup.date <= to_date,
+        )
+        .order_by(rollup.city_id, rollup.date)
+    )
+
+    data: dict[int, list[WeatherData]] = {city_id: [] for city_id in city_ids}
+    for row in await session.execute(history_query):
+        data[row.city_id].append(WeatherData.model_validate(row._mapping))
+
+    return data
+
+
+@router.post('/batch', response_model=WeatherBatchResponse)
+async def get_weather_batch(
+    batch: WeatherBatchRequest,
+    session: InjectedDBSesssion,
+    cities: InjectedCities,
+    response_cache: ResponseStore = Depends(response_cache_provider),
+) -> Response:
+    """
+    The weather of many cities in one round trip, e.g. for a map. Unpaginated, the
+    resolution is picked for the range the same way, which bounds the points per city.
+    """
+    if len(batch.locations) > config.api.max_batch_locations:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f'You may not ask for more than {config.api.max_batch_locations} '
+                'locations at once'
+            ),
+        )
+
+    from_date, to_date = _validate_range(batch.from_date, batch.to_date)
+    resolution = batch.resolution or resolution_for_span(from_date, to_date)
+
+    resolved = await closest_city_provider.resolve_many(cities, batch.locations)
+
+    unique_cities: dict[int, City] = {}
+    for city in resolved:
+        if city is not None:
+            unique_cities.setdefault(city.id, city)
+
+    key = await response_cache.key(
+        'weather-batch',
+        weather_version_keys(
+            unique_cities.keys(), BUCKET_START[resolution](from_date), to_date
+        ),
+        (
+            resolution,
+            from_date,
+            to_date,
+            tuple(city.id if city is not None else None for city in resolved),
+        ),
+    )
+    body = await response_cache.get(key)
+    if body is None:
+        data = {}
+        if len(unique_cities) > 0:
+            data = await fetch_weather_batch(
+                session, list(unique_cities), from_date, to_date, resolution
+            )
+
+        positions = {
+            city_id: position for position, city_id in enumerate(unique_cities)
+        }
+        response = WeatherBatchResponse(
+            resolution=resolution,
+            cities=[
+                CityWeather(
+                    name=city.name,
+                    country=city.country_name,
+                    latitude=city.latitude,
+                    longitude=city.longitude,
+                    data=data[city_id],
+                )
+                for city_id, city in unique_cities.items()
+            ],
+            locations=[
+                positions[city.id] if city is not None else None for city in resolved
+            ],
+        )
+        body = response.model_dump_json().encode()
+        await response_cache.set(key, body)
 
-    return WeatherResponse(data=data[: PAGE_SIZE + 1], next_date=next_date)
\ No newline at end of file
+    # * Not a GET, neither the ETag nor the Cache-Control would be honoured
+    return Response(body, media_type='application/json')
@@ -0,0 +1,204 @@
+import csv
+import io
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
+from functools import cache
+from typing import TYPE_CHECKING, Any, Literal
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from forecast.api.dependencies.closest_city_provider import closest_city_provider
+from forecast.api.dependencies.db_session import session_factory_provider
+from forecast.db.models import City
+from forecast.db.models.weather_rollup import ROLLUP_VALUE_COLUMNS
+from forecast.db.rollups import BUCKET_START, ROLLUP_MODELS, Resolution
+from forecast.logging import logger_provider
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+router = APIRouter(prefix='/weather')
+
+ExportFormat = Literal['ndjson', 'csv', 'arrow']
+
+# * The rows fetched from the server side cursor at once, each is flushed as a whole
+CHUNK_SIZE = 5000
+EXPORT_COLUMNS: tuple[str, ...] = ('date', *ROLLUP_VALUE_COLUMNS)
+
+MEDIA_TYPES: dict[ExportFormat, str] = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+logger = logger_provider(__name__)
+
+# * The rows of a chunk, the encoders only need them to be sequences of the
+# * EXPORT_COLUMNS
+RowChunk = Sequence[Sequence[Any]]
+
+
+class ExportEncoder(ABC):
+    def header(self) -> bytes:
+        return b''
+
+    @abstractmethod
+    def encode(self, chunk: RowChunk) -> bytes: ...
+
+    def footer(self) -> bytes:
+        return b''
+
+
+class NDJSONEncoder(ExportEncoder):
+    def encode(self, chunk: RowChunk) -> bytes:
+        return b''.join(
+            orjson.dumps(dict(zip(EXPORT_COLUMNS, row))) + b'\n' for row in chunk
+        )
+
+
+class CSVEncoder(ExportEncoder):
+    def __init__(self) -> None:
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _flush(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writerow(EXPORT_COLUMNS)
+        return self._flush()
+
+    def encode(self, chunk: RowChunk) -> bytes:
+        self._writer.writerows(chunk)
+        return self._flush()
+
+
+@cache
+def arrow_schema() -> 'pa.Schema':
+    # * pyarrow is only imported once an Arrow export is asked for
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            pa.field('date', pa.timestamp('us')),
+            *[pa.field(column, pa.float64()) for column in ROLLUP_VALUE_COLUMNS],
+        ]
+    )
+
+
+class ArrowEncoder(ExportEncoder):
+    def __init__(self) -> None:
+        import pyarrow as pa
+
+        self._pa = pa
+        self._schema = arrow_schema()
+        self._sink = io.BytesIO()
+        self._writer: pa.RecordBatchStreamWriter | None = None
+
+    def _flush(self) -> bytes:
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+
+        return data
+
+    def header(self) -> bytes:
+        # * Writes out the schema message
+        self._writer = self._pa.ipc.new_stream(self._sink, self._schema)
+        return self._flush()
+
+    def encode(self, chunk: RowChunk) -> bytes:
+        assert self._writer is not None
+
+        pa = self._pa
+        columns = list(zip(*chunk))
+        self._writer.write_batch(
+            pa.RecordBatch.from_arrays(
+                [
+                    pa.array(column, type=field.type)
+                    for column, field in zip(columns, self._schema)
+                ],
+                schema=self._schema,
+            )
+        )
+        return self._flush()
+
+    def footer(self) -> bytes:
+        assert self._writer is not None
+
+        # * Writes out the end of stream marker
+        self._writer.close()
+        return self._flush()
+
+
+ENCODERS: dict[ExportFormat, type[ExportEncoder]] = {
+    'ndjson': NDJSONEncoder,
+    'csv': CSVEncoder,
+    'arrow': ArrowEncoder,
+}
+
+
+async def stream_export(
+    session_factory: async_sessionmaker[AsyncSession],
+    query: Select[Any],
+    export_format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    encoder = ENCODERS[export_format]()
+    yield encoder.header()
+
+    # * The dependencies are closed before the response is streamed, hence own session
+    async with session_factory() as session:
+        result = await session.stream(query.execution_options(yield_per=CHUNK_SIZE))
+        async for chunk in result.partitions():
+            yield encoder.encode(chunk)
+
+    yield encoder.footer()
+
+
+@router.get('/export')
+async def export_weather(
+    from_date: datetime = Query(alias='from'),
+    to_date: datetime = Query(alias='to'),
+    city: City = Depends(closest_city_provider),
+    resolution: Resolution = Query(default='hourly'),
+    export_format: ExportFormat = Query(default='ndjson', alias='format'),
+) -> StreamingResponse:
+    if from_date > to_date:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, detail='from should be earlier in time to'
+        )
+
+    from_date = from_date.replace(tzinfo=None)
+    to_date = to_date.replace(tzinfo=None)
+
+    rollup = ROLLUP_MODELS[resolution]
+    query = (
+        select(*[getattr(rollup, column) for column in EXPORT_COLUMNS])
+        .where(
+            rollup.city_id == city.id,
+            rollup.date >= BUCKET_START[resolution](from_date),
+            rollup.date <= to_date,
+        )
+        .order_by(rollup.date)
+    )
+
+    logger.info(f'Exporting {resolution} data for {city.name} as {export_format}')
+
+    session_factory = await session_factory_provider()
+    filename = f'weather_{city.id}_{from_date:%Y%m%d}_{to_date:%Y%m%d}.{export_format}'
+
+    return StreamingResponse(
+        stream_export(session_factory, query, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
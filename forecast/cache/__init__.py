@@ -0,0 +1,9 @@
+from forecast.cache.backends import CacheBackend as CacheBackend
+from forecast.cache.backends import MemoryBackend as MemoryBackend
+from forecast.cache.backends import RedisBackend as RedisBackend
+from forecast.cache.invalidation import CITIES_VERSION_KEY as CITIES_VERSION_KEY
+from forecast.cache.invalidation import CacheInvalidator as CacheInvalidator
+from forecast.cache.invalidation import InvalidationListener as InvalidationListener
+from forecast.cache.invalidation import weather_version_keys as weather_version_keys
+from forecast.cache.responses import ResponseStore as ResponseStore
+from forecast.cache.responses import make_etag as make_etag
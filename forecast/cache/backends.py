@@ -0,0 +1,131 @@
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from datetime import timedelta
+from typing import Any, Protocol
+
+from forecast.logging import logger_provider
+
+KEY_PREFIX = 'forecast:cache:'
+
+
+class CacheBackend(Protocol):
+    """
+    Where the cached responses and the versions of the data they were built from are
+    kept. A version only ever goes up, the entries built from an older one are never
+    looked up again.
+    """
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: timedelta) -> None: ...
+
+    async def get_versions(self, keys: Sequence[str]) -> list[int]: ...
+
+    async def bump_versions(self, keys: Sequence[str]) -> None: ...
+
+
+class MemoryBackend:
+    """An in-process LRU, bounded by the size of the values."""
+
+    def __init__(self, max_size_bytes: int) -> None:
+        self._max_size_bytes = max_size_bytes
+        self._size_bytes = 0
+
+        # * key -> (expires at, value), the least recently used first
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Drops the entries but keeps the versions, those only ever go up."""
+        self._entries.clear()
+        self._size_bytes = 0
+
+    def _drop(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._size_bytes -= len(value)
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: timedelta) -> None:
+        if len(value) > self._max_size_bytes:
+            return
+
+        if key in self._entries:
+            self._drop(key)
+
+        self._entries[key] = (time.monotonic() + ttl.total_seconds(), value)
+        self._size_bytes += len(value)
+
+        while self._size_bytes > self._max_size_bytes:
+            self._drop(next(iter(self._entries)))
+
+    async def get_versions(self, keys: Sequence[str]) -> list[int]:
+        return [self._versions.get(key, 0) for key in keys]
+
+    async def bump_versions(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+
+class RedisBackend:
+    """
+    Shared by the API processes and the collector, which bumps the versions right after
+    an ingest. Takes any client with the redis.asyncio interface.
+    """
+
+    def __init__(self, client: Any) -> None:
+        self.logger = logger_provider(__name__)
+        self._client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisBackend':
+        try:
+            from redis import asyncio as redis
+        except ImportError as error:
+            raise RuntimeError(
+                'The shared response cache needs the redis package, '
+                'install the redis extra'
+            ) from error
+
+        return cls(redis.from_url(url))
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._client.get(f'{KEY_PREFIX}entry:{key}')
+
+    async def set(self, key: str, value: bytes, ttl: timedelta) -> None:
+        await self._client.set(f'{KEY_PREFIX}entry:{key}', value, ex=ttl)
+
+    async def get_versions(self, keys: Sequence[str]) -> list[int]:
+        if len(keys) == 0:
+            return []
+
+        values = await self._client.mget([f'{KEY_PREFIX}version:{key}' for key in keys])
+        return [int(value) if value is not None else 0 for value in values]
+
+    async def bump_versions(self, keys: Sequence[str]) -> None:
+        async with self._client.pipeline(transaction=False) as pipeline:
+            for key in keys:
+                pipeline.incr(f'{KEY_PREFIX}version:{key}')
+
+            await pipeline.execute()
+
+    async def close(self) -> None:
+        await self._client.aclose()
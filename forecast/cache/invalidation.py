@@ -0,0 +1,179 @@
+import asyncio
+import contextlib
+from collections.abc import Awaitable, Callable, Collection, Sequence
+from datetime import datetime
+from typing import Any
+
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from forecast.cache.backends import CacheBackend
+from forecast.logging import logger_provider
+
+# * The Postgres channel the collector tells the API processes about the changed data on
+INVALIDATION_CHANNEL = 'forecast_cache_invalidation'
+# * Postgres caps the NOTIFY payloads at 8000 bytes
+MAX_PAYLOAD_BYTES = 7500
+RECONNECT_DELAY_SECS = 5.0
+
+CITIES_VERSION_KEY = 'cities'
+
+
+def weather_version_keys(
+    city_ids: Collection[int], start_date: datetime, end_date: datetime
+) -> list[str]:
+    """
+    The weather is versioned per city and year, a backfill only invalidates the years it
+    touched.
+    """
+    return [
+        f'weather:{city_id}:{year}'
+        for city_id in sorted(city_ids)
+        for year in range(start_date.year, end_date.year + 1)
+    ]
+
+
+def invalidation_payloads(keys: Sequence[str]) -> list[bytes]:
+    payloads: list[bytes] = []
+    chunk: list[str] = []
+    size = 2
+
+    for key in keys:
+        # * The quotes and the comma
+        key_size = len(key.encode()) + 3
+        if size + key_size > MAX_PAYLOAD_BYTES and len(chunk) > 0:
+            payloads.append(orjson.dumps(chunk))
+            chunk, size = [], 2
+
+        chunk.append(key)
+        size += key_size
+
+    if len(chunk) > 0:
+        payloads.append(orjson.dumps(chunk))
+
+    return payloads
+
+
+class CacheInvalidator:
+    """
+    Run by the collector after the data is committed. Bumps the versions in the shared
+    backend, if any, and notifies the API processes listening, for their in-process
+    caches.
+    """
+
+    def __init__(self, shared: CacheBackend | None = None) -> None:
+        self.logger = logger_provider(__name__)
+        self._shared = shared
+
+    async def invalidate(self, session: AsyncSession, keys: Sequence[str]) -> None:
+        if len(keys) == 0:
+            return
+
+        if self._shared is not None:
+            await self._shared.bump_versions(keys)
+
+        for payload in invalidation_payloads(keys):
+            await session.execute(
+                select(func.pg_notify(INVALIDATION_CHANNEL, payload.decode()))
+            )
+
+        # * The notifications are only delivered on commit
+        await session.commit()
+
+        self.logger.info(f'Invalidated {len(keys)} cached version(s)')
+
+
+class InvalidationListener:
+    """
+    Holds a connection listening for the collector's notifications in an API process.
+    The notifications sent while it's reconnecting are lost, the reconnect hook is there
+    to drop the cache.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        on_invalidation: Callable[[list[str]], Awaitable[None]],
+        on_reconnect: Callable[[], Awaitable[None]],
+    ) -> None:
+        self.logger = logger_provider(__name__)
+
+        self._engine = engine
+        self._on_invalidation = on_invalidation
+        self._on_reconnect = on_reconnect
+
+        self._connection: AsyncConnection | None = None
+        self._driver_connection: Any = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._stopped = False
+
+    def _spawn(self, coroutine: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _on_notification(
+        self, _connection: Any, _pid: int, _channel: str, payload: str
+    ) -> None:
+        try:
+            keys = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            self.logger.warning(f'Ignoring a malformed invalidation: {payload[:100]}')
+            return
+
+        self._spawn(self._on_invalidation(keys))
+
+    def _on_termination(self, _connection: Any) -> None:
+        if self._stopped:
+            return
+
+        self.logger.error('The invalidation listener lost its connection')
+        self._spawn(self._reconnect())
+
+    async def start(self) -> None:
+        self._stopped = False
+        self._connection = await self._engine.connect()
+
+        raw_connection = await self._connection.get_raw_connection()
+        self._driver_connection = raw_connection.driver_connection
+        await self._driver_connection.add_listener(
+            INVALIDATION_CHANNEL, self._on_notification
+        )
+        self._driver_connection.add_termination_listener(self._on_termination)
+
+    async def _reconnect(self) -> None:
+        if self._connection is not None:
+            # * Keeps the dead connection from going back to the pool
+            with contextlib.suppress(Exception):
+                await self._connection.invalidate()
+            self._connection = None
+
+        while not self._stopped:
+            await asyncio.sleep(RECONNECT_DELAY_SECS)
+            try:
+                await self.start()
+            except Exception:
+                self.logger.exception('Could not reconnect the invalidation listener')
+                continue
+
+            await self._on_reconnect()
+            self.logger.info('Reconnected the invalidation listener')
+            return
+
+    async def stop(self) -> None:
+        self._stopped = True
+
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._connection is not None:
+            if not self._driver_connection.is_closed():
+                await self._driver_connection.remove_listener(
+                    INVALIDATION_CHANNEL, self._on_notification
+                )
+
+            await self._connection.close()
+            self._connection = None
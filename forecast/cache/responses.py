@@ -0,0 +1,90 @@
+import hashlib
+from collections.abc import Sequence
+from datetime import timedelta
+
+from forecast.cache.backends import CacheBackend, MemoryBackend
+from forecast.logging import logger_provider
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+class ResponseStore:
+    """
+    The serialized responses, in the in-process LRU and behind it in the shared backend,
+    if any. The keys carry the versions of the data a response was built from, an
+    invalidation bumps them so the stale entries are never looked up again and age out
+    instead of being deleted.
+    """
+
+    def __init__(
+        self,
+        local: MemoryBackend,
+        shared: CacheBackend | None = None,
+        *,
+        ttl: timedelta,
+    ) -> None:
+        self.logger = logger_provider(__name__)
+
+        self._local = local
+        self._shared = shared
+        self._ttl = ttl
+
+    async def key(
+        self, namespace: str, version_keys: Sequence[str], parts: Sequence[object]
+    ) -> str:
+        """
+        Has to be taken before the data is read, a response built while the data changes
+        is then stored under the older versions and never served.
+        """
+        versions = None
+        if self._shared is not None:
+            try:
+                versions = await self._shared.get_versions(version_keys)
+            except Exception:
+                self.logger.exception('Could not read the shared cache versions')
+
+        # * The local ones are kept up to date by the invalidation listener
+        if versions is None:
+            versions = await self._local.get_versions(version_keys)
+
+        raw_key = '|'.join(
+            [*(f'{key}@{version}' for key, version in zip(version_keys, versions))]
+            + [str(part) for part in parts]
+        )
+        digest = hashlib.blake2b(raw_key.encode(), digest_size=16).hexdigest()
+        return f'{namespace}:{digest}'
+
+    async def get(self, key: str) -> bytes | None:
+        body = await self._local.get(key)
+        if body is not None or self._shared is None:
+            return body
+
+        try:
+            body = await self._shared.get(key)
+        except Exception:
+            # * The shared cache is only an optimization, the request is served from the
+            # * db instead
+            self.logger.exception('Could not read from the shared response cache')
+            return None
+
+        if body is not None:
+            await self._local.set(key, body, self._ttl)
+
+        return body
+
+    async def set(self, key: str, body: bytes) -> None:
+        await self._local.set(key, body, self._ttl)
+
+        if self._shared is not None:
+            try:
+                await self._shared.set(key, body, self._ttl)
+            except Exception:
+                self.logger.exception('Could not write to the shared response cache')
+
+    async def invalidate_local(self, version_keys: Sequence[str]) -> None:
+        await self._local.bump_versions(version_keys)
+
+    def clear_local(self) -> None:
+        self._local.clear()
@@ -1,3 +1,35 @@
-from forecast.client_session_classes.extended_client_session import (
-    ExtendedClientSession as ExtendedClientSession,
+from typing import TYPE_CHECKING
+
+from forecast.client_session_classes.rate_limiter import (
+    RateLimitConfig as RateLimitConfig,
+)
+from forecast.client_session_classes.rate_limiter import RateLimiter as RateLimiter
+from forecast.client_session_classes.response_cache import (
+    NEVER_EXPIRES as NEVER_EXPIRES,
+)
+from forecast.client_session_classes.response_cache import (
+    ResponseCache as ResponseCache,
+)
+from forecast.client_session_classes.response_cache import (
+    ttl_for_period as ttl_for_period,
+)
+from lib.lazy_imports import lazy_exports
+
+if TYPE_CHECKING:
+    from forecast.client_session_classes.extended_client_session import (
+        ExtendedClientSession as ExtendedClientSession,
+    )
+    from forecast.client_session_classes.json_columns import (
+        decode_json_columns as decode_json_columns,
+    )
+
+# * The config only needs the rate limits, not aiohttp and pyarrow
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        'ExtendedClientSession': (
+            'forecast.client_session_classes.extended_client_session'
+        ),
+        'decode_json_columns': 'forecast.client_session_classes.json_columns',
+    },
 )
@@ -1,15 +1,30 @@
 import asyncio
 import time
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Callable, Mapping
 from contextlib import asynccontextmanager
-from typing import Any, Self, TypeAlias
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, NamedTuple, Self, TypeAlias
 
 import aiohttp
+import numpy.typing as npt
+import orjson
 from yarl import URL
 
+from forecast.client_session_classes.rate_limiter import RateLimiter
+from forecast.client_session_classes.response_cache import ResponseCache
 from forecast.logging import logger_provider
 
+if TYPE_CHECKING:
+    import pyarrow as pa
+
 JsonData: TypeAlias = dict[Any, Any]
+JsonLoads: TypeAlias = Callable[[bytes], Any]
+
+
+class ConditionalResponse(NamedTuple):
+    content: bytes
+    etag: str | None
+    last_modified: str | None
 
 
 class ExtendedClientSession(aiohttp.ClientSession):
@@ -19,9 +34,15 @@ class ExtendedClientSession(aiohttp.ClientSession):
         connector: aiohttp.BaseConnector | None = None,
         *,
         loop: asyncio.AbstractEventLoop | None = None,
+        response_cache: ResponseCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+        json_loads: JsonLoads = orjson.loads,
         **kwargs: Any,
     ) -> None:
         self.logger = logger_provider(__name__)
+        self._response_cache = response_cache
+        self._rate_limiter = rate_limiter
+        self._json_loads = json_loads
 
         if not isinstance(base_url, URL):
             base_url = URL(base_url)
@@ -58,33 +79,177 @@ class ExtendedClientSession(aiohttp.ClientSession):
         full_url = self._base_path + endpoint_path_from_base
         self.logger.info(f'Sending a {method} request to "{full_url}"')
 
-        start = time.perf_counter()
-        async with self.request(method, endpoint_path_from_base, **kwargs) as response:
-            end = time.perf_counter()
-            total_time_ms = (end - start) * 1000
+        # * The slot is held until the body is read, the limiter sees the whole of the
+        # * request
+        async with self._rate_limited():
+            start = time.perf_counter()
+            responded = False
+            try:
+                response_context = self.request(
+                    method, endpoint_path_from_base, **kwargs
+                )
+                async with response_context as response:
+                    responded = True
+                    end = time.perf_counter()
+                    total_time_ms = (end - start) * 1000
+                    self._record(
+                        response.status,
+                        end - start,
+                        response.headers.get('Retry-After'),
+                    )
+
+                    self.logger.info(
+                        f'[Time taken - {total_time_ms:.2f} ms] Got response from '
+                        f'"{full_url}", status: {response.status}'
+                    )
+
+                    response.raise_for_status()
+                    yield response
+            except (TimeoutError, aiohttp.ClientConnectionError):
+                if not responded:
+                    self._record(None, time.perf_counter() - start, None)
+                raise
 
-            self.logger.info(
-                f'[Time taken - {total_time_ms:.2f} ms] Got response from "{full_url}", status: {response.status}'
+    @asynccontextmanager
+    async def _rate_limited(self) -> AsyncIterator[None]:
+        if self._rate_limiter is None:
+            yield
+            return
+
+        async with self._rate_limiter.slot():
+            yield
+
+    def _record(
+        self, status: int | None, latency: float, retry_after: str | None
+    ) -> None:
+        if self._rate_limiter is not None:
+            self._rate_limiter.record(status, latency, retry_after)
+
+    async def _cached_get(
+        self, endpoint: str, cache_ttl: timedelta | None, **kwargs: Any
+    ) -> bytes:
+        cache = self._response_cache
+        if cache is None:
+            async with self._request_wrapper('GET', endpoint, **kwargs) as response:
+                return await response.read()
+
+        url = self._resolve_relative_path(endpoint)
+        key = cache.key('GET', url, kwargs.get('params'))
+
+        entry = cache.get(key)
+        if entry is not None and entry.is_fresh:
+            content = await cache.read(key)
+            if content is not None:
+                self.logger.debug(f'Serving "{url}" from the cache')
+                return content
+
+        # * The expired entries are revalidated instead of downloaded again, when the
+        # * server supports it
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry is not None and entry.can_revalidate:
+            if entry.etag is not None:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified is not None:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        async with self._request_wrapper(
+            'GET', endpoint, headers=headers, **kwargs
+        ) as response:
+            if response.status == 304:
+                content = await cache.read(key)
+                if content is not None:
+                    await cache.refresh(key, cache_ttl)
+                    return content
+
+                # * The entry is gone in the meantime, the request is repeated
+                # * unconditionally
+                return await self._cached_get(endpoint, cache_ttl, **kwargs)
+
+            content = await response.read()
+            await cache.put(
+                key,
+                url,
+                content,
+                cache_ttl,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
             )
 
-            response.raise_for_status()
-            yield response
+        return content
+
+    async def get_if_modified(
+        self,
+        endpoint: str,
+        *,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        **kwargs: Any,
+    ) -> ConditionalResponse | None:
+        """
+        A conditional GET bypassing the response cache, for the callers keeping the
+        validators themselves. Returns None when the server says the resource hasn't
+        changed.
+        """
+        headers = dict(kwargs.pop('headers', None) or {})
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        if last_modified is not None:
+            headers['If-Modified-Since'] = last_modified
+
+        async with self._request_wrapper(
+            'GET', endpoint, headers=headers, **kwargs
+        ) as response:
+            if response.status == 304:
+                return None
+
+            return ConditionalResponse(
+                content=await response.read(),
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+            )
 
     async def get_json(
         self,
         endpoint: str,
+        *,
+        cache_ttl: timedelta | None = None,
         **kwargs: Any,
     ) -> JsonData:
-        async with self._request_wrapper('GET', endpoint, **kwargs) as response:
-            raw = await response.json()
-            return raw
+        """
+        cache_ttl only matters with a response cache, None stands for its default ttl.
+        """
+        content = await self._cached_get(endpoint, cache_ttl, **kwargs)
+        return self._json_loads(content)
+
+    async def get_json_columns(
+        self,
+        endpoint: str,
+        block: str,
+        columns: Mapping[str, 'pa.DataType'],
+        *,
+        cache_ttl: timedelta | None = None,
+        **kwargs: Any,
+    ) -> dict[str, npt.NDArray[Any]]:
+        """
+        The array-of-columns block of the response as NumPy arrays, see
+        decode_json_columns.
+        """
+        # * pyarrow is only imported by the sessions which decode columns
+        from forecast.client_session_classes.json_columns import decode_json_columns
+
+        content = await self._cached_get(endpoint, cache_ttl, **kwargs)
+        return decode_json_columns(content, block, columns)
 
     async def get_raw(
         self,
         endpoint: str,
+        *,
+        cache_ttl: timedelta | None = None,
         **kwargs: Any,
     ) -> bytes:
-        async with self._request_wrapper('GET', endpoint, **kwargs) as response:
-            content = await response.read()
-            self.logger.debug(f'File contents size: approx. {len(content)} bytes')
-            return content
+        """
+        cache_ttl only matters with a response cache, None stands for its default ttl.
+        """
+        content = await self._cached_get(endpoint, cache_ttl, **kwargs)
+        self.logger.debug(f'File contents size: approx. {len(content)} bytes')
+        return content
@@ -0,0 +1,62 @@
+from collections.abc import Mapping
+from typing import Any
+
+import numpy.typing as npt
+import pyarrow as pa
+from pyarrow import json as pa_json
+
+
+def decode_json_columns(
+    content: bytes, block: str, columns: Mapping[str, pa.DataType]
+) -> dict[str, npt.NDArray[Any]]:
+    """
+    Decodes the array-of-columns block of a JSON object, e.g. {"hourly": {"time": [...],
+    "temperature_2m": [...]}}, straight into the NumPy arrays of the given types, nulls
+    becoming NaNs / NaTs. Arrow parses the arrays natively, no boxed Python value is
+    built per element, the rest of the payload is skipped.
+    """
+    schema = pa.schema(
+        [
+            (
+                block,
+                pa.struct([(name, pa.list_(type_)) for name, type_ in columns.items()]),
+            )
+        ]
+    )
+
+    try:
+        table = pa_json.read_json(
+            pa.BufferReader(content),
+            # * The whole payload is a single object, it has to fit a single block
+            read_options=pa_json.ReadOptions(
+                use_threads=False, block_size=len(content) + 1
+            ),
+            parse_options=pa_json.ParseOptions(
+                explicit_schema=schema,
+                unexpected_field_behavior='ignore',
+                newlines_in_values=True,
+            ),
+        )
+    except pa.ArrowInvalid as error:
+        raise ValueError(f'Could not decode the "{block}" columns: {error}') from error
+
+    if table.num_rows != 1:
+        raise ValueError(f'Expected a single JSON object, got {table.num_rows}')
+
+    struct = table.column(block).combine_chunks()
+    if struct.null_count > 0:
+        raise ValueError(f'The "{block}" block is missing')
+
+    result: dict[str, npt.NDArray[Any]] = {}
+    for name in columns:
+        values = struct.field(name)
+        if values.null_count > 0:
+            raise ValueError(f'The "{block}.{name}" column is missing')
+
+        result[name] = values.flatten().to_numpy(zero_copy_only=False)
+
+    lengths = {len(values) for values in result.values()}
+    if len(lengths) > 1:
+        raise ValueError(f'The "{block}" columns differ in length: {sorted(lengths)}')
+
+    return result
@@ -0,0 +1,186 @@
+import asyncio
+import math
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+from pydantic import BaseModel
+
+from forecast.logging import logger_provider
+
+THROTTLED_STATUSES = frozenset({429, 503})
+# * For the throttled responses which don't say when to retry
+DEFAULT_THROTTLE_PAUSE_SECS = 1.0
+
+
+class RateLimitConfig(BaseModel):
+    requests_per_second: float = 5.0
+    burst: int = 10
+    initial_concurrency: int = 4
+    min_concurrency: int = 1
+    max_concurrency: int = 30
+    # * The concurrency only grows while the latency stays within this factor of the
+    # * best one seen
+    latency_tolerance: float = 2.0
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """The Retry-After header is either the amount of seconds or an http date."""
+    if value is None:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+
+    return max((retry_at - datetime.now(UTC)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._burst = burst
+
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+
+    def pause(self, seconds: float) -> None:
+        """
+        No tokens are handed out for the next seconds, e.g. as told by Retry-After.
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self) -> None:
+        # * The lock keeps the waiters in order, so that nobody gets starved by the
+        # * later ones
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class AdaptiveConcurrency:
+    """
+    Additive increase, multiplicative decrease of the allowed requests in flight. The
+    limit grows by about one per round trip while the responses are fast and successful,
+    and is halved on throttling or server errors, at most once per round trip.
+    """
+
+    def __init__(self, config: RateLimitConfig) -> None:
+        self._config = config
+
+        self.limit = float(config.initial_concurrency)
+        self.in_flight = 0
+
+        self._best_latency: float | None = None
+        self._last_decrease_at = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.in_flight < math.floor(self.limit)
+            )
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self, latency: float) -> None:
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+
+        if latency <= self._best_latency * self._config.latency_tolerance:
+            self.limit = min(
+                self._config.max_concurrency, self.limit + 1 / math.floor(self.limit)
+            )
+
+    def on_overload(self, latency: float) -> None:
+        now = time.monotonic()
+        # * The requests already in flight fail together, that's one signal rather than
+        # * many
+        if now - self._last_decrease_at < max(latency, self._best_latency or 0):
+            return
+
+        self._last_decrease_at = now
+        self.limit = max(self._config.min_concurrency, self.limit / 2)
+
+
+class RateLimiter:
+    def __init__(self, name: str, config: RateLimitConfig) -> None:
+        self.logger = logger_provider(__name__)
+
+        self._name = name
+        self._bucket = TokenBucket(config.requests_per_second, config.burst)
+        self._concurrency = AdaptiveConcurrency(config)
+
+    @property
+    def concurrency_limit(self) -> int:
+        return math.floor(self._concurrency.limit)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self._concurrency.acquire()
+        try:
+            await self._bucket.acquire()
+            yield
+        finally:
+            await self._concurrency.release()
+
+    def record(
+        self, status: int | None, latency: float, retry_after: str | None
+    ) -> None:
+        """
+        Feeds the outcome of a request back, None status standing for a connection
+        error.
+        """
+        if status is not None and status < 500 and status not in THROTTLED_STATUSES:
+            self._concurrency.on_success(latency)
+            return
+
+        previous_limit = self.concurrency_limit
+        self._concurrency.on_overload(latency)
+
+        pause = parse_retry_after(retry_after)
+        if pause is None and status in THROTTLED_STATUSES:
+            pause = DEFAULT_THROTTLE_PAUSE_SECS
+
+        if pause is not None:
+            self._bucket.pause(pause)
+
+        if status in THROTTLED_STATUSES or self.concurrency_limit != previous_limit:
+            self.logger.info(
+                f'{self._name} is overloaded ({status = }), concurrency '
+                f'{previous_limit} -> '
+                f'{self.concurrency_limit}, pausing for {pause or 0:.1f} second(s)'
+            )
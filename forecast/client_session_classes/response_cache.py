@@ -0,0 +1,261 @@
+import asyncio
+import gzip
+import hashlib
+import os
+import secrets
+from collections import OrderedDict
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any, Final
+from urllib.parse import urlsplit
+
+import orjson
+from pydantic import BaseModel
+
+from forecast.logging import logger_provider
+from lib.fs_utils import format_path, validate_path
+
+# * Passed as the ttl for the responses which are never going to change, e.g. the past
+# * years of history
+NEVER_EXPIRES: Final[timedelta] = timedelta.max
+
+BODY_SUFFIX = '.gz'
+META_SUFFIX = '.json'
+# * The bodies are written once and read many times, the higher levels only cost time
+# * for a few more percent
+COMPRESS_LEVEL = 1
+# * The bodies that are compressed already, gzipping them again only burns the cpu
+COMPRESSED_SUFFIXES = ('.gz',)
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def ttl_for_period(end_date: datetime) -> timedelta | None:
+    """
+    The history of the past years is immutable, while the current year is still being
+    filled in. Returns None for the latter, meaning the default ttl of the cache.
+    """
+    start_of_year = datetime(datetime.now(UTC).year, 1, 1)
+    if end_date.replace(tzinfo=None) < start_of_year:
+        return NEVER_EXPIRES
+
+    return None
+
+
+class CacheEntry(BaseModel):
+    url: str
+    size: int
+    stored_at: datetime
+    expires_at: datetime | None
+    etag: str | None = None
+    last_modified: str | None = None
+    # * Whether the body was gzipped by the cache, the already compressed ones are
+    # * stored as they are
+    gzipped: bool = True
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.expires_at is None or self.expires_at > _now()
+
+    @property
+    def can_revalidate(self) -> bool:
+        return self.etag is not None or self.last_modified is not None
+
+
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def is_compressed(url: str, content: bytes) -> bool:
+    # * The Content-Encoding is already decoded by aiohttp, it's the files served as
+    # * they are that are left
+    return urlsplit(url).path.endswith(COMPRESSED_SUFFIXES) or content.startswith(
+        GZIP_MAGIC
+    )
+
+
+class ResponseCache:
+    """
+    The response bodies on disk, gzipped unless they already are, each next to its
+    metadata file. The least recently used entries are evicted once the bodies take more
+    than max_size_bytes. The bodies are compressed, written and read in a thread, away
+    from the event loop.
+    """
+
+    def __init__(
+        self, folder: Path, max_size_bytes: int, default_ttl: timedelta
+    ) -> None:
+        self.logger = logger_provider(__name__)
+
+        self._folder = folder
+        self._max_size_bytes = max_size_bytes
+        self._default_ttl = default_ttl
+
+        validate_path(
+            self._folder,
+            'folder',
+            {'readable', 'writable'},
+            autocreate_self=True,
+            autocreate_is_recursive=True,
+        )
+
+        # * In the least to the most recently used order
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._total_size = 0
+        self._load()
+
+    def _load(self) -> None:
+        entries: list[tuple[float, str, CacheEntry]] = []
+        for meta_path in self._folder.glob(f'*{META_SUFFIX}'):
+            key = meta_path.stem
+            body_path = self._body_path(key)
+            try:
+                entry = CacheEntry.model_validate_json(meta_path.read_bytes())
+                last_used = body_path.stat().st_mtime
+            except (OSError, ValueError):
+                self._remove_files(key)
+                continue
+
+            entries.append((last_used, key, entry))
+
+        for _, key, entry in sorted(entries, key=lambda item: item[0]):
+            self._entries[key] = entry
+            self._total_size += entry.size
+
+        self.logger.info(
+            f'Loaded {len(self._entries)} cached response(s), {self._total_size} '
+            f'bytes, from "{format_path(self._folder)}"'
+        )
+
+    def _body_path(self, key: str) -> Path:
+        return self._folder.joinpath(f'{key}{BODY_SUFFIX}')
+
+    def _meta_path(self, key: str) -> Path:
+        return self._folder.joinpath(f'{key}{META_SUFFIX}')
+
+    def _remove_files(self, *keys: str) -> None:
+        for key in keys:
+            self._body_path(key).unlink(missing_ok=True)
+            self._meta_path(key).unlink(missing_ok=True)
+
+    def _write_atomically(self, path: Path, content: bytes) -> None:
+        # * Unique, a concurrent put of the same key writes its own temporary file
+        temporary_path = path.with_name(f'{path.name}.{secrets.token_hex(4)}.tmp')
+        temporary_path.write_bytes(content)
+        os.replace(temporary_path, path)
+
+    def _write_meta(self, key: str, entry: CacheEntry) -> None:
+        self._write_atomically(self._meta_path(key), entry.model_dump_json().encode())
+
+    def _write_files(self, key: str, content: bytes, entry: CacheEntry) -> None:
+        body = (
+            gzip.compress(content, compresslevel=COMPRESS_LEVEL)
+            if entry.gzipped
+            else content
+        )
+        entry.size = len(body)
+
+        self._write_atomically(self._body_path(key), body)
+        self._write_meta(key, entry)
+
+    def _read_body(self, key: str, gzipped: bool) -> bytes:
+        body_path = self._body_path(key)
+        body = body_path.read_bytes()
+        os.utime(body_path)
+
+        return gzip.decompress(body) if gzipped else body
+
+    def _expires_at(self, ttl: timedelta | None) -> datetime | None:
+        ttl = self._default_ttl if ttl is None else ttl
+        if ttl == NEVER_EXPIRES:
+            return None
+
+        return _now() + ttl
+
+    @staticmethod
+    def key(method: str, url: str, params: Any = None) -> str:
+        normalized = orjson.dumps(
+            [method, url, params], option=orjson.OPT_SORT_KEYS, default=str
+        )
+        return hashlib.sha256(normalized).hexdigest()
+
+    def get(self, key: str) -> CacheEntry | None:
+        return self._entries.get(key)
+
+    async def read(self, key: str) -> bytes | None:
+        """Returns the body of the entry, marking it as the most recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        try:
+            content = await asyncio.to_thread(self._read_body, key, entry.gzipped)
+        except (OSError, EOFError, gzip.BadGzipFile):
+            self.logger.warning(f'The cached response {key} is unreadable, dropping it')
+            await self.remove(key)
+            return None
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+
+        return content
+
+    async def put(
+        self,
+        key: str,
+        url: str,
+        content: bytes,
+        ttl: timedelta | None = None,
+        *,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        entry = CacheEntry(
+            url=url,
+            size=0,
+            stored_at=_now(),
+            expires_at=self._expires_at(ttl),
+            etag=etag,
+            last_modified=last_modified,
+            gzipped=not is_compressed(url, content),
+        )
+        await asyncio.to_thread(self._write_files, key, content, entry)
+
+        # * The files of the previous entry were replaced in place, only its bookkeeping
+        # * is left
+        self._forget(key)
+        self._entries[key] = entry
+        self._total_size += entry.size
+        await self._evict()
+
+    async def refresh(self, key: str, ttl: timedelta | None = None) -> None:
+        """Extends the entry's life after the server has confirmed it's still valid."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+
+        entry.expires_at = self._expires_at(ttl)
+        await asyncio.to_thread(self._write_meta, key, entry)
+
+    def _forget(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_size -= entry.size
+
+    async def remove(self, key: str) -> None:
+        self._forget(key)
+        await asyncio.to_thread(self._remove_files, key)
+
+    async def _evict(self) -> None:
+        evicted: list[str] = []
+        while self._total_size > self._max_size_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            self._forget(key)
+            evicted.append(key)
+
+        if len(evicted) == 0:
+            return
+
+        await asyncio.to_thread(self._remove_files, *evicted)
+        self.logger.debug(
+            f'Evicted {len(evicted)} cached response(s), {self._total_size} bytes left'
+        )
@@ -1,8 +1,13 @@
+from functools import cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 from pydantic import BaseModel
 
+from forecast.client_session_classes.rate_limiter import RateLimitConfig
+from forecast.db.connect import API_PROFILE, COLLECTOR_PROFILE, EngineProfile
 from forecast.logging import logger_provider
+from forecast.services.models.collector_config import CollectorConfig
 from lib.config import BaseConfig
 from lib.fs_utils import format_path
 
@@ -11,6 +16,7 @@ logger = logger_provider(__name__)
 
 class BaseDataSourceConfig(BaseModel):
     api_key: str | None
+    rate_limit: RateLimitConfig = RateLimitConfig()
 
 
 class WeatherBitSourceConfig(BaseDataSourceConfig):
@@ -29,31 +35,101 @@ class OpenMeteoSourceConfig(BaseDataSourceConfig):
     ...
 
 
+class MeteostatSourceConfig(BaseDataSourceConfig):
+    # * How often the stored stations list is revalidated
+    stations_max_age_days: int = 7
+
+
 class SourcesConfig(BaseModel):
     weather_bit: WeatherBitSourceConfig
     open_weather_map: OpenWeartherMapSourceConfig
     world_weather_online: WorldWeatherOnlineSourceConfig
     open_meteo: OpenMeteoSourceConfig
+    meteostat: MeteostatSourceConfig = MeteostatSourceConfig(api_key=None)
 
 
 class DBConfig(BaseModel):
     connection_string: str
+    api_engine: EngineProfile = API_PROFILE
+    collector_engine: EngineProfile = COLLECTOR_PROFILE
+
+
+class ResponseCacheConfig(BaseModel):
+    enabled: bool = True
+    # * The in-process LRU of every API process
+    max_size_mb: int = 256
+    # * Shared by the API processes and invalidated by the collector, e.g. redis://localhost:6379/0
+    redis_url: str | None = None
+    # * The invalidated entries are never looked up again, this is how long they take up
+    # * the space
+    ttl_hours: int = 24
+    # * The Cache-Control max-age of the data older than a couple of days
+    max_age_secs: int = 300
 
 
 class APIConfig(BaseModel):
     port: int
     host: str
+    # * The /weather page size when the limit isn't passed and the most it may ask for
+    page_size: int = 500
+    max_page_size: int = 5000
+    # * The most locations a /weather/batch request may ask for
+    max_batch_locations: int = 500
+    # * The db connections opened on startup, before the app reports itself as ready
+    warm_connections: int = 10
+    # * The app is only ready once it has loaded a trained predictor
+    require_predictor: bool = False
+    response_cache: ResponseCacheConfig = ResponseCacheConfig()
+
+
+class CacheConfig(BaseModel):
+    enabled: bool = True
+    folder: Path = Path('./.cache/responses/')
+    max_size_mb: int = 2048
+    # * How long the responses which may still change, e.g. of the current year, are
+    # * served without a revalidation
+    ttl_minutes: int = 60
+
+
+class PredictorConfig(BaseModel):
+    # * Written by python -m forecast --train-predictor, read by the API processes
+    folder: Path = Path('./.models/predictor/')
+    # * The API processes may still have the older versions loaded
+    keep_versions: int = 3
+    # * How often the API processes look for a newer version
+    reload_interval_secs: float = 60.0
+    # * The history the model is trained on
+    training_days: int = 4
+    epochs: int = 10
 
 
 class Config(BaseConfig):
     data_sources: SourcesConfig
     db: DBConfig
     api: APIConfig
+    cache: CacheConfig = CacheConfig()
+    collector: CollectorConfig = CollectorConfig()
+    predictor: PredictorConfig = PredictorConfig()
 
 
 BASE_CONFIG_FOLDER = Path('./config/')
 config_file = BASE_CONFIG_FOLDER.joinpath('./dev.yaml')
 
-logger.info(f'Loading config from "{format_path(config_file)}"')
 
-config = Config.load(config_file)
+@cache
+def get_config() -> Config:
+    logger.info(f'Loading config from "{format_path(config_file)}"')
+    return Config.load(config_file)
+
+
+if TYPE_CHECKING:
+    config: Config
+
+
+def __getattr__(name: str) -> Any:
+    # * The config file is only read once `config` is first asked for, not on the import
+    # * of the models
+    if name == 'config':
+        return get_config()
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,371 @@
+import io
+import time
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any, Literal, NamedTuple, TypeAlias
+
+import asyncpg
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+from sqlalchemy import or_, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from forecast.db.models import WeatherJournal
+from forecast.db.models.weather_journal import NATURAL_KEY
+from forecast.logging import logger_provider
+from forecast.providers.models import Weather, WeatherBatch, WeatherData
+
+OnConflict: TypeAlias = Literal['update', 'nothing']
+Record: TypeAlias = tuple[Any, ...]
+# * Either the records or a table with the COPY_COLUMNS, the latter is copied without
+# * building a tuple per row
+Rows: TypeAlias = list[Record] | pa.Table
+
+# * The columns are in the same order as the Weather tuple fields followed by the city
+# * id, that way a record for COPY is just (*weather, city_id) without any reordering
+COPY_COLUMNS: tuple[str, ...] = (*Weather._fields, 'city_id')
+VALUE_COLUMNS: tuple[str, ...] = tuple(
+    column for column in COPY_COLUMNS if column not in NATURAL_KEY
+)
+
+STAGING_TABLE = 'weather_journal_staging'
+
+_columns_sql = ', '.join(COPY_COLUMNS)
+_natural_key_sql = ', '.join(NATURAL_KEY)
+
+# * CREATE TABLE AS does not copy the NOT NULL constraints, so the rows missing a part
+# * of the natural key still make it into the staging table and get filtered out by the
+# * upsert instead of failing the COPY
+CREATE_STAGING_SQL = (
+    f'CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} ON COMMIT DELETE ROWS '
+    f'AS SELECT {_columns_sql} FROM {WeatherJournal.__tablename__} WITH NO DATA'
+)
+
+TRUNCATE_STAGING_SQL = f'TRUNCATE {STAGING_TABLE}'
+
+_table_sql = WeatherJournal.__tablename__
+_set_sql = ', '.join(f'{column} = EXCLUDED.{column}' for column in VALUE_COLUMNS)
+_stored_values_sql = ', '.join(f'{_table_sql}.{column}' for column in VALUE_COLUMNS)
+_excluded_values_sql = ', '.join(f'EXCLUDED.{column}' for column in VALUE_COLUMNS)
+
+_upsert_select_sql = (
+    f'INSERT INTO {WeatherJournal.__tablename__} ({_columns_sql}) '
+    f'SELECT DISTINCT ON ({_natural_key_sql}) {_columns_sql} FROM {STAGING_TABLE} '
+    f'WHERE {" AND ".join(f"{column} IS NOT NULL" for column in NATURAL_KEY)} '
+    f'ORDER BY {_natural_key_sql} '
+    f'ON CONFLICT ({_natural_key_sql}) '
+)
+UPSERT_SQL: dict[OnConflict, str] = {
+    'nothing': _upsert_select_sql + 'DO NOTHING',
+    # * Only touching the rows whose values actually changed, re-runs then cost just the
+    # * changed rows
+    'update': _upsert_select_sql
+    + f'DO UPDATE SET {_set_sql} '
+    + f'WHERE ({_stored_values_sql}) IS DISTINCT FROM ({_excluded_values_sql})',
+}
+# * The inserted or changed rows summed up per city, a batch may hold the rows of many
+# * cities
+WRITTEN_CITIES_SQL: dict[OnConflict, str] = {
+    on_conflict: (
+        f'WITH written AS ({upsert_sql} RETURNING city_id, date) '
+        'SELECT city_id, min(date), max(date), count(*) FROM written GROUP BY city_id'
+    )
+    for on_conflict, upsert_sql in UPSERT_SQL.items()
+}
+
+# * Errors that are caused by the contents of the rows, rather than the connection or
+# * the schema
+STAGING_ROW_ERRORS = (asyncpg.DataError, ValueError, TypeError, OverflowError)
+
+# * SQLite's limit, the lowest of the supported drivers. asyncpg allows 32767, psycopg
+# * 65535
+MAX_BIND_PARAMETERS = 32_766
+DIALECT_UPSERT_CHUNK_ROWS = MAX_BIND_PARAMETERS // len(COPY_COLUMNS)
+
+_city_id_index = COPY_COLUMNS.index('city_id')
+_date_index = COPY_COLUMNS.index('date')
+
+DIALECT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+class WrittenCity(NamedTuple):
+    """The inserted or changed rows of a city."""
+
+    city_id: int
+    first: datetime
+    last: datetime
+    rows: int
+
+
+# * city id -> the first and last dates of its inserted or changed rows
+ChangedRanges: TypeAlias = dict[int, tuple[datetime, datetime]]
+
+
+def _group_by_city(rows: Iterable[tuple[int, datetime]]) -> list[WrittenCity]:
+    by_city: dict[int, WrittenCity] = {}
+    for city_id, date in rows:
+        written = by_city.get(city_id)
+        by_city[city_id] = (
+            WrittenCity(city_id, date, date, 1)
+            if written is None
+            else WrittenCity(
+                city_id,
+                min(written.first, date),
+                max(written.last, date),
+                written.rows + 1,
+            )
+        )
+
+    return list(by_city.values())
+
+
+def table_to_records(table: pa.Table) -> list[Record]:
+    return list(
+        zip(*[column.to_pylist() for column in table.select(COPY_COLUMNS).columns])
+    )
+
+
+def _table_to_csv(table: pa.Table) -> io.BytesIO:
+    buffer = io.BytesIO()
+    pa_csv.write_csv(
+        table.select(COPY_COLUMNS),
+        buffer,
+        write_options=pa_csv.WriteOptions(include_header=False),
+    )
+    buffer.seek(0)
+
+    return buffer
+
+
+class WriteStats:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.written = 0
+        self.rejected = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.seconds == 0:
+            return 0.0
+
+        return self.rows / self.seconds
+
+
+class WeatherJournalWriter:
+    """
+    Upserts the provider data into the weather_journal table on its natural key.
+
+    On postgres (asyncpg) the rows are streamed with COPY into a temporary staging table
+    and merged with INSERT ... ON CONFLICT. Malformed rows are isolated by bisecting the
+    batch, so one bad row only costs itself. Other engines with ON CONFLICT support get
+    a plain upsert, and the rest fall back to adding the ORM objects to the session.
+    """
+
+    def __init__(self, on_conflict: OnConflict = 'update') -> None:
+        self.logger = logger_provider(__name__)
+
+        self._on_conflict: OnConflict = on_conflict
+        self.stats: dict[str, WriteStats] = {}
+
+    @staticmethod
+    def supports_copy(session: AsyncSession) -> bool:
+        bind = session.bind
+        return bind.dialect.name == 'postgresql' and bind.dialect.driver == 'asyncpg'
+
+    @staticmethod
+    async def _copy(driver_connection: Any, rows: Rows) -> None:
+        if isinstance(rows, pa.Table):
+            await driver_connection.copy_to_table(
+                STAGING_TABLE,
+                source=_table_to_csv(rows),
+                columns=COPY_COLUMNS,
+                format='csv',
+            )
+        else:
+            await driver_connection.copy_records_to_table(
+                STAGING_TABLE, records=rows, columns=COPY_COLUMNS
+            )
+
+    async def _stage(
+        self, session: AsyncSession, driver_connection: Any, rows: Rows
+    ) -> int:
+        """
+        Copies the rows into the staging table, returns the amount of rows rejected
+        """
+        try:
+            async with session.begin_nested():
+                # * The SAVEPOINT is only emitted once the nested transaction asks for
+                # * its connection
+                await session.connection()
+                await self._copy(driver_connection, rows)
+        except STAGING_ROW_ERRORS as error:
+            if len(rows) == 1:
+                row = (
+                    table_to_records(rows)[0] if isinstance(rows, pa.Table) else rows[0]
+                )
+                self.logger.warning(f'Skipping a malformed row {row}: {error}')
+                return 1
+
+            middle = len(rows) // 2
+            return await self._stage(
+                session, driver_connection, rows[:middle]
+            ) + await self._stage(session, driver_connection, rows[middle:])
+
+        return 0
+
+    async def _copy_upsert(
+        self, session: AsyncSession, rows: Rows
+    ) -> tuple[list[WrittenCity], int]:
+        await session.execute(text(CREATE_STAGING_SQL))
+        # * The rows are only deleted on commit, the previous write of the transaction
+        # * left its own
+        await session.execute(text(TRUNCATE_STAGING_SQL))
+
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+
+        rejected = await self._stage(session, raw_connection.driver_connection, rows)
+
+        result = await session.execute(text(WRITTEN_CITIES_SQL[self._on_conflict]))
+        return [WrittenCity(*row) for row in result], rejected
+
+    async def _dialect_upsert(
+        self, session: AsyncSession, records: list[Record]
+    ) -> tuple[list[WrittenCity], int]:
+        insert = DIALECT_INSERTS[session.bind.dialect.name]
+
+        written: list[tuple[int, datetime]] = []
+        # * Every value is a bind parameter, a whole batch would go over the drivers'
+        # * limit
+        for start in range(0, len(records), DIALECT_UPSERT_CHUNK_ROWS):
+            statement = insert(WeatherJournal).values(
+                [
+                    dict(zip(COPY_COLUMNS, record))
+                    for record in records[start : start + DIALECT_UPSERT_CHUNK_ROWS]
+                ]
+            )
+
+            if self._on_conflict == 'nothing':
+                statement = statement.on_conflict_do_nothing(index_elements=NATURAL_KEY)
+            else:
+                # * Like the COPY upsert, the rows which didn't change aren't reported
+                statement = statement.on_conflict_do_update(
+                    index_elements=NATURAL_KEY,
+                    set_={
+                        column: statement.excluded[column] for column in VALUE_COLUMNS
+                    },
+                    where=or_(
+                        *[
+                            getattr(WeatherJournal, column).is_distinct_from(
+                                statement.excluded[column]
+                            )
+                            for column in VALUE_COLUMNS
+                        ]
+                    ),
+                )
+
+            result = await session.execute(
+                statement.returning(WeatherJournal.city_id, WeatherJournal.date)
+            )
+            written.extend(result.tuples())
+
+        return _group_by_city(written), 0
+
+    async def _add_orm_objects(
+        self, session: AsyncSession, records: list[Record]
+    ) -> tuple[list[WrittenCity], int]:
+        session.add_all(
+            [
+                WeatherJournal.from_weather_tuple(Weather(*record[:-1]), record[-1])
+                for record in records
+            ]
+        )
+        await session.flush()
+
+        return _group_by_city(
+            (record[_city_id_index], record[_date_index]) for record in records
+        ), 0
+
+    async def _write(
+        self, session: AsyncSession, rows: Rows, data_source: str
+    ) -> list[WrittenCity]:
+        if len(rows) == 0:
+            return []
+
+        start = time.perf_counter()
+        if self.supports_copy(session):
+            written, rejected = await self._copy_upsert(session, rows)
+        else:
+            records = table_to_records(rows) if isinstance(rows, pa.Table) else rows
+            if session.bind.dialect.name in DIALECT_INSERTS:
+                written, rejected = await self._dialect_upsert(session, records)
+            else:
+                written, rejected = await self._add_orm_objects(session, records)
+        end = time.perf_counter()
+
+        written_rows = sum(city.rows for city in written)
+
+        stats = self.stats.setdefault(data_source, WriteStats())
+        stats.rows += len(rows)
+        stats.written += written_rows
+        stats.rejected += rejected
+        stats.seconds += end - start
+
+        self.logger.debug(
+            f'[Time taken - {(end - start) * 1000:.2f} ms] '
+            f'Got {len(rows)} rows from {data_source}, '
+            f'{written_rows} inserted or changed, {rejected} rejected'
+        )
+
+        return written
+
+    async def write_records(
+        self, session: AsyncSession, records: list[Record], data_source: str
+    ) -> ChangedRanges:
+        """
+        Writes the (*weather, city_id) records of any amount of cities at once. Returns
+        the cities which got new or changed rows, with the first and last of their
+        dates.
+        """
+        written = await self._write(session, records, data_source)
+        return {city.city_id: (city.first, city.last) for city in written}
+
+    async def write_table(
+        self, session: AsyncSession, table: pa.Table, data_source: str
+    ) -> ChangedRanges:
+        """
+        The columnar counterpart of write_records,
+        the table has the COPY_COLUMNS in any order.
+        """
+        written = await self._write(session, table, data_source)
+        return {city.city_id: (city.first, city.last) for city in written}
+
+    async def write(
+        self,
+        session: AsyncSession,
+        city_id: int,
+        data: WeatherData,
+        data_source: str,
+    ) -> int:
+        """
+        Writes the data of a single city,
+        returns the amount of the inserted or changed rows.
+        """
+        written = await self._write(
+            session, WeatherBatch.coerce(data).with_city_id(city_id), data_source
+        )
+
+        return sum(city.rows for city in written)
+
+    def log_stats(self) -> None:
+        for data_source, stats in self.stats.items():
+            self.logger.info(
+                f'{data_source}: processed {stats.rows} rows in {stats.seconds:.2f} s, '
+                f'{stats.rows_per_second:.0f} rows/sec. '
+                f'{stats.written} inserted or changed, {stats.rejected} rejected'
+            )
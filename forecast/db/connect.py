@@ -1,18 +1,89 @@
-from sqlalchemy.ext.asyncio import (
-    AsyncEngine,
-    AsyncSession,
-    async_sessionmaker,
-    create_async_engine,
-)
-
-
-def create_engine(url: str) -> AsyncEngine:
-    engine = create_async_engine(url, echo=False, pool_size=50)
-
-    return engine
-
-
-async def connect(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
-    async_session = async_sessionmaker(engine, expire_on_commit=True, autoflush=True)
-
-    return async_session
+import asyncio
+
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from forecast.db.pool_metrics import MeteredPool
+
+
+class EngineProfile(BaseModel):
+    pool_size: int = 10
+    max_overflow: int = 10
+    # * How long a checkout waits for a connection before it gives up
+    pool_timeout_secs: float = 30.0
+    # * The connections are reopened after this long, before the server or a proxy drops
+    # * them
+    pool_recycle_secs: int = 1800
+    # * Tests a connection before it's checked out, a dropped one is replaced instead of
+    # * failing the query
+    pool_pre_ping: bool = True
+    # * The asyncpg prepared statements kept per connection, 0 with pgbouncer in
+    # * transaction mode
+    prepared_statement_cache_size: int = 100
+    # * Set on every connection, e.g. {"synchronous_commit": "off"}
+    server_settings: dict[str, str] = {}
+
+
+# * Short queries from many concurrent requests, the JIT only slows them down
+API_PROFILE = EngineProfile(
+    pool_size=20,
+    max_overflow=10,
+    pool_timeout_secs=10.0,
+    prepared_statement_cache_size=500,
+    server_settings={'application_name': 'forecast-api', 'jit': 'off'},
+)
+# * A handful of writers bulk loading. The rows of the last commits may be lost on a
+# * crash, they're fetched again by the next incremental run
+COLLECTOR_PROFILE = EngineProfile(
+    pool_size=8,
+    max_overflow=4,
+    pool_timeout_secs=60.0,
+    server_settings={
+        'application_name': 'forecast-collector',
+        'synchronous_commit': 'off',
+    },
+)
+
+
+def create_engine(url: str, profile: EngineProfile = API_PROFILE) -> AsyncEngine:
+    engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=MeteredPool,
+        pool_size=profile.pool_size,
+        max_overflow=profile.max_overflow,
+        pool_timeout=profile.pool_timeout_secs,
+        pool_recycle=profile.pool_recycle_secs,
+        pool_pre_ping=profile.pool_pre_ping,
+        connect_args={
+            'prepared_statement_cache_size': profile.prepared_statement_cache_size,
+            'server_settings': profile.server_settings,
+        },
+    )
+
+    return engine
+
+
+async def connect(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    async_session = async_sessionmaker(engine, expire_on_commit=True, autoflush=True)
+
+    return async_session
+
+
+async def _ping(engine: AsyncEngine) -> None:
+    async with engine.connect() as connection:
+        await connection.execute(text('SELECT 1'))
+
+
+async def warm_up(engine: AsyncEngine, connections: int) -> None:
+    """
+    Opens the connections at once, so that they're all established and back in the pool
+    before the first requests, instead of each of the first ones paying for a handshake.
+    """
+    await asyncio.gather(*(_ping(engine) for _ in range(connections)))
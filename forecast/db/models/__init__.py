@@ -1,2 +1,11 @@
 from forecast.db.models.city import City as City
 from forecast.db.models.weather_journal import WeatherJournal as WeatherJournal
+from forecast.db.models.weather_rollup import (
+    DailyWeatherRollup as DailyWeatherRollup,
+)
+from forecast.db.models.weather_rollup import (
+    HourlyWeatherRollup as HourlyWeatherRollup,
+)
+from forecast.db.models.weather_rollup import (
+    MonthlyWeatherRollup as MonthlyWeatherRollup,
+)
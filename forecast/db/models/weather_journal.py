@@ -4,7 +4,7 @@ import typing
 from datetime import datetime
 from typing import Self
 
-from sqlalchemy import DateTime, ForeignKey
+from sqlalchemy import DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from forecast.db.models.base import Base
@@ -13,26 +13,35 @@ from forecast.providers.models import Weather
 if typing.TYPE_CHECKING:
     from forecast.db.models.city import City
 
+# * A provider reports a single row per hour for a city, re-collecting the same hour
+# * updates that row
+NATURAL_KEY: tuple[str, ...] = ('city_id', 'data_source', 'date')
+
 
 class WeatherJournal(Base):
     __tablename__ = 'weather_journal'
-    # __table_args__ = (
-    #     Index('idx_weather_journal_date', 'date'),
-    #     Index('idx_weather_journal_temperature', 'temperature'),
-    #     Index('idx_weather_journal_precipitation', 'precipitation'),
-    # )
+    # * Range partitioned by year, see forecast.db.partitions. The partition key has to
+    # * be a part of every unique constraint, hence the date in the primary key
+    __table_args__ = (
+        UniqueConstraint(
+            *NATURAL_KEY, name='uq_weather_journal_city_id_data_source_date'
+        ),
+        Index('ix_weather_journal_city_id_date', 'city_id', 'date'),
+        Index('ix_weather_journal_date_brin', 'date', postgresql_using='brin'),
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
 
     data_source: Mapped[str] = mapped_column()
-    date: Mapped[datetime] = mapped_column(DateTime, index=True)
-    temperature: Mapped[float] = mapped_column(nullable=True, index=True)
+    date: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    temperature: Mapped[float] = mapped_column(nullable=True)
     pressure: Mapped[float] = mapped_column(nullable=True)
     wind_speed: Mapped[float] = mapped_column(nullable=True)
     wind_direction: Mapped[float] = mapped_column(nullable=True)
     humidity: Mapped[float] = mapped_column(nullable=True)
     clouds: Mapped[float] = mapped_column(nullable=True)
-    precipitation: Mapped[float] = mapped_column(nullable=True, index=True)
+    precipitation: Mapped[float] = mapped_column(nullable=True)
     snow: Mapped[float] = mapped_column(nullable=True)
 
     city_id: Mapped[int] = mapped_column(ForeignKey('city.id'))
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from forecast.db.models.base import Base
+
+# * The measurements averaged over all of the providers, see forecast.db.rollups for how
+# * they are maintained
+ROLLUP_VALUE_COLUMNS: tuple[str, ...] = (
+    'temperature',
+    'pressure',
+    'wind_speed',
+    'wind_direction',
+    'humidity',
+    'clouds',
+    'precipitation',
+    'snow',
+)
+
+
+class WeatherRollupMixin:
+    city_id: Mapped[int] = mapped_column(ForeignKey('city.id'), primary_key=True)
+    # * The start of the hour, day or month the row covers
+    date: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+
+    temperature: Mapped[float] = mapped_column(nullable=True)
+    pressure: Mapped[float] = mapped_column(nullable=True)
+    wind_speed: Mapped[float] = mapped_column(nullable=True)
+    wind_direction: Mapped[float] = mapped_column(nullable=True)
+    humidity: Mapped[float] = mapped_column(nullable=True)
+    clouds: Mapped[float] = mapped_column(nullable=True)
+    precipitation: Mapped[float] = mapped_column(nullable=True)
+    snow: Mapped[float] = mapped_column(nullable=True)
+
+    # * The amount of the weather_journal rows that were aggregated into this one
+    samples: Mapped[int] = mapped_column()
+
+
+class HourlyWeatherRollup(WeatherRollupMixin, Base):
+    __tablename__ = 'weather_rollup_hourly'
+
+
+class DailyWeatherRollup(WeatherRollupMixin, Base):
+    __tablename__ = 'weather_rollup_daily'
+
+
+class MonthlyWeatherRollup(WeatherRollupMixin, Base):
+    __tablename__ = 'weather_rollup_monthly'
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from forecast.db.models import WeatherJournal
+from forecast.logging import logger_provider
+
+logger = logger_provider(__name__)
+
+IS_PARTITIONED_SQL = text(
+    'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = '
+    'to_regclass(:table))'
+)
+
+
+def partition_name(year: int) -> str:
+    return f'{WeatherJournal.__tablename__}_y{year}'
+
+
+async def ensure_yearly_partitions(
+    session: AsyncSession, start_date: datetime, end_date: datetime
+) -> None:
+    """
+    Creates the yearly weather_journal partitions covering [start_date, end_date]. The
+    rows outside of any yearly partition end up in the default one, which can't be split
+    later on without moving the data, so this has to run before writing a new year.
+    """
+    if session.bind.dialect.name != 'postgresql':
+        return
+
+    is_partitioned = await session.scalar(
+        IS_PARTITIONED_SQL, {'table': WeatherJournal.__tablename__}
+    )
+    if not is_partitioned:
+        logger.warning(
+            f'{WeatherJournal.__tablename__} is not partitioned, run the migrations. '
+            'Not creating the partitions'
+        )
+        return
+
+    for year in range(start_date.year, end_date.year + 1):
+        try:
+            async with session.begin_nested():
+                await session.execute(
+                    text(
+                        f'CREATE TABLE IF NOT EXISTS {partition_name(year)} '
+                        f'PARTITION OF {WeatherJournal.__tablename__} '
+                        f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+                    )
+                )
+        except exc.DBAPIError as error:
+            # * The year already has rows in the default partition, they will keep on
+            # * going there
+            logger.warning(
+                f'Could not create the partition for {year}, its rows will go to the '
+                f'default partition: {error}'
+            )
+
+    await session.commit()
+    logger.info(
+        f'Ensured the {WeatherJournal.__tablename__} partitions for {start_date.year} '
+        f'- {end_date.year}'
+    )
@@ -0,0 +1,170 @@
+import asyncio
+import statistics
+import time
+from collections import deque
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from forecast.logging import logger_provider
+
+# * The waits of the latest checkouts the percentiles are computed over
+WAIT_WINDOW = 1000
+DEFAULT_REPORT_INTERVAL_SECS = 30.0
+
+
+class PoolStats(BaseModel):
+    size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    peak_checked_out: int
+    # * The share of the connections the pool may open which are checked out
+    utilization: float
+    checkouts: int
+    checkout_wait_mean_ms: float | None
+    checkout_wait_p95_ms: float | None
+    checkout_wait_max_ms: float
+    # * The checkouts which gave up after the pool timeout
+    timeouts: int
+    # * The churn, the connections opened, closed and invalidated over the lifetime of
+    # * the pool
+    connects: int
+    closes: int
+    invalidations: int
+
+
+class PoolMetrics:
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.peak_checked_out = 0
+        self.max_wait = 0.0
+        self._waits: deque[float] = deque(maxlen=WAIT_WINDOW)
+
+    def record_checkout(self, wait: float, checked_out: int) -> None:
+        self.checkouts += 1
+        self.max_wait = max(self.max_wait, wait)
+        self.peak_checked_out = max(self.peak_checked_out, checked_out)
+        self._waits.append(wait)
+
+    def stats(self, pool: 'MeteredPool') -> PoolStats:
+        waits = sorted(self._waits)
+        capacity = pool.size() + max(pool._max_overflow, 0)
+
+        return PoolStats(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            peak_checked_out=self.peak_checked_out,
+            utilization=pool.checkedout() / capacity if capacity > 0 else 0.0,
+            checkouts=self.checkouts,
+            checkout_wait_mean_ms=statistics.fmean(waits) * 1000
+            if len(waits) > 0
+            else None,
+            checkout_wait_p95_ms=waits[int(len(waits) * 0.95)] * 1000
+            if len(waits) > 0
+            else None,
+            checkout_wait_max_ms=self.max_wait * 1000,
+            timeouts=self.timeouts,
+            connects=self.connects,
+            closes=self.closes,
+            invalidations=self.invalidations,
+        )
+
+    def _listen(self, pool: Pool) -> None:
+        def on_connect(*_: Any) -> None:
+            self.connects += 1
+
+        def on_close(*_: Any) -> None:
+            self.closes += 1
+
+        def on_invalidate(*_: Any) -> None:
+            self.invalidations += 1
+
+        event.listen(pool, 'connect', on_connect)
+        event.listen(pool, 'close', on_close)
+        event.listen(pool, 'close_detached', on_close)
+        event.listen(pool, 'invalidate', on_invalidate)
+        event.listen(pool, 'soft_invalidate', on_invalidate)
+
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    """
+    The default pool of the async engines, timing how long the checkouts wait for a
+    connection.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.metrics = PoolMetrics()
+        # * A recreated pool, e.g. on dispose, copies the listeners over along with the
+        # * dispatch
+        if kwargs.get('_dispatch') is None:
+            self.metrics._listen(self)
+
+    def recreate(self) -> 'MeteredPool':
+        pool = super().recreate()
+        assert isinstance(pool, MeteredPool)
+        pool.metrics = self.metrics
+
+        return pool
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+
+        self.metrics.record_checkout(time.perf_counter() - start, self.checkedout())
+        return connection
+
+
+def pool_stats(engine: AsyncEngine) -> PoolStats | None:
+    """None for the engines not created with the MeteredPool."""
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, MeteredPool):
+        return None
+
+    return pool.metrics.stats(pool)
+
+
+def format_pool_stats(stats: PoolStats) -> str:
+    wait = 'n/a'
+    if stats.checkout_wait_mean_ms is not None:
+        wait = (
+            f'mean {stats.checkout_wait_mean_ms:.2f} ms, '
+            f'p95 {stats.checkout_wait_p95_ms:.2f} ms, max '
+            f'{stats.checkout_wait_max_ms:.2f} ms'
+        )
+
+    return (
+        f'[db pool] checked out: {stats.checked_out}/{stats.size}+{stats.max_overflow} '
+        f'(peak {stats.peak_checked_out}), checkouts: {stats.checkouts}, wait: {wait}, '
+        f'timeouts: {stats.timeouts}, connects: {stats.connects}, closes: '
+        f'{stats.closes}, '
+        f'invalidations: {stats.invalidations}'
+    )
+
+
+async def report_periodically(
+    engine: AsyncEngine, interval: float = DEFAULT_REPORT_INTERVAL_SECS
+) -> None:
+    logger = logger_provider(__name__)
+
+    while True:
+        await asyncio.sleep(interval)
+
+        stats = pool_stats(engine)
+        if stats is not None:
+            logger.info(format_pool_stats(stats))
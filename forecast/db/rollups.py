@@ -0,0 +1,221 @@
+from collections.abc import Callable, Mapping
+from datetime import datetime, timedelta
+from typing import Any, Literal, TypeAlias
+
+from sqlalchemy import ColumnElement, DateTime, Integer, and_, func, literal, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.selectable import TableValuedAlias
+
+from forecast.db.models import (
+    DailyWeatherRollup,
+    HourlyWeatherRollup,
+    MonthlyWeatherRollup,
+    WeatherJournal,
+)
+from forecast.db.models.weather_rollup import ROLLUP_VALUE_COLUMNS, WeatherRollupMixin
+from forecast.logging import logger_provider
+
+logger = logger_provider(__name__)
+
+Resolution: TypeAlias = Literal['hourly', 'daily', 'monthly']
+
+ROLLUP_MODELS: dict[Resolution, type[WeatherRollupMixin]] = {
+    'hourly': HourlyWeatherRollup,
+    'daily': DailyWeatherRollup,
+    'monthly': MonthlyWeatherRollup,
+}
+
+# * The first key of the transaction-level advisory locks on the rollups of a city, the
+# * city id is the second one. 'roll' in ASCII
+ROLLUP_LOCK_NAMESPACE = 0x726F6C6C
+
+# * The longest range served from a tier, the longer ones are served from the next
+# * coarser tier
+MAX_SPAN: dict[Resolution, timedelta] = {
+    'hourly': timedelta(days=14),
+    'daily': timedelta(days=400),
+}
+
+
+def resolution_for_span(from_date: datetime, to_date: datetime) -> Resolution:
+    span = to_date - from_date
+    for resolution, max_span in MAX_SPAN.items():
+        if span <= max_span:
+            return resolution
+
+    return 'monthly'
+
+
+def _start_of_hour(date: datetime) -> datetime:
+    return date.replace(minute=0, second=0, microsecond=0)
+
+
+def _start_of_day(date: datetime) -> datetime:
+    return _start_of_hour(date).replace(hour=0)
+
+
+def _start_of_month(date: datetime) -> datetime:
+    return _start_of_day(date).replace(day=1)
+
+
+def _start_of_next_month(date: datetime) -> datetime:
+    return _start_of_month(_start_of_month(date) + timedelta(days=31))
+
+
+BUCKET_START: dict[Resolution, Callable[[datetime], datetime]] = {
+    'hourly': _start_of_hour,
+    'daily': _start_of_day,
+    'monthly': _start_of_month,
+}
+
+
+def _changed_ranges_table(
+    ranges: Mapping[int, tuple[datetime, datetime]],
+) -> TableValuedAlias:
+    """
+    The (city_id, start, stop) rows to join the source with. Three array parameters,
+    however many cities there are.
+    """
+    city_ids = list(ranges)
+    return (
+        func.unnest(
+            literal(city_ids, postgresql.ARRAY(Integer)),
+            literal(
+                [ranges[city_id][0] for city_id in city_ids], postgresql.ARRAY(DateTime)
+            ),
+            literal(
+                [ranges[city_id][1] for city_id in city_ids], postgresql.ARRAY(DateTime)
+            ),
+        )
+        .table_valued('city_id', 'start', 'stop')
+        .render_derived(name='changed')
+    )
+
+
+def _upsert_aggregate(
+    target: type[WeatherRollupMixin],
+    source: type[WeatherJournal] | type[WeatherRollupMixin],
+    bucket: ColumnElement[datetime],
+    samples: ColumnElement[int],
+    ranges: Mapping[int, tuple[datetime, datetime]],
+) -> Any:
+    """Recomputes the buckets of the cities' [start, stop) ranges."""
+    changed = _changed_ranges_table(ranges)
+    aggregate_query = (
+        select(
+            source.city_id,
+            bucket,
+            *[func.avg(getattr(source, column)) for column in ROLLUP_VALUE_COLUMNS],
+            samples,
+        )
+        .join(
+            changed,
+            and_(
+                source.city_id == changed.c.city_id,
+                source.date >= changed.c.start,
+                source.date < changed.c.stop,
+            ),
+        )
+        .group_by(source.city_id, bucket)
+    )
+
+    statement = postgresql.insert(target).from_select(
+        ['city_id', 'date', *ROLLUP_VALUE_COLUMNS, 'samples'], aggregate_query
+    )
+    return statement.on_conflict_do_update(
+        index_elements=['city_id', 'date'],
+        set_={
+            column: statement.excluded[column]
+            for column in (*ROLLUP_VALUE_COLUMNS, 'samples')
+        },
+    )
+
+
+def _aligned_ranges(
+    changed: Mapping[int, tuple[datetime, datetime]],
+    start_of_bucket: Callable[[datetime], datetime],
+    start_of_next_bucket: Callable[[datetime], datetime],
+) -> dict[int, tuple[datetime, datetime]]:
+    return {
+        city_id: (start_of_bucket(first), start_of_next_bucket(last))
+        for city_id, (first, last) in changed.items()
+    }
+
+
+async def refresh_rollups(
+    session: AsyncSession, changed: Mapping[int, tuple[datetime, datetime]]
+) -> None:
+    """
+    Recomputes the hourly, daily and monthly rollups of the cities over the (first,
+    last) dates of their changed rows. Every tier is built from the one finer than it,
+    over the ranges widened to its whole buckets, e.g. a changed hour refreshes its day
+    and its month.
+
+    Runs in the caller's transaction, which is meant to be the one writing the rows, so
+    that they can't be committed without their rollups.
+    """
+    if len(changed) == 0:
+        return
+
+    if session.bind.dialect.name != 'postgresql':
+        logger.warning('The rollups are only maintained on postgres, skipping them')
+        return
+
+    # * Until the commit, the transactions refreshing the same city take turns and see
+    # * each other's rows, e.g. a month isn't computed from only half of its new days.
+    # * Taken in the order of the cities, two batches can't deadlock on them
+    locked = (
+        func.unnest(literal(sorted(changed), postgresql.ARRAY(Integer)))
+        .table_valued('city_id')
+        .render_derived(name='locked')
+    )
+    await session.execute(
+        select(
+            func.pg_advisory_xact_lock(
+                literal(ROLLUP_LOCK_NAMESPACE, Integer), locked.c.city_id
+            )
+        ).select_from(locked)
+    )
+
+    statements = (
+        _upsert_aggregate(
+            HourlyWeatherRollup,
+            WeatherJournal,
+            WeatherJournal.date,
+            func.count(),
+            _aligned_ranges(
+                changed,
+                _start_of_hour,
+                lambda date: _start_of_hour(date) + timedelta(hours=1),
+            ),
+        ),
+        _upsert_aggregate(
+            DailyWeatherRollup,
+            HourlyWeatherRollup,
+            func.date_trunc('day', HourlyWeatherRollup.date),
+            func.sum(HourlyWeatherRollup.samples),
+            _aligned_ranges(
+                changed,
+                _start_of_day,
+                lambda date: _start_of_day(date) + timedelta(days=1),
+            ),
+        ),
+        _upsert_aggregate(
+            MonthlyWeatherRollup,
+            DailyWeatherRollup,
+            func.date_trunc('month', DailyWeatherRollup.date),
+            func.sum(DailyWeatherRollup.samples),
+            _aligned_ranges(changed, _start_of_month, _start_of_next_month),
+        ),
+    )
+
+    for statement in statements:
+        await session.execute(statement)
+
+    first = min(first for first, _ in changed.values())
+    last = max(last for _, last in changed.values())
+    logger.debug(
+        f'Refreshed the rollups of {len(changed)} cities, '
+        f'changed between {first.isoformat()} and {last.isoformat()}'
+    )
@@ -1,9 +1,14 @@
 from argparse import ArgumentParser, Namespace
+from datetime import datetime
 from functools import cache
 
 
 class ForecastNamespace(Namespace):
     initial_run: bool
+    incremental_run: bool
+    start_date: datetime | None
+    end_date: datetime | None
+    train_predictor: bool
 
 
 @cache
@@ -14,6 +19,37 @@ def create_parser() -> ArgumentParser:
         dest='initial_run',
         action='store_true',
     )
+    ap.add_argument(
+        '--incremental',
+        dest='incremental_run',
+        action='store_true',
+        help=(
+            'Only collect the dates that are not yet stored for each city and provider'
+        ),
+    )
+    ap.add_argument(
+        '--from',
+        dest='start_date',
+        type=datetime.fromisoformat,
+        default=None,
+        help='Start of the collected window, ISO 8601',
+    )
+    ap.add_argument(
+        '--to',
+        dest='end_date',
+        type=datetime.fromisoformat,
+        default=None,
+        help='End of the collected window, ISO 8601. Defaults to now for --incremental',
+    )
+    ap.add_argument(
+        '--train-predictor',
+        dest='train_predictor',
+        action='store_true',
+        help=(
+            'Train a new predictor version on the stored history, after the gathering '
+            'if any'
+        ),
+    )
 
     return ap
 
@@ -0,0 +1,5 @@
+from forecast.prediction.artifacts import ArtifactStore as ArtifactStore
+from forecast.prediction.artifacts import PredictorMeta as PredictorMeta
+from forecast.prediction.artifacts import PredictorWeights as PredictorWeights
+from forecast.prediction.model import TARGETS as TARGETS
+from forecast.prediction.model import WeatherPredictor as WeatherPredictor
@@ -0,0 +1,134 @@
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel
+
+from forecast.logging import logger_provider
+from lib.fs_utils import format_path, validate_path
+
+META_FILE = 'meta.json'
+# * A version is only renamed into place once all of its files are written
+TEMPORARY_PREFIX = '.tmp-'
+
+
+class PredictorMeta(BaseModel):
+    version: str
+    trained_at: datetime
+    samples: int
+    epochs: int
+    loss: float
+    val_loss: float | None = None
+    data_start: datetime
+    data_end: datetime
+
+
+class PredictorWeights(NamedTuple):
+    """
+    The LSTM and dense layers of the model along with the min-max scalers of its inputs
+    and outputs.
+    """
+
+    lstm_kernel: npt.NDArray[np.float32]
+    lstm_recurrent_kernel: npt.NDArray[np.float32]
+    lstm_bias: npt.NDArray[np.float32]
+    dense_kernel: npt.NDArray[np.float32]
+    dense_bias: npt.NDArray[np.float32]
+    x_scale: npt.NDArray[np.float64]
+    x_min: npt.NDArray[np.float64]
+    y_scale: npt.NDArray[np.float64]
+    y_min: npt.NDArray[np.float64]
+
+
+def new_version(trained_at: datetime) -> str:
+    # * Sorts in the order the versions were trained in
+    return trained_at.strftime('%Y%m%dT%H%M%S%f')
+
+
+class ArtifactStore:
+    """
+    The trained predictor versions, a folder of NumPy files each. Written by the
+    training command, memory mapped by the API processes, which don't import TensorFlow
+    or parse anything to load one.
+    """
+
+    def __init__(self, folder: Path) -> None:
+        self.logger = logger_provider(__name__)
+        self._folder = folder
+
+    def versions(self) -> list[str]:
+        """The complete versions, the oldest first."""
+        if not self._folder.is_dir():
+            return []
+
+        return sorted(
+            path.name
+            for path in self._folder.iterdir()
+            if path.is_dir()
+            and not path.name.startswith(TEMPORARY_PREFIX)
+            and path.joinpath(META_FILE).is_file()
+        )
+
+    def latest_version(self) -> str | None:
+        versions = self.versions()
+        return versions[-1] if len(versions) > 0 else None
+
+    def load(self, version: str) -> tuple[PredictorMeta, PredictorWeights] | None:
+        folder = self._folder.joinpath(version)
+        try:
+            meta = PredictorMeta.model_validate_json(
+                folder.joinpath(META_FILE).read_bytes()
+            )
+            weights = PredictorWeights(
+                *(
+                    np.load(folder.joinpath(f'{name}.npy'), mmap_mode='r')
+                    for name in PredictorWeights._fields
+                )
+            )
+        except (OSError, ValueError):
+            self.logger.warning(
+                f'No usable predictor in "{format_path(folder)}", ignoring it'
+            )
+            return None
+
+        return meta, weights
+
+    def save(self, meta: PredictorMeta, weights: PredictorWeights) -> Path:
+        validate_path(
+            self._folder,
+            'folder',
+            {'readable', 'writable'},
+            autocreate_self=True,
+            autocreate_is_recursive=True,
+        )
+
+        temporary_folder = self._folder.joinpath(f'{TEMPORARY_PREFIX}{meta.version}')
+        temporary_folder.mkdir()
+        for name, array in weights._asdict().items():
+            np.save(
+                temporary_folder.joinpath(f'{name}.npy'), np.ascontiguousarray(array)
+            )
+        temporary_folder.joinpath(META_FILE).write_bytes(
+            meta.model_dump_json().encode()
+        )
+
+        folder = self._folder.joinpath(meta.version)
+        os.rename(temporary_folder, folder)
+
+        return folder
+
+    def prune(self, keep: int) -> list[str]:
+        """
+        Removes all but the latest versions. The API processes still mapping a removed
+        one keep reading it, the files are only gone once they let go of them.
+        """
+        versions = self.versions()
+        removed = versions[: max(len(versions) - keep, 0)]
+        for version in removed:
+            shutil.rmtree(self._folder.joinpath(version))
+
+        return removed
@@ -0,0 +1,69 @@
+from collections.abc import Sequence
+from datetime import datetime
+
+import numpy as np
+import numpy.typing as npt
+
+from forecast.prediction.artifacts import PredictorMeta, PredictorWeights
+
+FEATURES = ('year', 'month', 'day', 'hour')
+TARGETS = ('temperature', 'pressure', 'wind_speed', 'wind_direction')
+
+
+def date_features(dates: Sequence[datetime]) -> npt.NDArray[np.float64]:
+    return np.array(
+        [[date.year, date.month, date.day, date.hour] for date in dates],
+        dtype=np.float64,
+    ).reshape(-1, len(FEATURES))
+
+
+def _sigmoid(values: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return 1 / (1 + np.exp(-values))
+
+
+def _relu(values: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return np.maximum(values, 0)
+
+
+class WeatherPredictor:
+    """
+    The forward pass of the trained Keras model, in NumPy. The model is a single
+    timestep LSTM with the relu activation followed by a dense layer, the inference
+    doesn't need TensorFlow.
+    """
+
+    def __init__(self, meta: PredictorMeta, weights: PredictorWeights) -> None:
+        self.meta = meta
+        self._weights = weights
+
+    @property
+    def version(self) -> str:
+        return self.meta.version
+
+    def predict_many(self, dates: Sequence[datetime]) -> npt.NDArray[np.float64]:
+        """Returns an (n, 4) array of the TARGETS for each of the dates."""
+        weights = self._weights
+        x = date_features(dates) * weights.x_scale + weights.x_min
+
+        # * The gates in the Keras order, input, forget, cell and output, the initial
+        # * state is zero
+        units = weights.lstm_recurrent_kernel.shape[0]
+        hidden = np.zeros((len(x), units))
+        cell = np.zeros((len(x), units))
+
+        gates = (
+            x @ weights.lstm_kernel
+            + hidden @ weights.lstm_recurrent_kernel
+            + weights.lstm_bias
+        )
+        input_gate, forget_gate, candidate, output_gate = np.split(gates, 4, axis=1)
+
+        cell = _sigmoid(forget_gate) * cell + _sigmoid(input_gate) * _relu(candidate)
+        hidden = _sigmoid(output_gate) * _relu(cell)
+
+        y_scaled = hidden @ weights.dense_kernel + weights.dense_bias
+        return (y_scaled - weights.y_min) / weights.y_scale
+
+    def predict(self, date: datetime) -> dict[str, float]:
+        prediction = self.predict_many([date])[0]
+        return dict(zip(TARGETS, prediction.tolist()))
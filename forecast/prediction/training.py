@@ -0,0 +1,119 @@
+from collections.abc import Sequence
+from datetime import UTC, datetime
+
+import numpy as np
+import numpy.typing as npt
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from forecast.db.models import HourlyWeatherRollup
+from forecast.prediction.artifacts import PredictorMeta, PredictorWeights, new_version
+from forecast.prediction.model import FEATURES, TARGETS, date_features
+
+
+async def fetch_training_data(
+    session: AsyncSession, since: datetime
+) -> tuple[list[datetime], npt.NDArray[np.float64]]:
+    """
+    The hourly means over all the cities, the dates and an (n, 4) array of the TARGETS.
+    """
+    history_query = (
+        select(
+            HourlyWeatherRollup.date,
+            *[
+                func.avg(getattr(HourlyWeatherRollup, target)).label(target)
+                for target in TARGETS
+            ],
+        )
+        .where(
+            HourlyWeatherRollup.date >= since,
+            HourlyWeatherRollup.precipitation.isnot(None),
+            HourlyWeatherRollup.snow.isnot(None),
+        )
+        .group_by(HourlyWeatherRollup.date)
+        .order_by(HourlyWeatherRollup.date)
+    )
+    result = (await session.execute(history_query)).all()
+
+    dates = [row.date for row in result]
+    targets = np.array(
+        [[getattr(row, target) for target in TARGETS] for row in result],
+        dtype=np.float64,
+    ).reshape(-1, len(TARGETS))
+
+    return dates, targets
+
+
+def fit_predictor(
+    dates: Sequence[datetime], targets: npt.NDArray[np.float64], epochs: int
+) -> tuple[PredictorMeta, PredictorWeights]:
+    """
+    Takes minutes, blocking. Run by the training command, never by the API processes.
+    """
+    # * TensorFlow and sklearn take seconds to import, only the training pays for them
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import MinMaxScaler
+    from tensorflow.keras.layers import LSTM, Dense
+    from tensorflow.keras.models import Sequential
+
+    if len(dates) < 2:
+        raise ValueError(
+            f'Too little data to train the predictor on: {len(dates)} samples'
+        )
+
+    x = date_features(dates)
+
+    scaler_x = MinMaxScaler(feature_range=(0, 1))
+    scaler_y = MinMaxScaler(feature_range=(0, 1))
+    x_scaled = scaler_x.fit_transform(x)
+    y_scaled = scaler_y.fit_transform(targets)
+
+    x_reshaped = x_scaled.reshape((x_scaled.shape[0], 1, x_scaled.shape[1]))
+
+    x_train, x_test, y_train, y_test = train_test_split(
+        x_reshaped, y_scaled, test_size=0.2, random_state=42
+    )
+
+    model = Sequential(
+        [
+            LSTM(50, activation='relu', input_shape=(1, len(FEATURES))),
+            Dense(len(TARGETS)),
+        ]
+    )
+    model.compile(optimizer='adam', loss='mean_squared_error')
+    history = model.fit(
+        x_train,
+        y_train,
+        validation_data=(x_test, y_test),
+        epochs=epochs,
+        batch_size=32,
+        verbose=2,
+    )
+
+    lstm_kernel, lstm_recurrent_kernel, lstm_bias = model.layers[0].get_weights()
+    dense_kernel, dense_bias = model.layers[1].get_weights()
+
+    trained_at = datetime.now(UTC).replace(tzinfo=None)
+    meta = PredictorMeta(
+        version=new_version(trained_at),
+        trained_at=trained_at,
+        samples=len(dates),
+        epochs=epochs,
+        loss=history.history['loss'][-1],
+        val_loss=history.history.get('val_loss', [None])[-1],
+        data_start=min(dates),
+        data_end=max(dates),
+    )
+    weights = PredictorWeights(
+        lstm_kernel=lstm_kernel,
+        lstm_recurrent_kernel=lstm_recurrent_kernel,
+        lstm_bias=lstm_bias,
+        dense_kernel=dense_kernel,
+        dense_bias=dense_bias,
+        x_scale=scaler_x.scale_,
+        x_min=scaler_x.min_,
+        y_scale=scaler_y.scale_,
+        y_min=scaler_y.min_,
+    )
+
+    return meta, weights
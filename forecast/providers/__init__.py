@@ -1,7 +1,24 @@
-from forecast.providers.meteostat import Meteostat as Meteostat
-from forecast.providers.open_meteo import OpenMeteo as OpenMeteo
-from forecast.providers.visual_crossing import VisualCrossing as VisualCrossing
-from forecast.providers.weather_bit import WeatherBit as WeatherBit
-from forecast.providers.world_weather_online import (
-    WorldWeatherOnline as WorldWeatherOnline,
+from typing import TYPE_CHECKING
+
+from lib.lazy_imports import lazy_exports
+
+if TYPE_CHECKING:
+    from forecast.providers.meteostat import Meteostat as Meteostat
+    from forecast.providers.open_meteo import OpenMeteo as OpenMeteo
+    from forecast.providers.visual_crossing import VisualCrossing as VisualCrossing
+    from forecast.providers.weather_bit import WeatherBit as WeatherBit
+    from forecast.providers.world_weather_online import (
+        WorldWeatherOnline as WorldWeatherOnline,
+    )
+
+# * The providers pull in the scientific stack, they're only imported once used
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        'Meteostat': 'forecast.providers.meteostat',
+        'OpenMeteo': 'forecast.providers.open_meteo',
+        'VisualCrossing': 'forecast.providers.visual_crossing',
+        'WeatherBit': 'forecast.providers.weather_bit',
+        'WorldWeatherOnline': 'forecast.providers.world_weather_online',
+    },
 )
@@ -1 +1,7 @@
+from forecast.providers.base.process_parsing import (
+    ProcessParser as ProcessParser,
+)
+from forecast.providers.base.process_parsing import (
+    run_process_parser as run_process_parser,
+)
 from forecast.providers.base.provider import Provider as Provider
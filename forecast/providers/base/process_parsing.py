@@ -0,0 +1,23 @@
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any, TypeAlias
+
+from forecast.providers.models import WeatherBatch
+
+# * (raw, start_date, end_date, data_source) -> the parsed batch.
+# * Has to be a module level function, it's pickled over to the worker processes
+ProcessParser: TypeAlias = Callable[[Any, datetime, datetime, str], WeatherBatch]
+
+
+def run_process_parser(
+    parser: ProcessParser,
+    raw: Any,
+    start_date: datetime,
+    end_date: datetime,
+    data_source: str,
+) -> bytes:
+    """
+    Runs in a worker process. The result crosses back as an Arrow IPC stream,
+    which is a single buffer to copy rather than a pickled object per row.
+    """
+    return parser(raw, start_date, end_date, data_source).to_ipc()
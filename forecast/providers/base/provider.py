@@ -1,20 +1,35 @@
+import asyncio
 from abc import ABC, abstractmethod
 from asyncio import AbstractEventLoop
-from datetime import datetime
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
 from types import TracebackType
+from typing import Any, ClassVar
 
 from aiohttp import BaseConnector
 from pydantic_extra_types.coordinate import Coordinate
 
-from forecast.client_session_classes.extended_client_session import (
+from forecast.client_session_classes import (
     ExtendedClientSession,
+    RateLimitConfig,
+    RateLimiter,
+    ResponseCache,
 )
 from forecast.logging import logger_provider
-from forecast.providers.models import Weather
+from forecast.providers.base.process_parsing import ProcessParser, run_process_parser
+from forecast.providers.models import WeatherBatch, WeatherData
 from forecast.utils import pascal_case_to_snake_case
 
 
 class Provider(ABC):
+    # * The longest date range a single request may ask for, the collector slices the
+    # * longer ones. None for no limit
+    max_request_span: timedelta | None = None
+    # * Set by the providers with CPU heavy parsing, wrapped into a staticmethod.
+    # * .parse() runs it in the parse_executor, handing it what fetch_historical_weather
+    # * has returned, so that the event loop is only left with the I/O
+    process_parser: ClassVar[ProcessParser | None] = None
+
     def __init__(
         self,
         base_url: str,
@@ -22,6 +37,8 @@ class Provider(ABC):
         api_key: str | None = None,
         *,
         event_loop: AbstractEventLoop = None,
+        response_cache: ResponseCache | None = None,
+        rate_limit: RateLimitConfig | None = None,
     ) -> None:
         self.logger = logger_provider(__name__)
 
@@ -29,8 +46,13 @@ class Provider(ABC):
         self._connector = connector
         self._api_key = api_key
         self._event_loop = event_loop
+        self._response_cache = response_cache
+        self._rate_limit = rate_limit
 
         self._session: ExtendedClientSession | None = None
+        # * Set by the collector to its process pool, the parsers run on the event loop
+        # * without one
+        self.parse_executor: Executor | None = None
 
         self.is_setup = False
         self.was_torn_down = False
@@ -50,7 +72,16 @@ class Provider(ABC):
             )
             return
 
-        self._session = ExtendedClientSession(self._base_url, self._connector)
+        rate_limiter = None
+        if self._rate_limit is not None:
+            rate_limiter = RateLimiter(self.name, self._rate_limit)
+
+        self._session = ExtendedClientSession(
+            self._base_url,
+            self._connector,
+            response_cache=self._response_cache,
+            rate_limiter=rate_limiter,
+        )
         self.is_setup = True
 
     async def teardown(self) -> None:
@@ -82,11 +113,98 @@ class Provider(ABC):
 
         return self._session
 
+    async def fetch_historical_weather(
+        self,
+        coordinate: Coordinate,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> Any:
+        """
+        The network part of get_historical_weather, the result is handed to
+        parse_historical_weather. The providers which don't split the two fetch and
+        parse here at once.
+        """
+        return await self.get_historical_weather(coordinate, start_date, end_date)
+
+    def parse_historical_weather(
+        self, raw: Any, start_date: datetime, end_date: datetime
+    ) -> WeatherData:
+        if self.process_parser is not None:
+            return self.process_parser(raw, start_date, end_date, self.name)
+
+        return raw
+
+    async def run_parser(
+        self, parser: ProcessParser, raw: Any, start_date: datetime, end_date: datetime
+    ) -> WeatherBatch:
+        """Runs the parser in the parse_executor, right away without one."""
+        if self.parse_executor is None:
+            return parser(raw, start_date, end_date, self.name)
+
+        buffer = await asyncio.get_running_loop().run_in_executor(
+            self.parse_executor,
+            run_process_parser,
+            parser,
+            raw,
+            start_date,
+            end_date,
+            self.name,
+        )
+
+        return WeatherBatch.from_ipc(buffer)
+
+    async def parse(
+        self, raw: Any, start_date: datetime, end_date: datetime
+    ) -> WeatherBatch:
+        """
+        Parses what fetch_historical_weather has returned, off the event loop where
+        there is a process_parser.
+        """
+        if self.process_parser is None:
+            return WeatherBatch.coerce(
+                self.parse_historical_weather(raw, start_date, end_date)
+            )
+
+        return await self.run_parser(self.process_parser, raw, start_date, end_date)
+
+    async def prepare(self, coordinates: list[Coordinate]) -> None:
+        """
+        Called with all of the coordinates the provider is about to be asked for, before
+        the collection starts. Lets the providers that can share the work between the
+        coordinates plan it up front.
+        """
+
+    def release(self, coordinate: Coordinate) -> None:
+        """
+        The counterpart of prepare, called once per prepared coordinate after its last
+        fetch. Lets the providers drop whatever they kept around for the coordinate.
+        """
+
+    async def get_historical_weather_batch(
+        self,
+        coordinates: list[Coordinate],
+        start_date: datetime,
+        end_date: datetime,
+    ) -> list[WeatherData]:
+        await self.prepare(coordinates)
+
+        try:
+            return list(
+                await asyncio.gather(
+                    *[
+                        self.get_historical_weather(coordinate, start_date, end_date)
+                        for coordinate in coordinates
+                    ]
+                )
+            )
+        finally:
+            for coordinate in coordinates:
+                self.release(coordinate)
+
     @abstractmethod
     async def get_historical_weather(
         self,
         coordinate: Coordinate,
         start_date: datetime,
         end_date: datetime,
-    ) -> list[Weather]:
-        ...
+    ) -> WeatherData: ...
@@ -4,31 +4,39 @@ from __future__ import annotations
 
 import asyncio
 import gzip
-import io
 import time
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Final, NewType, TypeAlias
+from typing import Final, NewType, TypeAlias
 
 import aiohttp
 import numpy as np
 import numpy.typing as npt
 import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pa_csv
 from pydantic_extra_types.coordinate import Coordinate
-from scipy.spatial import distance
 
+from forecast.client_session_classes import ttl_for_period
 from forecast.providers.base import Provider
-from forecast.providers.models import Weather
-from lib.fs_utils import format_path, validate_path
+from forecast.providers.models import WeatherBatch
+from forecast.providers.station_catalog import StationCatalog
+from lib.geo import SpatialIndex
 
 ROOT_CACHE_FOLDER: Final[Path] = Path('./.cache')
 METEOSTAT_CACHE_FOLDER: Final[Path] = ROOT_CACHE_FOLDER.joinpath('./meteostat/')
 STATIONS_CACHE_FOLDER: Final[Path] = METEOSTAT_CACHE_FOLDER.joinpath('./stations/')
+# * The stations list only changes now and then, it's revalidated once it gets older
+# * than this
+DEFAULT_STATIONS_MAX_AGE: Final[timedelta] = timedelta(days=7)
 
 FloatsArray: TypeAlias = npt.NDArray[np.float64]
 
 StationId = NewType('StationId', str)
+StationYear: TypeAlias = tuple[StationId, int]
 
 # https://dev.meteostat.net/api/stations/hourly.html#response
 # CSV file contents:
@@ -65,175 +73,338 @@ DEFAULT_CSV_NAMES = (
 BASE_URL = 'https://bulk.meteostat.net/v2'
 
 
+# * The types of the columns the weather is made of, the rest of them are skipped while
+# * parsing
+CSV_COLUMN_TYPES: Final[dict[str, pa.DataType]] = {
+    'date': pa.date32(),
+    'hour': pa.int64(),
+    'temp': pa.float64(),
+    'rhum': pa.float64(),
+    'prcp': pa.float64(),
+    'snow': pa.float64(),
+    'wdir': pa.float64(),
+    'wspd': pa.float64(),
+    'pres': pa.float64(),
+}
+
+MICROSECONDS_IN_HOUR = 3_600_000_000
+
+
+def parse_hourly_csv(compressed_data: bytes) -> pa.Table | None:
+    """Parses a gzipped station-year file, None for an empty one."""
+    content = gzip.decompress(compressed_data)
+    if len(content) == 0:
+        return None
+
+    table = pa_csv.read_csv(
+        pa.py_buffer(content),
+        read_options=pa_csv.ReadOptions(column_names=DEFAULT_CSV_NAMES),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=CSV_COLUMN_TYPES, include_columns=list(CSV_COLUMN_TYPES)
+        ),
+    )
+
+    # * date + hour, without formatting and parsing the strings back
+    hours = pc.multiply(table['hour'], MICROSECONDS_IN_HOUR).cast(pa.duration('us'))
+    dates = pc.add(table['date'].cast(pa.timestamp('us')), hours)
+
+    return table.drop_columns(['date', 'hour']).append_column('date', dates)
+
+
+def parse_station_years(
+    compressed_files: list[bytes],
+    start_date: datetime,
+    end_date: datetime,
+    data_source: str,
+) -> WeatherBatch:
+    """Runs in the collector's parse processes, see Meteostat.process_parser."""
+    tables = [
+        table
+        for table in map(parse_hourly_csv, compressed_files)
+        if table is not None and table.num_rows > 0
+    ]
+    if len(tables) == 0:
+        return WeatherBatch.empty()
+
+    table = pa.concat_tables(tables)
+
+    return WeatherBatch.from_columns(
+        data_source,
+        date=table['date'],
+        temperature=table['temp'],
+        pressure=table['pres'],
+        wind_speed=pc.round(pc.divide(table['wspd'], 3.6), 2),  # converts km/h to m/s
+        wind_direction=table['wdir'],
+        humidity=table['rhum'],
+        precipitation=table['prcp'],
+        snow=table['snow'],
+    ).between(start_date, end_date)
+
+
 class Meteostat(Provider):
-    def __init__(self, conn: aiohttp.BaseConnector, **kwargs) -> None:
+    # * Run on every station-year as it's fetched rather than on every fetch, see
+    # * ._fetch_and_parse_year
+    process_parser = staticmethod(parse_station_years)
+
+    def __init__(
+        self,
+        conn: aiohttp.BaseConnector,
+        *,
+        stations_max_age: timedelta = DEFAULT_STATIONS_MAX_AGE,
+        **kwargs,
+    ) -> None:
         super().__init__(BASE_URL, conn, **kwargs)
 
-        self._stations_cache_file = STATIONS_CACHE_FOLDER.joinpath('./list-lite.json')
-        self._stations_df: pd.DataFrame | None = None
+        self._stations = StationCatalog(STATIONS_CACHE_FOLDER, stations_max_age)
+        self._station_ids: npt.NDArray[np.str_] | None = None
+        self._stations_index: SpatialIndex | None = None
+
+        # * Set by .prepare(), the stations of the coordinates and how many of them are
+        # * still to be collected. A coordinate counts once however many fetches it
+        # * takes, .release() is called after its last one
+        self._coordinate_stations: dict[tuple[float, float], StationId] = {}
+        self._station_users: Counter[StationId] = Counter()
+        # * The parsed years, shared by all of the coordinates using the station. Each
+        # * file is parsed once, in the collector's parse processes, and every
+        # * coordinate only cuts its own range out of it
+        self._station_years: dict[StationYear, asyncio.Task[WeatherBatch]] = {}
+
+    async def _refresh_stations(self) -> None:
+        meta = self._stations.meta
+        self.logger.info('Refreshing the stations list')
+        response = await self.session.get_if_modified(
+            '/stations/lite.json.gz',
+            etag=meta.etag if meta is not None else None,
+            last_modified=meta.last_modified if meta is not None else None,
+        )
 
-        validate_path(
-            self._stations_cache_file,
-            'file',
-            autocreate_self=False,
-            autocreate_only_parent=True,
-            autocreate_is_recursive=True,
+        if response is None:
+            self.logger.info('The stations list has not changed')
+            self._stations.touch()
+            return
+
+        if len(response.content) == 0:
+            raise ValueError('Nothing got returned from the API')
+
+        stations = orjson.loads(gzip.decompress(response.content))
+        diff = self._stations.update(
+            np.array([station['id'] for station in stations], dtype=np.str_),
+            np.array(
+                [station['location']['latitude'] for station in stations],
+                dtype=np.float64,
+            ),
+            np.array(
+                [station['location']['longitude'] for station in stations],
+                dtype=np.float64,
+            ),
+            etag=response.etag,
+            last_modified=response.last_modified,
+        )
+        self.logger.info(
+            f'Stored {len(stations)} stations: {diff.added} added, '
+            f'{diff.removed} removed, {diff.moved} moved'
         )
 
     async def setup(self) -> None:
         await super().setup()
 
-        # TODO: Consider storing this data, which is UNIQUE to meteostat in a separate db table not to load this file every time
-        if self._stations_cache_file.exists():
-            self.logger.info(
-                f'Found cached stations list file, loading from "{format_path(self._stations_cache_file)}"'
-            )
-
-            with open(self._stations_cache_file, encoding='utf-8') as file:
-                content = file.read()
-
-            if len(content) == 0:
-                raise ValueError('Cached file is empty')
-        else:
-            self.logger.info(
-                f'Could not find stations list file cached at "{self._stations_cache_file}", fetching and saving'
-            )
-
-            validate_path(
-                STATIONS_CACHE_FOLDER,
-                'folder',
-                {'readable', 'writable'},
-                autocreate_self=True,
-                autocreate_is_recursive=True,
-            )
-
-            self.logger.info('Fetching the stations list')
-            content = await self.session.get_raw('/stations/lite.json.gz')
-
-            if len(content) == 0:
-                raise ValueError('Nothing got returned from the API')
-
-            with open(self._stations_cache_file, 'w+', encoding='utf-8') as file:
-                content = gzip.decompress(content)
-                file.write(content.decode('utf-8'))
-
-        stations = orjson.loads(content)
+        start = time.perf_counter()
+        loaded = self._stations.load()
+        if not loaded or self._stations.is_stale:
+            try:
+                await self._refresh_stations()
+            except (TimeoutError, aiohttp.ClientError, ValueError):
+                if not loaded:
+                    raise
+
+                # * A stale catalog is still way better than none
+                self.logger.exception(
+                    'Could not refresh the stations list, using the stored one'
+                )
+
+        self._station_ids = self._stations.ids
+        self._stations_index = SpatialIndex.from_vectors(self._stations.vectors)
+        end = time.perf_counter()
 
-        self._stations_df = pd.DataFrame(
-            [
-                {
-                    'id': station['id'],
-                    'latitude': station['location']['latitude'],
-                    'longitude': station['location']['longitude'],
-                }
-                for station in stations
-            ]
+        self.logger.info(
+            f'Took: {end - start:.3f} to load {len(self._station_ids)} stations'
         )
 
-    def _find_nearest_station(self, point: Coordinate) -> StationId:
-        if self._stations_df is None:
+    def find_nearest_stations(self, points: list[Coordinate]) -> list[StationId]:
+        if self._station_ids is None or self._stations_index is None:
             # fixme if you just call self.setup() from here there wont be any purpose of making setup method public
             raise ValueError('You need to call .setup() first to prime the data.')
 
         start = time.perf_counter()
-        closest = distance.cdist(
-            np.array([(point.latitude, point.longitude)]),
-            self._stations_df[['latitude', 'longitude']].values,
+        _, closest = self._stations_index.nearest(
+            [point.latitude for point in points],
+            [point.longitude for point in points],
         )
         end = time.perf_counter()
 
         self.logger.debug(
-            f'Took: {end - start} to compute the closest point with {len(self._stations_df.index)} points'
+            f'Took: {end - start} to find the closest of {len(self._stations_index)} '
+            f'stations for {len(points)} point(s)'
         )
 
-        index = closest.argmin()
-        return StationId(self._stations_df.iloc[index]['id'])
+        return [
+            StationId(str(station_id))
+            for station_id in self._station_ids[closest[:, 0]]
+        ]
 
-    async def _fetch_data_for_year(
-        self, station_id: StationId, year: int
-    ) -> pd.DataFrame:
-        compressed_data = await self.session.get_raw(
-            f'/hourly/{year}/{station_id}.csv.gz'
+    def _find_nearest_station(self, point: Coordinate) -> StationId:
+        station_id = self._coordinate_stations.get((point.latitude, point.longitude))
+        if station_id is not None:
+            return station_id
+
+        return self.find_nearest_stations([point])[0]
+
+    async def prepare(self, coordinates: list[Coordinate]) -> None:
+        if len(coordinates) == 0:
+            return
+
+        station_ids = self.find_nearest_stations(coordinates)
+        for coordinate, station_id in zip(coordinates, station_ids):
+            self._coordinate_stations[(coordinate.latitude, coordinate.longitude)] = (
+                station_id
+            )
+            self._station_users[station_id] += 1
+
+        self.logger.info(
+            f'{len(coordinates)} coordinate(s) share {len(set(station_ids))} station(s)'
         )
 
-        df = pd.read_csv(
-            io.BytesIO(compressed_data), names=DEFAULT_CSV_NAMES, compression='gzip'
+    def _forget_station(self, station_id: StationId) -> None:
+        for key in [key for key in self._station_years if key[0] == station_id]:
+            del self._station_years[key]
+
+    def release(self, coordinate: Coordinate) -> None:
+        station_id = self._coordinate_stations.get(
+            (coordinate.latitude, coordinate.longitude)
         )
-        df['date'] = pd.to_datetime(
-            df['date'] + ' ' + df['hour'].astype(str).str.zfill(2), format='%Y-%m-%d %H'
+        if station_id is None or station_id not in self._station_users:
+            return
+
+        self._station_users[station_id] -= 1
+        if self._station_users[station_id] > 0:
+            return
+
+        # * Nobody else is going to ask for the station, its files don't have to be kept
+        # * around
+        del self._station_users[station_id]
+        self._forget_station(station_id)
+
+    def _get_data_for_year(
+        self, station_id: StationId, year: int
+    ) -> asyncio.Task[WeatherBatch]:
+        key = (station_id, year)
+        task = self._station_years.get(key)
+
+        # * The failed fetches are retried by the next caller instead of handing out the
+        # * same error
+        if task is None or (
+            task.done() and (task.cancelled() or task.exception() is not None)
+        ):
+            task = self._event_loop.create_task(
+                self._fetch_and_parse_year(station_id, year)
+            )
+            self._station_years[key] = task
+
+        return task
+
+    async def _fetch_data_for_year(self, station_id: StationId, year: int) -> bytes:
+        return await self.session.get_raw(
+            f'/hourly/{year}/{station_id}.csv.gz',
+            cache_ttl=ttl_for_period(datetime(year, 12, 31, 23)),
         )
 
-        return df.drop(['hour'], axis=1)
+    async def _fetch_and_parse_year(
+        self, station_id: StationId, year: int
+    ) -> WeatherBatch:
+        compressed_data = await self._fetch_data_for_year(station_id, year)
+
+        return await self.run_parser(
+            parse_station_years,
+            [compressed_data],
+            datetime(year, 1, 1),
+            datetime(year, 12, 31, 23),
+        )
 
-    async def get_for_station(
+    async def fetch_for_station(
         self,
         station_id: StationId,
         start_date: datetime,
         end_date: datetime,
-    ) -> pd.DataFrame | None:
-        fetch_tasks = []
+    ) -> list[WeatherBatch]:
+        """The whole parsed years within the range."""
         start = time.perf_counter()
-        for year in range(start_date.year, end_date.year + 1):
-            fetch_task = self._event_loop.create_task(
-                self._fetch_data_for_year(station_id, year)
-            )
-            fetch_tasks.append(fetch_task)
-
-        results = await asyncio.gather(*fetch_tasks)
+        # * Shielded, the file may be awaited by the other coordinates of the station as
+        # * well
+        results = await asyncio.gather(
+            *[
+                asyncio.shield(self._get_data_for_year(station_id, year))
+                for year in range(start_date.year, end_date.year + 1)
+            ]
+        )
         end = time.perf_counter()
         self.logger.debug(
-            f'Took to gather and parse {len(results)} CSV file(s): {end - start}'
+            f'Took to gather {len(results)} station year(s): {end - start}'
         )
 
-        filtered_results = [df for df in results if not df.empty]
-        if len(filtered_results) == 0:
-            self.logger.warning(f'No results found for station id: {station_id}')
-            return None
+        return list(results)
 
-        concatenated_df = pd.concat(filtered_results)
-        # * Reordering the table columns
-        concatenated_df['clouds'] = None
-        concatenated_df['data_source'] = self.name
-
-        concatenated_df = concatenated_df[
-            [
-                'data_source',
-                'date',
-                'temp',
-                'pres',
-                'wspd',
-                'wdir',
-                'rhum',
-                'clouds',
-                'prcp',
-                'snow',
-            ]
-        ]
+    async def get_for_station(
+        self,
+        station_id: StationId,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> pd.DataFrame | None:
+        years = await self.fetch_for_station(station_id, start_date, end_date)
 
-        concatenated_df['wspd'] = (concatenated_df['wspd'] / 3.6).round(
-            2
-        )  # converts km/h to m/s
+        batch = self.parse_historical_weather(years, start_date, end_date)
+        if len(batch) == 0:
+            self.logger.warning(f'No results found for station id: {station_id}')
+            return None
 
-        return concatenated_df
+        return batch.to_pandas()
 
-    async def get_historical_weather(
+    async def fetch_historical_weather(
         self,
         coordinate: Coordinate,
         start_date: datetime,
         end_date: datetime,
-    ) -> Any:
+    ) -> list[WeatherBatch]:
         nearest_station = self._find_nearest_station(coordinate)
 
         self.logger.debug(
             f'Nearest station for ({coordinate.latitude}, {coordinate.longitude}) is {nearest_station}'
         )
 
-        df = await self.get_for_station(nearest_station, start_date, end_date)
-        if df is None:
-            return []
+        try:
+            return await self.fetch_for_station(nearest_station, start_date, end_date)
+        finally:
+            # * Without .prepare() nobody releases the station, the files are only kept
+            # * for its users
+            if nearest_station not in self._station_users:
+                self._forget_station(nearest_station)
+
+    async def get_historical_weather(
+        self,
+        coordinate: Coordinate,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> WeatherBatch:
+        years = await self.fetch_historical_weather(coordinate, start_date, end_date)
+
+        return self.parse_historical_weather(years, start_date, end_date)
 
-        mask = (df['date'] >= start_date) & (df['date'] <= end_date)
-        df: pd.DataFrame = df.loc[mask]
-        df = df.replace([np.nan], [None])
+    def parse_historical_weather(
+        self, raw: list[WeatherBatch], start_date: datetime, end_date: datetime
+    ) -> WeatherBatch:
+        return WeatherBatch.concat(raw).between(start_date, end_date)
 
-        return [Weather._make(row) for row in df.itertuples(index=False)]
+    async def parse(
+        self, raw: list[WeatherBatch], start_date: datetime, end_date: datetime
+    ) -> WeatherBatch:
+        # * The years were already parsed in the process pool as they were fetched
+        return self.parse_historical_weather(raw, start_date, end_date)
@@ -1 +1,26 @@
+from typing import TYPE_CHECKING
+
 from forecast.providers.models.weather import Weather as Weather
+from lib.lazy_imports import lazy_exports
+
+if TYPE_CHECKING:
+    from forecast.providers.models.weather_batch import (
+        WEATHER_SCHEMA as WEATHER_SCHEMA,
+    )
+    from forecast.providers.models.weather_batch import (
+        WeatherBatch as WeatherBatch,
+    )
+    from forecast.providers.models.weather_batch import (
+        WeatherData as WeatherData,
+    )
+
+# * The batches need pyarrow and pandas, unlike the Weather tuple the db models are
+# * built on
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        'WEATHER_SCHEMA': 'forecast.providers.models.weather_batch',
+        'WeatherBatch': 'forecast.providers.models.weather_batch',
+        'WeatherData': 'forecast.providers.models.weather_batch',
+    },
+)
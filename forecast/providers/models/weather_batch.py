@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from forecast.providers.models.weather import Weather
+
+# * The columns of a batch, in the same order as the Weather tuple fields
+WEATHER_SCHEMA = pa.schema(
+    [
+        ('data_source', pa.string()),
+        ('date', pa.timestamp('us')),
+        ('temperature', pa.float64()),
+        ('pressure', pa.float64()),
+        ('wind_speed', pa.float64()),
+        ('wind_direction', pa.float64()),
+        ('humidity', pa.float64()),
+        ('clouds', pa.float64()),
+        ('precipitation', pa.float64()),
+        ('snow', pa.float64()),
+    ]
+)
+
+
+class WeatherBatch:
+    """
+    The hourly weather as columns, an Arrow table of the WEATHER_SCHEMA. A city-year is
+    a handful of arrays instead of ~9k Weather tuples, the per row form is only built on
+    demand.
+    """
+
+    __slots__ = ('table',)
+
+    def __init__(self, table: pa.Table) -> None:
+        if not table.schema.equals(WEATHER_SCHEMA):
+            table = table.select(WEATHER_SCHEMA.names).cast(WEATHER_SCHEMA)
+
+        self.table = table
+
+    @classmethod
+    def empty(cls) -> WeatherBatch:
+        return cls(WEATHER_SCHEMA.empty_table())
+
+    @classmethod
+    def from_columns(cls, data_source: str, **columns: Any) -> WeatherBatch:
+        """
+        Takes a sequence or an array per Weather field, NaNs and Nones standing for the
+        missing values. The fields left out are all missing.
+        """
+        length = len(columns['date'])
+
+        arrays = [pa.repeat(pa.scalar(data_source), length)]
+        for field in list(WEATHER_SCHEMA)[1:]:
+            values = columns.get(field.name)
+            if values is None:
+                arrays.append(pa.nulls(length, field.type))
+            elif isinstance(values, (pa.Array, pa.ChunkedArray)):
+                arrays.append(values.cast(field.type))
+            elif isinstance(values, np.ndarray) and values.dtype.kind == 'M':
+                # * Arrow only takes the s, ms, us and ns units of the numpy datetimes
+                arrays.append(pa.array(values.astype('datetime64[us]')))
+            else:
+                arrays.append(pa.array(values, from_pandas=True).cast(field.type))
+
+        return cls(pa.Table.from_arrays(arrays, schema=WEATHER_SCHEMA))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> WeatherBatch:
+        return cls(
+            pa.Table.from_pandas(
+                frame[WEATHER_SCHEMA.names], schema=WEATHER_SCHEMA, preserve_index=False
+            )
+        )
+
+    @classmethod
+    def from_weather(cls, data: Sequence[Weather]) -> WeatherBatch:
+        """
+        The compatibility adapter for the providers still returning the Weather tuples.
+        """
+        if len(data) == 0:
+            return cls.empty()
+
+        return cls(
+            pa.Table.from_arrays(
+                [
+                    pa.array(column, type=field.type, from_pandas=True)
+                    for column, field in zip(zip(*data), WEATHER_SCHEMA)
+                ],
+                schema=WEATHER_SCHEMA,
+            )
+        )
+
+    @classmethod
+    def coerce(cls, data: WeatherData) -> WeatherBatch:
+        if isinstance(data, WeatherBatch):
+            return data
+
+        return cls.from_weather(data)
+
+    @classmethod
+    def concat(cls, batches: Sequence[WeatherBatch]) -> WeatherBatch:
+        if len(batches) == 0:
+            return cls.empty()
+
+        return cls(pa.concat_tables([batch.table for batch in batches]))
+
+    @classmethod
+    def from_ipc(cls, buffer: bytes) -> WeatherBatch:
+        return cls(pa.ipc.open_stream(buffer).read_all())
+
+    def to_ipc(self) -> bytes:
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, WEATHER_SCHEMA) as writer:
+            writer.write_table(self.table)
+
+        return sink.getvalue().to_pybytes()
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({len(self)} rows)'
+
+    def column(self, name: str) -> npt.NDArray[Any]:
+        """The missing values of the float columns are NaNs."""
+        return self.table[name].to_numpy()
+
+    def between(self, start_date: datetime, end_date: datetime) -> WeatherBatch:
+        dates = self.table['date']
+        return WeatherBatch(
+            self.table.filter(
+                pc.and_(
+                    pc.greater_equal(dates, pa.scalar(start_date, dates.type)),
+                    pc.less_equal(dates, pa.scalar(end_date, dates.type)),
+                )
+            )
+        )
+
+    def with_city_id(self, city_id: int) -> pa.Table:
+        """The table the weather_journal rows are copied from."""
+        return self.table.append_column(
+            'city_id', pa.array(np.full(len(self), city_id, dtype=np.int64))
+        )
+
+    def to_pandas(self) -> pd.DataFrame:
+        return self.table.to_pandas()
+
+    def to_weather(self) -> list[Weather]:
+        columns = [self.table[name].to_pylist() for name in Weather._fields]
+        return [Weather._make(row) for row in zip(*columns)]
+
+
+# * What the providers return, either form is accepted while they move over to the
+# * batches
+WeatherData: TypeAlias = WeatherBatch | Sequence[Weather]
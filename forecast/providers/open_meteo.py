@@ -1,25 +1,67 @@
 from datetime import datetime
+from typing import Final
 
 import aiohttp
+import numpy as np
+import pyarrow as pa
 from pydantic_extra_types.coordinate import Coordinate
 
+from forecast.client_session_classes import decode_json_columns, ttl_for_period
 from forecast.providers.base import Provider
-from forecast.providers.models.weather import Weather
+from forecast.providers.models import WeatherBatch
 
 BASE_URL = 'https://archive-api.open-meteo.com/v1'
 
+# * The hourly variables the weather is made of, decoded right into the arrays of these
+# * types
+HOURLY_COLUMNS: Final[dict[str, pa.DataType]] = {
+    'time': pa.timestamp('us'),
+    'temperature_2m': pa.float64(),
+    'surface_pressure': pa.float64(),
+    'wind_speed_10m': pa.float64(),
+    'wind_direction_10m': pa.float64(),
+    'relative_humidity_2m': pa.float64(),
+    'cloud_cover': pa.float64(),
+    'precipitation': pa.float64(),
+    'snowfall': pa.float64(),
+}
+
+
+def parse_archive(
+    content: bytes, start_date: datetime, end_date: datetime, data_source: str
+) -> WeatherBatch:
+    """Runs in the collector's parse processes, see Provider.process_parser."""
+    hourly = decode_json_columns(content, 'hourly', HOURLY_COLUMNS)
+
+    return WeatherBatch.from_columns(
+        data_source,
+        date=hourly['time'],
+        temperature=hourly['temperature_2m'],
+        pressure=hourly['surface_pressure'],
+        wind_speed=np.round(hourly['wind_speed_10m'] / 3.6, 2),  # converts km/h to m/s
+        wind_direction=hourly['wind_direction_10m'],
+        humidity=hourly['relative_humidity_2m'],
+        clouds=hourly['cloud_cover'],
+        precipitation=hourly['precipitation'],
+        snow=np.round(hourly['snowfall'] * 1000),  # converts cm to mm
+    )
+
 
 class OpenMeteo(Provider):
-    def __init__(self, conn: aiohttp.BaseConnector, api_key: str | None) -> None:
-        super().__init__(BASE_URL, conn, api_key)
+    process_parser = staticmethod(parse_archive)
 
-    async def get_historical_weather(
+    def __init__(
+        self, conn: aiohttp.BaseConnector, api_key: str | None, **kwargs
+    ) -> None:
+        super().__init__(BASE_URL, conn, api_key, **kwargs)
+
+    async def fetch_historical_weather(
         self,
         coordinate: Coordinate,
         start_date: datetime,
         end_date: datetime,
-    ) -> list[Weather]:
-        raw = await self.session.get_json(
+    ) -> bytes:
+        return await self.session.get_raw(
             '/archive',
             params={
                 'latitude': coordinate.latitude,
@@ -45,44 +87,15 @@ class OpenMeteo(Provider):
                     #'weather_code'
                 ],
             },
+            cache_ttl=ttl_for_period(end_date),
         )
 
-        hourly = raw['hourly']
-        data = []
-        for (
-            time,
-            temperature,
-            pressure,
-            wind_speed,
-            wind_direction,
-            humidity,
-            clouds,
-            precipitation,
-            snow,
-        ) in zip(
-            hourly['time'],
-            hourly['temperature_2m'],
-            hourly['surface_pressure'],
-            hourly['wind_speed_10m'],
-            hourly['wind_direction_10m'],
-            hourly['relative_humidity_2m'],
-            hourly['cloud_cover'],
-            hourly['precipitation'],
-            hourly['snowfall'],
-        ):
-            data.append(
-                Weather(
-                    data_source=self.name,
-                    date=datetime.strptime(time, '%Y-%m-%dT%H:%M'),
-                    temperature=temperature,
-                    pressure=pressure,
-                    wind_speed=round(wind_speed / 3.6, 2),  # converts km/h to m/s
-                    wind_direction=wind_direction,
-                    humidity=humidity,
-                    clouds=clouds,
-                    precipitation=float(precipitation),
-                    snow=int(snow * 1000),  # converts cm to mm
-                    # description=''
-                )
-            )
-        return data
+    async def get_historical_weather(
+        self,
+        coordinate: Coordinate,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> WeatherBatch:
+        content = await self.fetch_historical_weather(coordinate, start_date, end_date)
+
+        return self.parse_historical_weather(content, start_date, end_date)
@@ -0,0 +1,206 @@
+import hashlib
+import os
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel
+
+from forecast.logging import logger_provider
+from lib.fs_utils import format_path, validate_path
+from lib.geo import to_unit_vectors
+
+IDS_FILE = 'ids.npy'
+VECTORS_FILE = 'vectors.npy'
+# * The raw (latitude, longitude) degrees, only read by the refreshes to tell the moved
+# * stations apart
+COORDINATES_FILE = 'coordinates.npy'
+META_FILE = 'meta.json'
+
+
+class CatalogMeta(BaseModel):
+    count: int
+    # * File name -> the digest of its array, an update interrupted between the files
+    # * leaves them disagreeing with it
+    checksums: dict[str, str]
+    refreshed_at: datetime
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class CatalogDiff(NamedTuple):
+    added: int
+    removed: int
+    moved: int
+
+
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _checksum(array: npt.NDArray) -> str:
+    return hashlib.blake2b(array.tobytes(), digest_size=16).hexdigest()
+
+
+def _is_intact(meta: CatalogMeta, name: str, array: npt.NDArray) -> bool:
+    return meta.checksums.get(name) == _checksum(array)
+
+
+class StationCatalog:
+    """
+    The station ids and their coordinates already projected onto the unit sphere, as
+    NumPy files. Loading memory maps the two files and checks them against the digests
+    in the meta file, the startup doesn't parse or project anything.
+    """
+
+    def __init__(self, folder: Path, max_age: timedelta) -> None:
+        self.logger = logger_provider(__name__)
+
+        self._folder = folder
+        self._max_age = max_age
+
+        self.ids: npt.NDArray[np.str_] = np.array([], dtype=np.str_)
+        self.vectors: npt.NDArray[np.float64] = np.empty((0, 3))
+        self.meta: CatalogMeta | None = None
+
+        validate_path(
+            self._folder,
+            'folder',
+            {'readable', 'writable'},
+            autocreate_self=True,
+            autocreate_is_recursive=True,
+        )
+
+    @property
+    def is_stale(self) -> bool:
+        return self.meta is None or _now() - self.meta.refreshed_at > self._max_age
+
+    def load(self) -> bool:
+        try:
+            meta = CatalogMeta.model_validate_json(
+                self._folder.joinpath(META_FILE).read_bytes()
+            )
+            ids = np.load(self._folder.joinpath(IDS_FILE), mmap_mode='r')
+            vectors = np.load(self._folder.joinpath(VECTORS_FILE), mmap_mode='r')
+        except (OSError, ValueError):
+            self.logger.info(
+                f'No usable station catalog in "{format_path(self._folder)}"'
+            )
+            return False
+
+        if (
+            len(ids) != meta.count
+            or vectors.shape != (meta.count, 3)
+            or not _is_intact(meta, IDS_FILE, ids)
+            or not _is_intact(meta, VECTORS_FILE, vectors)
+        ):
+            self.logger.warning('The station catalog files disagree, ignoring them')
+            return False
+
+        self.ids, self.vectors, self.meta = ids, vectors, meta
+        return True
+
+    def _load_coordinates(self) -> npt.NDArray[np.float64] | None:
+        try:
+            coordinates = np.load(
+                self._folder.joinpath(COORDINATES_FILE), mmap_mode='r'
+            )
+        except (OSError, ValueError):
+            return None
+
+        if (
+            self.meta is None
+            or coordinates.shape != (len(self.ids), 2)
+            or not _is_intact(self.meta, COORDINATES_FILE, coordinates)
+        ):
+            return None
+
+        return coordinates
+
+    def _save_array(self, name: str, array: npt.NDArray) -> str:
+        temporary_path = self._folder.joinpath(f'{name}.tmp')
+        with open(temporary_path, 'wb') as file:
+            np.save(file, array)
+        os.replace(temporary_path, self._folder.joinpath(name))
+
+        return _checksum(array)
+
+    def _save_meta(self, meta: CatalogMeta) -> None:
+        temporary_path = self._folder.joinpath(f'{META_FILE}.tmp')
+        temporary_path.write_bytes(meta.model_dump_json().encode())
+        os.replace(temporary_path, self._folder.joinpath(META_FILE))
+        self.meta = meta
+
+    def touch(self) -> None:
+        """The source hasn't changed since the last refresh."""
+        if self.meta is not None:
+            self._save_meta(self.meta.model_copy(update={'refreshed_at': _now()}))
+
+    def update(
+        self,
+        ids: npt.NDArray[np.str_],
+        latitudes: npt.NDArray[np.float64],
+        longitudes: npt.NDArray[np.float64],
+        *,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> CatalogDiff:
+        """
+        Replaces the catalog, only projecting the stations which are new or have moved.
+        """
+        coordinates = np.column_stack((latitudes, longitudes)).astype(np.float64)
+        vectors = np.empty((len(ids), 3))
+        to_project = np.ones(len(ids), dtype=bool)
+
+        known = {station_id: index for index, station_id in enumerate(self.ids)}
+        previous = np.array(
+            [known.get(station_id, -1) for station_id in ids], dtype=np.intp
+        )
+        kept = previous >= 0
+        if kept.any():
+            previous_coordinates = self._load_coordinates()
+            if previous_coordinates is not None:
+                kept_indices = np.flatnonzero(kept)
+                unchanged = np.all(
+                    previous_coordinates[previous[kept]] == coordinates[kept], axis=1
+                )
+                vectors[kept_indices[unchanged]] = self.vectors[
+                    previous[kept_indices[unchanged]]
+                ]
+                to_project[kept_indices[unchanged]] = False
+
+        vectors[to_project] = to_unit_vectors(
+            coordinates[to_project, 0], coordinates[to_project, 1]
+        )
+
+        diff = CatalogDiff(
+            added=int((~kept).sum()),
+            removed=len(known) - int(kept.sum()),
+            moved=int((kept & to_project).sum()),
+        )
+
+        ids = np.asarray(ids, dtype=np.str_)
+        checksums = {
+            name: self._save_array(name, array)
+            for name, array in (
+                (IDS_FILE, ids),
+                (VECTORS_FILE, vectors),
+                (COORDINATES_FILE, coordinates),
+            )
+        }
+        # * The meta file goes last, a catalog is only complete once it agrees with the
+        # * arrays
+        self._save_meta(
+            CatalogMeta(
+                count=len(ids),
+                checksums=checksums,
+                refreshed_at=_now(),
+                etag=etag,
+                last_modified=last_modified,
+            )
+        )
+        self.ids, self.vectors = ids, vectors
+
+        return diff
@@ -1,27 +1,29 @@
 # api docs https://www.visualcrossing.com/resources/documentation/weather-api/weather-api-documentation/
 import asyncio
-import itertools
 from asyncio import AbstractEventLoop
 from datetime import datetime, timedelta
+from typing import Any
 
 import aiohttp
+import pandas as pd
 from pydantic_extra_types.coordinate import Coordinate
 
+from forecast.client_session_classes import ttl_for_period
 from forecast.providers.base import Provider
-from forecast.providers.models import Weather
+from forecast.providers.models import WeatherBatch
 
 BASE_URL = 'https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services'
 
 
 class VisualCrossing(Provider):
     def __init__(
-        self, conn: aiohttp.BaseConnector, event_loop: AbstractEventLoop
+        self, conn: aiohttp.BaseConnector, event_loop: AbstractEventLoop, **kwargs
     ) -> None:
-        super().__init__(BASE_URL, conn, event_loop=event_loop)
+        super().__init__(BASE_URL, conn, event_loop=event_loop, **kwargs)
 
     async def _get_historical_weather_chunk(
         self, coordinate: Coordinate, start_date: datetime, end_date: datetime
-    ) -> list[Weather]:
+    ) -> WeatherBatch:
         time_frame = (
             f'{start_date.strftime("%Y-%m-%d")}/'
             f'{min((start_date + timedelta(days=1)), end_date).strftime("%Y-%m-%d")}'
@@ -36,35 +38,40 @@ class VisualCrossing(Provider):
                 'contentType': 'json',
             },
             headers={'referer': 'https://www.visualcrossing.com/'},
+            cache_ttl=ttl_for_period(end_date),
         )
 
-        data = []
-        for day_data in resp['days']:
-            day = day_data['datetime']
-            for hour_data in day_data['hours']:
-                hour = hour_data['datetime']
-                data.append(
-                    Weather(
-                        data_source=self.name,
-                        date=datetime.strptime(f'{day} {hour}', '%Y-%m-%d %H:%M:%S'),
-                        temperature=hour_data['temp'],
-                        pressure=hour_data['pressure'],
-                        wind_speed=hour_data['windspeed'],
-                        wind_direction=hour_data['winddir'],
-                        humidity=hour_data['humidity'],
-                        clouds=hour_data['cloudcover'],
-                        precipitation=hour_data['precip'],
-                        snow=hour_data['snow'],
-                    )
-                )
-        return data
+        hours = [hour for day in resp['days'] for hour in day['hours']]
+
+        def column(name: str) -> list[Any]:
+            return [hour[name] for hour in hours]
+
+        return WeatherBatch.from_columns(
+            self.name,
+            date=pd.to_datetime(
+                [
+                    f'{day["datetime"]} {hour["datetime"]}'
+                    for day in resp['days']
+                    for hour in day['hours']
+                ],
+                format='%Y-%m-%d %H:%M:%S',
+            ),
+            temperature=column('temp'),
+            pressure=column('pressure'),
+            wind_speed=column('windspeed'),
+            wind_direction=column('winddir'),
+            humidity=column('humidity'),
+            clouds=column('cloudcover'),
+            precipitation=column('precip'),
+            snow=column('snow'),
+        )
 
     async def get_historical_weather(
         self,
         coordinate: Coordinate,
         start_date: datetime,
         end_date: datetime,
-    ) -> list[Weather]:
+    ) -> WeatherBatch:
         tasks = []
         while start_date < end_date:
             tasks.append(
@@ -74,4 +81,4 @@ class VisualCrossing(Provider):
             )
             start_date += timedelta(days=2)
 
-        return list(itertools.chain.from_iterable(await asyncio.gather(*tasks)))
+        return WeatherBatch.concat(await asyncio.gather(*tasks))
@@ -1,25 +1,27 @@
 from datetime import datetime
-from typing import List
+from typing import Any
 
 import aiohttp
+import pandas as pd
 from pydantic_extra_types.coordinate import Coordinate
 
+from forecast.client_session_classes import ttl_for_period
 from forecast.providers.base import Provider
-from forecast.providers.models import Weather
+from forecast.providers.models import WeatherBatch
 
 BASE_URL = 'https://api.weatherbit.io/v2.0/'
 
 
 class WeatherBit(Provider):
-    def __init__(self, conn: aiohttp.BaseConnector, api_key: str) -> None:
-        super().__init__(BASE_URL, conn, api_key)
+    def __init__(self, conn: aiohttp.BaseConnector, api_key: str, **kwargs) -> None:
+        super().__init__(BASE_URL, conn, api_key, **kwargs)
 
     async def get_historical_weather(
         self,
         coordinate: Coordinate,
         start_date: datetime,
         end_date: datetime,
-    ) -> List[Weather]:
+    ) -> WeatherBatch:
         raw = await self.session.get_json(
             '/history/hourly',
             params={
@@ -29,21 +31,23 @@ class WeatherBit(Provider):
                 'end_date': end_date.strftime('%Y-%m-%d'),
                 'key': self._api_key,
             },
+            cache_ttl=ttl_for_period(end_date),
         )
 
-        return [
-            Weather(
-                data_source=self.name,
-                date=datetime.strptime(weather['datetime'], '%Y-%m-%d:%H'),
-                temperature=weather['temp'],
-                pressure=weather['pres'],
-                wind_speed=weather['wind_spd'],
-                wind_direction=weather['wind_dir'],
-                humidity=weather['rh'],
-                clouds=weather['clouds'],
-                precipitation=float(weather['precip']),
-                snow=weather['snow'],
-                # description=weather['weather']['description']
-            )
-            for weather in raw['data']
-        ]
+        data = raw['data']
+
+        def column(name: str) -> list[Any]:
+            return [weather[name] for weather in data]
+
+        return WeatherBatch.from_columns(
+            self.name,
+            date=pd.to_datetime(column('datetime'), format='%Y-%m-%d:%H'),
+            temperature=column('temp'),
+            pressure=column('pres'),
+            wind_speed=column('wind_spd'),
+            wind_direction=column('wind_dir'),
+            humidity=column('rh'),
+            clouds=column('clouds'),
+            precipitation=column('precip'),
+            snow=column('snow'),
+        )
@@ -1,24 +1,33 @@
 from datetime import datetime, timedelta
 
 import aiohttp
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
 from pydantic_extra_types.coordinate import Coordinate
 
+from forecast.client_session_classes import ttl_for_period
 from forecast.providers.base import Provider
-from forecast.providers.models import Weather
+from forecast.providers.models import WeatherBatch
 
 BASE_URL = 'https://api.worldweatheronline.com/premium/v1'
 
 
 class WorldWeatherOnline(Provider):
-    def __init__(self, conn: aiohttp.BaseConnector, api_key: str | None) -> None:
-        super().__init__(BASE_URL, conn, api_key)
+    # * The past weather api returns at most a month per request
+    max_request_span = timedelta(days=30)
+
+    def __init__(
+        self, conn: aiohttp.BaseConnector, api_key: str | None, **kwargs
+    ) -> None:
+        super().__init__(BASE_URL, conn, api_key, **kwargs)
 
     async def get_historical_weather(
         self,
         coordinate: Coordinate,
         start_date: datetime,
         end_date: datetime,
-    ) -> list[Weather]:
+    ) -> WeatherBatch:
         raw = await self.session.get_json(
             '/past-weather.ashx',
             params={
@@ -29,28 +38,38 @@ class WorldWeatherOnline(Provider):
                 'format': 'json',
                 'key': self._api_key,
             },
+            cache_ttl=ttl_for_period(end_date),
         )
 
-        data = []
-        for day in raw['data']['weather']:
-            day_time = datetime.strptime(day['date'], '%Y-%m-%d')
-            snow = int(float(day['totalSnow_cm']) * 1000)
-            for hour in day['hourly']:
-                data.append(
-                    Weather(
-                        data_source=self.name,
-                        date=day_time + timedelta(hours=int(hour['time']) // 100),
-                        temperature=float(hour['tempC']),
-                        pressure=int(hour['pressure']),
-                        wind_speed=round(
-                            (float(hour['windspeedKmph']) / 3.6), 2
-                        ),  # converts km/h to m/s
-                        wind_direction=int(hour['winddirDegree']),
-                        humidity=int(hour['humidity']),
-                        clouds=int(hour['cloudcover']),
-                        precipitation=float(hour['precipMM']),
-                        snow=snow,
-                    )
-                )
-
-        return data
+        days = raw['data']['weather']
+        hours = [hour for day in days for hour in day['hourly']]
+        hours_per_day = [len(day['hourly']) for day in days]
+
+        def column(name: str) -> npt.NDArray[np.float64]:
+            return np.asarray([hour[name] for hour in hours], dtype=np.float64)
+
+        day_starts = np.repeat(
+            pd.to_datetime([day['date'] for day in days], format='%Y-%m-%d').values,
+            hours_per_day,
+        )
+        # * The time is in the hmm format, e.g. 0, 100, ..., 2300
+        hour_offsets = (column('time') // 100).astype('timedelta64[h]')
+        snow = np.repeat(
+            [np.trunc(float(day['totalSnow_cm']) * 1000) for day in days],
+            hours_per_day,
+        )
+
+        return WeatherBatch.from_columns(
+            self.name,
+            date=day_starts + hour_offsets,
+            temperature=column('tempC'),
+            pressure=column('pressure'),
+            wind_speed=np.round(
+                column('windspeedKmph') / 3.6, 2
+            ),  # converts km/h to m/s
+            wind_direction=column('winddirDegree'),
+            humidity=column('humidity'),
+            clouds=column('cloudcover'),
+            precipitation=column('precipMM'),
+            snow=snow,
+        )
@@ -1,4 +1,19 @@
-from forecast.services.collector import CollectorService as CollectorService
-from forecast.services.populate_cities import (
-    PopulateCitiesService as PopulateCitiesService,
+from typing import TYPE_CHECKING
+
+from lib.lazy_imports import lazy_exports
+
+if TYPE_CHECKING:
+    from forecast.services.collector import CollectorService as CollectorService
+    from forecast.services.populate_cities import (
+        PopulateCitiesService as PopulateCitiesService,
+    )
+
+# * Importing the configs of forecast.services.models shouldn't import the services
+# * themselves
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        'CollectorService': 'forecast.services.collector',
+        'PopulateCitiesService': 'forecast.services.populate_cities',
+    },
 )
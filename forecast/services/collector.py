@@ -3,13 +3,16 @@ scrap all info and put into database
 """
 
 import asyncio
-from collections.abc import Callable, Coroutine
+from collections import Counter
+from collections.abc import Callable, Coroutine, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Any, TypeVar
+from typing import Any, NamedTuple, TypeAlias
 
 import aiohttp
+import pyarrow as pa
 from pydantic_extra_types.coordinate import Coordinate
-from sqlalchemy import exc, select
+from sqlalchemy import case, exc, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from tenacity import (
     RetryError,
@@ -18,22 +21,49 @@ from tenacity import (
     stop_after_attempt,
 )
 
+from forecast.cache import CacheInvalidator, weather_version_keys
+from forecast.db.bulk_writer import (
+    ChangedRanges,
+    WeatherJournalWriter,
+)
 from forecast.db.models import City, WeatherJournal
+from forecast.db.partitions import ensure_yearly_partitions
+from forecast.db.rollups import refresh_rollups
 from forecast.providers.base import Provider
-from forecast.providers.models.weather import Weather
 from forecast.services.base import Service
+from forecast.services.models import CollectorConfig
+from forecast.utils import WorkerPool, missing_ranges, slice_range
+from forecast.utils.missing_ranges import DEFAULT_STEP
+
+DateRange: TypeAlias = tuple[datetime, datetime]
+
+
+class CollectJob(NamedTuple):
+    city: City
+    provider: Provider
+    start_date: datetime
+    end_date: datetime
+
+    def __str__(self) -> str:
+        return (
+            f'{self.city.name} from {self.provider.name}, '
+            f'{self.start_date.isoformat()} - {self.end_date.isoformat()}'
+        )
 
-DEFAULT_WAIT_TIME_SECS = 10
-CONCURRENT_SESSIONS_ALLOWED = 30
-GATHER_CHUNK_SIZE = CONCURRENT_SESSIONS_ALLOWED * 4
 
-T = TypeVar('T')
+class ParseJob(NamedTuple):
+    job: CollectJob
+    raw: Any
 
+    def __str__(self) -> str:
+        return str(self.job)
 
-def chunks(lst: list[T], n: int) -> list[list[T]]:
-    """Yield successive n-sized chunks from lst."""
-    for i in range(0, len(lst), n):
-        yield lst[i : i + n]
+
+class WriteItem(NamedTuple):
+    city: City
+    data_source: str
+    # * The COPY_COLUMNS of the city slice
+    table: pa.Table
 
 
 class CollectorService(Service):
@@ -44,17 +74,47 @@ class CollectorService(Service):
         end_date: datetime,
         provider_instances: list[Provider],
         event_loop: asyncio.AbstractEventLoop,
+        *,
+        incremental: bool = False,
+        collector_config: CollectorConfig | None = None,
+        cache_invalidator: CacheInvalidator | None = None,
     ) -> None:
         super().__init__(db_session_factory=db_session_factory)
 
+        self._config = collector_config or CollectorConfig()
+        self._cache_invalidator = cache_invalidator
+
         self._cities: list[City] | None = None
         self._event_loop = event_loop
 
         self._start_date = start_date
         self._end_date = end_date
 
+        self._incremental = incremental
+        # * (city id, data source) -> the contiguous (first, last) stored ranges within
+        # * the collected window
+        self._stored_ranges: dict[tuple[int, str], list[DateRange]] = {}
+
         self._providers = provider_instances
-        self._sessions_queue: asyncio.Queue[AsyncSession] = asyncio.Queue()
+        # * (provider name, city id) -> the jobs not done yet, the provider releases the
+        # * city after its last one
+        self._pending_jobs: Counter[tuple[str, int]] = Counter()
+        self._writer = WeatherJournalWriter()
+
+        # * fetchers (per provider) -> parsers -> writers, the bounded queues between
+        # * them hold back the faster stage
+        self._parse_pool = WorkerPool(
+            'parser',
+            self._parse_job,
+            self._config.parse_workers,
+            max_queued=self._config.queue_size,
+        )
+        self._write_queue: asyncio.Queue[WriteItem] = asyncio.Queue(
+            self._config.queue_size
+        )
+        # * Set up for the providers with a process_parser, the decompression and
+        # * parsing use all of the cores
+        self._parse_executor: ProcessPoolExecutor | None = None
 
     async def _map_providers(
         self, to_apply: Callable[[Provider], Coroutine[Any, Any, Any]]
@@ -66,6 +126,72 @@ class CollectorService(Service):
             ]
         )
 
+    async def _load_stored_ranges(self, session: AsyncSession) -> None:
+        partition = (WeatherJournal.city_id, WeatherJournal.data_source)
+        previous_date = func.lag(WeatherJournal.date).over(
+            partition_by=partition, order_by=WeatherJournal.date
+        )
+
+        # * Gaps and islands, a row starts a new island when more than a step passed
+        # * since the previous one
+        island_starts = (
+            select(
+                *partition,
+                WeatherJournal.date,
+                case(
+                    (
+                        or_(
+                            previous_date.is_(None),
+                            WeatherJournal.date - previous_date > DEFAULT_STEP,
+                        ),
+                        1,
+                    ),
+                    else_=0,
+                ).label('starts_island'),
+            )
+            .where(
+                WeatherJournal.date >= self._start_date,
+                WeatherJournal.date <= self._end_date,
+            )
+            .subquery()
+        )
+        islands = select(
+            island_starts.c.city_id,
+            island_starts.c.data_source,
+            island_starts.c.date,
+            func.sum(island_starts.c.starts_island)
+            .over(
+                partition_by=(island_starts.c.city_id, island_starts.c.data_source),
+                order_by=island_starts.c.date,
+            )
+            .label('island'),
+        ).subquery()
+
+        stored_ranges_query = (
+            select(
+                islands.c.city_id,
+                islands.c.data_source,
+                func.min(islands.c.date),
+                func.max(islands.c.date),
+            )
+            .group_by(islands.c.city_id, islands.c.data_source, islands.c.island)
+            .order_by(
+                islands.c.city_id, islands.c.data_source, func.min(islands.c.date)
+            )
+        )
+
+        for city_id, data_source, first, last in await session.execute(
+            stored_ranges_query
+        ):
+            self._stored_ranges.setdefault((city_id, data_source), []).append(
+                (first, last)
+            )
+
+        self.logger.info(
+            f'Loaded the stored date ranges of {len(self._stored_ranges)} '
+            'city/provider pair(s)'
+        )
+
     async def setup(self) -> None:
         setup_providers_task = self._event_loop.create_task(
             self._map_providers(lambda provider: provider.setup())
@@ -76,18 +202,33 @@ class CollectorService(Service):
                 await session.scalars(select(City).order_by(City.population.desc()))
             ).all()
 
+            if self._incremental:
+                await self._load_stored_ranges(session)
+
+        async with self._db_session_factory() as session:
+            await ensure_yearly_partitions(session, self._start_date, self._end_date)
+
         await setup_providers_task
 
-        # * Creating the connections
-        for _ in range(CONCURRENT_SESSIONS_ALLOWED):
-            async with self._db_session_factory() as session:
-                self._sessions_queue.put_nowait(session)
+        if self._config.parse_processes != 0 and any(
+            provider.process_parser is not None for provider in self._providers
+        ):
+            self._parse_executor = ProcessPoolExecutor(self._config.parse_processes)
+            for provider in self._providers:
+                provider.parse_executor = self._parse_executor
 
         await super().setup()
 
     async def teardown(self) -> None:
         await self._map_providers(lambda provider: provider.teardown())
 
+        if self._parse_executor is not None:
+            for provider in self._providers:
+                provider.parse_executor = None
+            # * Waits for the running parses to exit, in a thread to keep the loop going
+            await asyncio.to_thread(self._parse_executor.shutdown, cancel_futures=True)
+            self._parse_executor = None
+
         await super().teardown()
 
     @retry(
@@ -100,9 +241,9 @@ class CollectorService(Service):
         coordinate: Coordinate,
         start_date: datetime,
         end_date: datetime,
-    ) -> list[Weather] | None:
+    ) -> Any | None:
         try:
-            data = await provider.get_historical_weather(
+            data = await provider.fetch_historical_weather(
                 coordinate, start_date, end_date
             )
         except aiohttp.ClientResponseError as exc:
@@ -113,11 +254,9 @@ class CollectorService(Service):
             # FIXME: Handle 404
             match exc.status:
                 case 429:
-                    self.logger.info(
-                        f'{provider.name} got 429, waiting for {DEFAULT_WAIT_TIME_SECS} second(s)...'
-                    )
-
-                    await asyncio.sleep(DEFAULT_WAIT_TIME_SECS)
+                    # * The provider's rate limiter has already paused it for as long as
+                    # * it was told to
+                    self.logger.info(f'{provider.name} got 429, retrying...')
                     raise exc
                 case 404:
                     self.logger.info(
@@ -130,11 +269,38 @@ class CollectorService(Service):
 
         return data
 
-    async def _collect_city(self, city: City, provider: Provider) -> None:
+    def _ranges_to_collect(
+        self, city: City, provider: Provider
+    ) -> list[tuple[datetime, datetime]]:
+        if not self._incremental:
+            return [(self._start_date, self._end_date)]
+
+        return missing_ranges(
+            self._start_date,
+            self._end_date,
+            self._stored_ranges.get((city.id, provider.name), []),
+        )
+
+    def _jobs(self, provider: Provider) -> Iterator[CollectJob]:
+        for city in self._cities:
+            ranges = self._ranges_to_collect(city, provider)
+            if len(ranges) == 0:
+                self.logger.debug(
+                    f'{city.name} is up to date for {provider.name}, nothing to collect'
+                )
+                continue
+
+            for start_date, end_date in ranges:
+                for slice_start, slice_end in slice_range(
+                    start_date, end_date, provider.max_request_span
+                ):
+                    yield CollectJob(city, provider, slice_start, slice_end)
+
+    async def _fetch_job(self, job: CollectJob) -> None:
+        city, provider, start_date, end_date = job
+
         try:
-            data = await self._fetch(
-                provider, city.coordinate, self._start_date, self._end_date
-            )
+            raw = await self._fetch(provider, city.coordinate, start_date, end_date)
         except RetryError:
             self.logger.info(
                 f'We did our best to wait for the timeout on {provider.name} provider to go away. '
@@ -142,45 +308,152 @@ class CollectorService(Service):
             )
             return
 
-        if data is None:
+        if raw is None:
             self.logger.warning(
                 f'Could not get data for city {city.name} from provider {provider.name}. '
                 f'We will be skipping it...'
             )
             return
 
-        session = await self._sessions_queue.get()
-        for weather in data:
-            session.add(WeatherJournal.from_weather_tuple(weather, city.id))
+        await self._parse_pool.submit(ParseJob(job, raw))
 
-        try:
-            await session.commit()
-
-            self._sessions_queue.task_done()
-            await self._sessions_queue.put(session)
-        except exc.IntegrityError as error:
-            self.logger.error(
-                f'There seems to be some data missing when fetching for {city.name = } from {provider.name = }.'
-                f' Please investigate further, we will be skipping getting '
-                f'the city data with this provider for now. '
-                f'Here is the error:',
-                error,
-            )
+    async def _parse_job(self, parse_job: ParseJob) -> None:
+        city, provider, start_date, end_date = parse_job.job
 
-    async def _collect_provider(self, provider: Provider) -> None:
-        # TODO: More logs as to what the code is doing and is going to do so that the user is aware of what is being fetched.
-        for chunk in chunks(self._cities, GATHER_CHUNK_SIZE):
-            city_gather_tasks: list[asyncio.Task[None]] = []
+        batch = await provider.parse(parse_job.raw, start_date, end_date)
+        if len(batch) == 0:
+            return
 
-            for city in chunk:
-                new_task = self._event_loop.create_task(
-                    self._collect_city(city, provider)
+        await self._write_queue.put(
+            WriteItem(city, provider.name, batch.with_city_id(city.id))
+        )
+
+    async def _write_items(self, data_source: str, items: list[WriteItem]) -> None:
+        async with self._db_session_factory() as session:
+            try:
+                changed_ranges = await self._writer.write_table(
+                    session,
+                    pa.concat_tables([item.table for item in items]),
+                    data_source,
                 )
+                # * In the same transaction, the API only serves the rollups and a crash
+                # * must not leave the committed rows out of them
+                await refresh_rollups(session, changed_ranges)
+                await session.commit()
+            except exc.IntegrityError as error:
+                await session.rollback()
+
+                if len(items) == 1:
+                    # * Malformed rows are already skipped one by one by the writer,
+                    # * this is a problem with the city as a whole
+                    self.logger.error(
+                        f'Could not write the data for {items[0].city.name = } from '
+                        f'{data_source = }.'
+                        f' Please investigate further, we will be skipping getting '
+                        f'the city data with this provider for now. '
+                        f'Here is the error: {error}'
+                    )
+                    return
+            else:
+                await self._invalidate_cache(session, changed_ranges)
+                return
+
+        # * One of the cities broke the batch, writing them one by one to only skip that
+        # * one
+        for item in items:
+            await self._write_items(data_source, [item])
+
+    async def _invalidate_cache(
+        self, session: AsyncSession, changed_ranges: ChangedRanges
+    ) -> None:
+        # * After the commit, the API could otherwise cache the old rollups again under
+        # * the new versions
+        if self._cache_invalidator is None:
+            return
+
+        await self._cache_invalidator.invalidate(
+            session,
+            [
+                key
+                for city_id, (first, last) in changed_ranges.items()
+                for key in weather_version_keys([city_id], first, last)
+            ],
+        )
 
-                city_gather_tasks.append(new_task)
+    async def _write_worker(self) -> None:
+        while True:
+            items = [await self._write_queue.get()]
+            rows = items[0].table.num_rows
+
+            # * Coalescing whatever has queued up while the previous batch was being
+            # * written
+            while (
+                rows < self._config.write_batch_rows and not self._write_queue.empty()
+            ):
+                item = self._write_queue.get_nowait()
+                items.append(item)
+                rows += item.table.num_rows
+
+            try:
+                by_data_source: dict[str, list[WriteItem]] = {}
+                for item in items:
+                    by_data_source.setdefault(item.data_source, []).append(item)
+
+                for data_source, data_source_items in by_data_source.items():
+                    await self._write_items(data_source, data_source_items)
+            except Exception:
+                self.logger.exception(
+                    f'Could not write a batch of {rows} rows, {len(items)} city '
+                    'slice(s)'
+                )
+            finally:
+                for _ in items:
+                    self._write_queue.task_done()
 
-            await asyncio.gather(*city_gather_tasks)
+    async def _fetch_job_and_release(self, job: CollectJob) -> None:
+        try:
+            await self._fetch_job(job)
+        finally:
+            key = (job.provider.name, job.city.id)
+            self._pending_jobs[key] -= 1
+            if self._pending_jobs[key] == 0:
+                del self._pending_jobs[key]
+                job.provider.release(job.city.coordinate)
+
+    async def _collect_provider(self, provider: Provider) -> None:
+        jobs = list(self._jobs(provider))
+        cities = {job.city.id: job.city for job in jobs}
+        self._pending_jobs.update((provider.name, job.city.id) for job in jobs)
+
+        # * Lets the provider share the work between the cities, e.g. the ones sharing a
+        # * weather station
+        await provider.prepare([city.coordinate for city in cities.values()])
+
+        pool = WorkerPool(
+            f'{provider.name} fetcher',
+            self._fetch_job_and_release,
+            self._config.fetch_workers,
+        )
+        await pool.run(jobs)
 
     async def _run(self) -> None:
         self.logger.info(f'Starting to collect {len(self._cities)} cities...')
-        await self._map_providers(lambda provider: self._collect_provider(provider))
+
+        writers = [
+            self._event_loop.create_task(self._write_worker())
+            for _ in range(self._config.write_workers)
+        ]
+        try:
+            async with self._parse_pool:
+                await self._map_providers(
+                    lambda provider: self._collect_provider(provider)
+                )
+
+            await self._write_queue.join()
+        finally:
+            for writer in writers:
+                writer.cancel()
+
+            await asyncio.gather(*writers, return_exceptions=True)
+
+        self._writer.log_stats()
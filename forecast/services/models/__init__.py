@@ -1 +1,4 @@
 from forecast.services.models.city import CityTuple as CityTuple
+from forecast.services.models.collector_config import (
+    CollectorConfig as CollectorConfig,
+)
@@ -0,0 +1,21 @@
+import os
+
+from pydantic import BaseModel, Field
+
+
+class CollectorConfig(BaseModel):
+    # * Per provider, the requests actually in flight are bounded by the provider's rate
+    # * limiter
+    fetch_workers: int = 60
+    # * Shared by all of the providers, the parse jobs in flight. Enough to keep every
+    # * parse process busy
+    parse_workers: int = Field(default_factory=lambda: os.cpu_count() or 4)
+    # * The processes running the providers' process_parser, None for one per cpu, 0 to
+    # * parse on the event loop
+    parse_processes: int | None = None
+    write_workers: int = 4
+    # * The writers coalesce the rows of many cities, up to this many, while the queue
+    # * is backed up
+    write_batch_rows: int = 50_000
+    # * The bound of the queues between the stages, in the responses of a city slice
+    queue_size: int = 64
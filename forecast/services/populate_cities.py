@@ -8,6 +8,7 @@ import pandas as pd
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from forecast.cache import CITIES_VERSION_KEY, CacheInvalidator
 from forecast.db.models import City
 from forecast.services.base import Service
 from forecast.services.models import CityTuple
@@ -29,9 +30,12 @@ class PopulateCitiesService(Service):
         db_session_factory: async_sessionmaker[AsyncSession],
         *,
         connector: aiohttp.BaseConnector,
+        cache_invalidator: CacheInvalidator | None = None,
     ) -> None:
         super().__init__(db_session_factory, connector=connector, base_url=BASE_URL)
 
+        self._cache_invalidator = cache_invalidator
+
         self._cities_df: pd.DataFrame | None = None
 
     async def fetch_cities_list(self) -> pd.DataFrame:
@@ -85,14 +89,19 @@ class PopulateCitiesService(Service):
                 (await session.execute(select(City.latitude, City.longitude))).all()
             )
 
+            added = 0
             for row in self._cities_df.itertuples(index=False):
                 city_tuple = CityTuple._make(row)
                 if (city_tuple.latitude, city_tuple.longitude) in present_locations:
                     continue
 
                 session.add(City.from_city_named_tuple(city_tuple))
+                added += 1
 
             await session.commit()
 
+            if added > 0 and self._cache_invalidator is not None:
+                await self._cache_invalidator.invalidate(session, [CITIES_VERSION_KEY])
+
     async def _run(self) -> None:
         await self.populate_cities()
@@ -1,3 +1,6 @@
+from forecast.utils.missing_ranges import missing_ranges as missing_ranges
 from forecast.utils.pascal_case_to_snake_case import (
     pascal_case_to_snake_case as pascal_case_to_snake_case,
 )
+from forecast.utils.slice_range import slice_range as slice_range
+from forecast.utils.worker_pool import WorkerPool as WorkerPool
@@ -0,0 +1,38 @@
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+
+DEFAULT_STEP = timedelta(hours=1)
+
+
+def missing_ranges(
+    start: datetime,
+    end: datetime,
+    stored: Sequence[tuple[datetime, datetime]] = (),
+    step: timedelta = DEFAULT_STEP,
+) -> list[tuple[datetime, datetime]]:
+    """
+    Returns the inclusive ranges of [start, end] not covered by any of the stored ones,
+    the gaps in between them included. The stored (first, last) ranges are contiguous
+    and sorted, the step being the resolution of the data.
+    """
+    if start > end:
+        return []
+
+    ranges: list[tuple[datetime, datetime]] = []
+    next_missing = start
+    for first_stored, last_stored in stored:
+        if last_stored < next_missing:
+            continue
+
+        if first_stored > end:
+            break
+
+        if first_stored > next_missing:
+            ranges.append((next_missing, first_stored - step))
+
+        next_missing = last_stored + step
+
+    if next_missing <= end:
+        ranges.append((next_missing, end))
+
+    return ranges
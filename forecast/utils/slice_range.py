@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+from forecast.utils.missing_ranges import DEFAULT_STEP
+
+
+def slice_range(
+    start: datetime,
+    end: datetime,
+    span: timedelta | None,
+    step: timedelta = DEFAULT_STEP,
+) -> list[tuple[datetime, datetime]]:
+    """
+    Splits the inclusive [start, end] range into the consecutive inclusive slices of at
+    most span each. None span stands for the whole range at once.
+    """
+    if start > end:
+        return []
+
+    if span is None:
+        return [(start, end)]
+
+    span = max(span, step)
+
+    slices: list[tuple[datetime, datetime]] = []
+    while start <= end:
+        slice_end = min(start + span - step, end)
+        slices.append((start, slice_end))
+        start = slice_end + step
+
+    return slices
@@ -0,0 +1,126 @@
+import asyncio
+import statistics
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable
+from types import TracebackType
+from typing import Generic, Self, TypeVar
+
+from forecast.logging import logger_provider
+
+T = TypeVar('T')
+
+DEFAULT_REPORT_INTERVAL_SECS = 10.0
+# * The latencies of the latest jobs the reports are computed over
+LATENCY_WINDOW = 1000
+
+
+class WorkerPool(Generic[T]):
+    """
+    A fixed amount of workers taking the jobs from a bounded queue, as soon as any of
+    them is free. Unlike gathering the jobs in chunks, a slow job only holds up its own
+    worker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[T], Awaitable[None]],
+        workers: int,
+        *,
+        max_queued: int | None = None,
+        report_interval: float = DEFAULT_REPORT_INTERVAL_SECS,
+    ) -> None:
+        self.logger = logger_provider(__name__)
+
+        self.name = name
+        self._handler = handler
+        self._workers = workers
+        self._report_interval = report_interval
+
+        # * Bounded, the jobs are produced lazily as the workers get to them
+        self._queue: asyncio.Queue[T] = asyncio.Queue(max_queued or workers * 2)
+
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+        self._tasks: list[asyncio.Task[None]] = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def report(self) -> str:
+        latencies = sorted(self._latencies)
+        latency = 'n/a'
+        if len(latencies) > 0:
+            latency = (
+                f'mean {statistics.fmean(latencies):.2f} s, '
+                f'p95 {latencies[int(len(latencies) * 0.95)]:.2f} s'
+            )
+
+        return (
+            f'[{self.name}] queued: {self.queue_depth}, in flight: {self.in_flight}, '
+            f'done: {self.completed}, failed: {self.failed}, job latency: {latency}'
+        )
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                await self._handler(job)
+                self.completed += 1
+            except Exception:
+                self.failed += 1
+                self.logger.exception(f'[{self.name}] The job {job} failed')
+            finally:
+                self._latencies.append(time.perf_counter() - start)
+                self.in_flight -= 1
+                self._queue.task_done()
+
+    async def _report_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._report_interval)
+            self.logger.info(self.report())
+
+    async def submit(self, job: T) -> None:
+        """
+        Waits for a free spot in the queue, that's the backpressure for the producers.
+        """
+        await self._queue.put(job)
+
+    async def __aenter__(self) -> Self:
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self._workers)]
+        self._tasks.append(asyncio.create_task(self._report_periodically()))
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        try:
+            # * On an error the jobs left are dropped, otherwise all of the submitted
+            # * ones are waited for
+            if exc_type is None:
+                await self._queue.join()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+
+        self.logger.info(self.report())
+
+    async def run(self, jobs: Iterable[T]) -> None:
+        async with self:
+            for job in jobs:
+                await self.submit(job)
@@ -0,0 +1,4 @@
+from lib.geo.spatial_index import EARTH_RADIUS_KM as EARTH_RADIUS_KM
+from lib.geo.spatial_index import SpatialIndex as SpatialIndex
+from lib.geo.spatial_index import haversine_km as haversine_km
+from lib.geo.spatial_index import to_unit_vectors as to_unit_vectors
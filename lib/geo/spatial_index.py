@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+    from scipy.spatial import cKDTree
+
+FloatsArray: TypeAlias = npt.NDArray[np.float64]
+IntsArray: TypeAlias = npt.NDArray[np.intp]
+Degrees: TypeAlias = float | Sequence[float] | FloatsArray
+
+# * The mean earth radius
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vectors(latitudes: Degrees, longitudes: Degrees) -> FloatsArray:
+    """
+    Projects the (latitude, longitude) degrees onto the unit sphere, returns an (n, 3)
+    array. The straight line distance between two of the vectors grows monotonically
+    with the great circle one, unlike the one between raw degrees, which breaks around
+    the poles and the antimeridian.
+    """
+    phi = np.radians(np.atleast_1d(np.asarray(latitudes, dtype=np.float64)))
+    lambda_ = np.radians(np.atleast_1d(np.asarray(longitudes, dtype=np.float64)))
+
+    cos_phi = np.cos(phi)
+    return np.column_stack(
+        (cos_phi * np.cos(lambda_), cos_phi * np.sin(lambda_), np.sin(phi))
+    )
+
+
+def _chord_to_km(chord: FloatsArray) -> FloatsArray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def _km_to_chord(distance_km: float) -> float:
+    return 2 * np.sin(min(distance_km / (2 * EARTH_RADIUS_KM), np.pi / 2))
+
+
+def _build_tree(vectors: FloatsArray) -> cKDTree:
+    # * scipy takes a while to import, only the processes building an index pay for it
+    from scipy.spatial import cKDTree
+
+    return cKDTree(vectors)
+
+
+def haversine_km(
+    latitudes_a: Degrees,
+    longitudes_a: Degrees,
+    latitudes_b: Degrees,
+    longitudes_b: Degrees,
+) -> FloatsArray:
+    phi_a, lambda_a, phi_b, lambda_b = (
+        np.radians(np.asarray(degrees, dtype=np.float64))
+        for degrees in (latitudes_a, longitudes_a, latitudes_b, longitudes_b)
+    )
+
+    a = (
+        np.sin((phi_b - phi_a) / 2) ** 2
+        + np.cos(phi_a) * np.cos(phi_b) * np.sin((lambda_b - lambda_a) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class SpatialIndex:
+    """
+    A KD-tree over points on the earth surface, the queries take O(log n) per point. The
+    results are indices into the points the index was built from, the distances are in
+    km.
+    """
+
+    def __init__(self, latitudes: Degrees, longitudes: Degrees) -> None:
+        self._vectors = to_unit_vectors(latitudes, longitudes)
+        self._tree = _build_tree(self._vectors)
+
+    @classmethod
+    def from_points(cls, points: Sequence[tuple[float, float]]) -> SpatialIndex:
+        coordinates = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return cls(coordinates[:, 0], coordinates[:, 1])
+
+    @classmethod
+    def from_vectors(cls, vectors: FloatsArray) -> SpatialIndex:
+        """
+        Builds the index over the points already projected with to_unit_vectors, e.g.
+        the stored ones.
+        """
+        index = cls.__new__(cls)
+        index._vectors = vectors
+        index._tree = _build_tree(vectors)
+
+        return index
+
+    def __len__(self) -> int:
+        return self._vectors.shape[0]
+
+    def nearest(
+        self, latitudes: Degrees, longitudes: Degrees, k: int = 1
+    ) -> tuple[FloatsArray, IntsArray]:
+        """
+        Returns the (distances, indices) of the k nearest points for each of the queried
+        ones, both shaped (n, k). The missing neighbours, when k > len(self), have the
+        index len(self).
+        """
+        if len(self) == 0:
+            raise ValueError('The spatial index is empty')
+
+        chords, indices = self._tree.query(to_unit_vectors(latitudes, longitudes), k=k)
+
+        return _chord_to_km(chords).reshape(-1, k), indices.reshape(-1, k)
+
+    def nearest_one(self, latitude: float, longitude: float) -> tuple[float, int]:
+        distances, indices = self.nearest(latitude, longitude)
+        return float(distances[0, 0]), int(indices[0, 0])
+
+    def within(
+        self, latitudes: Degrees, longitudes: Degrees, radius_km: float
+    ) -> list[IntsArray]:
+        """
+        Returns the indices of the points within radius_km for each of the queried ones,
+        nearest first.
+        """
+        vectors = to_unit_vectors(latitudes, longitudes)
+        neighbours = self._tree.query_ball_point(
+            vectors, r=_km_to_chord(radius_km), return_sorted=False
+        )
+
+        result: list[IntsArray] = []
+        for vector, indices in zip(vectors, neighbours):
+            indices = np.asarray(indices, dtype=np.intp)
+            chords = np.linalg.norm(self._vectors[indices] - vector, axis=1)
+            result.append(indices[np.argsort(chords)])
+
+        return result
@@ -0,0 +1,29 @@
+import importlib
+from collections.abc import Callable, Mapping
+from typing import Any
+
+
+def lazy_exports(
+    package: str, exports: Mapping[str, str]
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """
+    The module level __getattr__ and __dir__ of a package re-exporting the names of its
+    submodules, {name: module}. A submodule is only imported once one of its names is
+    asked for, so that importing a lightweight part of the package doesn't drag in the
+    heavy dependencies of the rest of it.
+    """
+
+    def module_getattr(name: str) -> Any:
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+
+        value = getattr(importlib.import_module(module), name)
+        # * Cached on the package, the next lookups don't get here anymore
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def module_dir() -> list[str]:
+        return sorted({*vars(importlib.import_module(package)), *exports})
+
+    return module_getattr, module_dir
@@ -0,0 +1,3 @@
+from lib.search.prefix_index import PrefixIndex as PrefixIndex
+from lib.search.prefix_index import normalize as normalize
+from lib.search.prefix_index import trigrams as trigrams
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import bisect
+import re
+import unicodedata
+from collections.abc import Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+# * The share of the query trigrams a fuzzy match has to contain
+DEFAULT_MIN_SIMILARITY = 0.7
+
+_SEPARATORS = re.compile(r'[\W_]+')
+# * The letters NFKD doesn't decompose into a base one and an accent
+_TRANSLITERATIONS = str.maketrans(
+    {'ł': 'l', 'ø': 'o', 'đ': 'd', 'ð': 'd', 'þ': 'th', 'æ': 'ae', 'œ': 'oe', 'ı': 'i'}
+)
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercase, without accents and punctuation, e.g. "São Paulo" and "sao-paulo" both
+    become "sao paulo".
+    """
+    decomposed = unicodedata.normalize(
+        'NFKD', text.casefold().translate(_TRANSLITERATIONS)
+    )
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+    return _SEPARATORS.sub(' ', stripped).strip()
+
+
+def trigrams(term: str, *, is_prefix: bool = False) -> set[str]:
+    """
+    The trigrams of every word, padded like pg_trgm does, two spaces before and one
+    after. A prefix isn't padded after, its last word may go on.
+    """
+    result: set[str] = set()
+    for word in term.split():
+        padded = f'  {word}' if is_prefix else f'  {word} '
+        result.update(padded[index : index + 3] for index in range(len(padded) - 2))
+
+    return result
+
+
+class PrefixIndex:
+    """
+    Finds the items by the prefixes of their normalized terms, e.g. of a name, its words
+    or a country, the heavier items first. A sorted array of the terms, a prefix is two
+    binary searches away. When no prefix matches, falls back to the items whose terms
+    share most of the query trigrams, which tolerates the typos.
+    """
+
+    def __init__(
+        self, terms: Sequence[Sequence[str]], weights: Sequence[float]
+    ) -> None:
+        unique_pairs: set[tuple[str, int]] = set()
+        for item, item_terms in enumerate(terms):
+            for term in item_terms:
+                words = normalize(term).split()
+                if len(words) == 0:
+                    continue
+
+                # * Every word is a term of its own, "york" finds "New York"
+                unique_pairs.add((' '.join(words), item))
+                unique_pairs.update((word, item) for word in words[1:])
+
+        pairs = sorted(unique_pairs)
+
+        self._terms = [term for term, _ in pairs]
+        self._term_items = np.array([item for _, item in pairs], dtype=np.intp)
+        self._weights = np.asarray(weights, dtype=np.float64)
+
+        postings: dict[str, list[int]] = {}
+        for term_index, term in enumerate(self._terms):
+            for trigram in trigrams(term):
+                postings.setdefault(trigram, []).append(term_index)
+
+        self._postings = {
+            trigram: np.array(term_indices, dtype=np.intp)
+            for trigram, term_indices in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def _rank(self, items: npt.NDArray[np.intp], limit: int) -> list[int]:
+        """The unique items, the heaviest first."""
+        items = np.unique(items)
+        if len(items) > limit:
+            heaviest = np.argpartition(-self._weights[items], limit - 1)[:limit]
+            items = items[heaviest]
+
+        return items[np.argsort(-self._weights[items], kind='stable')].tolist()
+
+    def prefix(self, query: str, limit: int) -> list[int]:
+        prefix = normalize(query)
+        if prefix == '':
+            return []
+
+        start = bisect.bisect_left(self._terms, prefix)
+        end = bisect.bisect_left(self._terms, prefix + '\U0010ffff', lo=start)
+
+        return self._rank(self._term_items[start:end], limit)
+
+    def fuzzy(
+        self,
+        query: str,
+        limit: int,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY,
+    ) -> list[int]:
+        query_trigrams = trigrams(normalize(query), is_prefix=True)
+        postings = [
+            self._postings[trigram]
+            for trigram in query_trigrams
+            if trigram in self._postings
+        ]
+        if len(postings) == 0:
+            return []
+
+        shared = np.bincount(np.concatenate(postings), minlength=len(self._terms))
+        similarity = shared / len(query_trigrams)
+
+        candidates = np.flatnonzero(similarity >= min_similarity)
+        items = self._term_items[candidates]
+
+        # * The most similar first, the heavier one of the equally similar
+        order = np.lexsort((-self._weights[items], -similarity[candidates]))
+
+        result: list[int] = []
+        seen: set[int] = set()
+        for item in items[order].tolist():
+            if item not in seen:
+                seen.add(item)
+                result.append(item)
+
+                if len(result) == limit:
+                    break
+
+        return result
+
+    def search(self, query: str, limit: int) -> list[int]:
+        # * The fuzzy matches of a prefix which does find something are mostly noise
+        return self.prefix(query, limit) or self.fuzzy(query, limit)
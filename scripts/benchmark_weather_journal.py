@@ -0,0 +1,271 @@
+"""
+Benchmarks the weather_journal ingest rate, with the rollups refreshed along with the
+rows like the collector does, and the latency of the /weather history query on the
+rollup tier it picks for the range. The raw weather_journal GROUP BY the route ran
+before the rollups is timed too, as the baseline of the journal schema itself.
+
+Run it once on each schema to compare them, e.g. for the partitioning:
+    alembic downgrade 5c1d7e2a9b40 && python -m scripts.benchmark_weather_journal
+    alembic upgrade head && python -m scripts.benchmark_weather_journal
+
+The benchmark inserts its own cities and rows and removes them afterwards, unless --keep
+is passed.
+"""
+
+import asyncio
+import random
+import statistics
+import time
+from argparse import ArgumentParser, Namespace
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+import numpy as np
+from sqlalchemy import Select, delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from forecast.db.bulk_writer import WeatherJournalWriter
+from forecast.db.connect import connect, create_engine
+from forecast.db.models import City, WeatherJournal
+from forecast.db.partitions import IS_PARTITIONED_SQL, ensure_yearly_partitions
+from forecast.db.rollups import (
+    BUCKET_START,
+    ROLLUP_MODELS,
+    refresh_rollups,
+    resolution_for_span,
+)
+from forecast.providers.models import Weather, WeatherBatch
+
+BENCHMARK_CITY_PREFIX = '__benchmark_'
+START_DATE = datetime(2023, 1, 1)
+QUERY_SPAN = timedelta(days=30)
+PAGE_SIZE = 500
+
+
+def create_parser() -> ArgumentParser:
+    ap = ArgumentParser()
+    ap.add_argument('--url', default=None, help='Defaults to the configured db')
+    ap.add_argument('--cities', type=int, default=20)
+    ap.add_argument('--providers', type=int, default=2)
+    ap.add_argument('--days', type=int, default=365)
+    ap.add_argument('--queries', type=int, default=200)
+    ap.add_argument('--keep', action='store_true')
+
+    return ap
+
+
+def generate_weather(data_source: str, hours: int) -> list[Weather]:
+    dates = [START_DATE + timedelta(hours=hour) for hour in range(hours)]
+    values = np.random.default_rng().random((8, hours)).tolist()
+
+    return [
+        Weather(data_source, date, *(column[index] for column in values))
+        for index, date in enumerate(dates)
+    ]
+
+
+def journal_history_query(
+    city_id: int, from_date: datetime, to_date: datetime
+) -> Select[Any]:
+    """The ingest side baseline, what /weather ran before the rollups."""
+    return (
+        select(
+            WeatherJournal.date,
+            func.avg(WeatherJournal.temperature),
+            func.avg(WeatherJournal.pressure),
+            func.avg(WeatherJournal.wind_speed),
+            func.avg(WeatherJournal.wind_direction),
+            func.avg(WeatherJournal.humidity),
+            func.avg(WeatherJournal.precipitation),
+            func.avg(WeatherJournal.snow),
+        )
+        .where(
+            WeatherJournal.city_id == city_id,
+            WeatherJournal.date >= from_date,
+            WeatherJournal.date <= to_date,
+        )
+        .group_by(WeatherJournal.date)
+        .order_by(WeatherJournal.date)
+        .limit(PAGE_SIZE + 1)
+    )
+
+
+def rollup_history_query(
+    city_id: int, from_date: datetime, to_date: datetime
+) -> Select[Any]:
+    """What /weather runs, on the rollup tier picked for the range."""
+    resolution = resolution_for_span(from_date, to_date)
+    rollup = ROLLUP_MODELS[resolution]
+    return (
+        select(
+            rollup.date,
+            rollup.temperature,
+            rollup.pressure,
+            rollup.wind_speed,
+            rollup.wind_direction,
+            rollup.humidity,
+            rollup.precipitation,
+            rollup.snow,
+        )
+        .where(
+            rollup.city_id == city_id,
+            rollup.date >= BUCKET_START[resolution](from_date),
+            rollup.date <= to_date,
+        )
+        .order_by(rollup.date)
+        .limit(PAGE_SIZE + 1)
+    )
+
+
+async def create_cities(
+    session_factory: async_sessionmaker[AsyncSession], count: int
+) -> list[int]:
+    async with session_factory() as session:
+        city_ids = await session.scalars(
+            insert(City)
+            .values(
+                [
+                    {
+                        'name': f'{BENCHMARK_CITY_PREFIX}{index}',
+                        'latitude': 0.0,
+                        'longitude': 0.0,
+                        'country_name': 'benchmark',
+                        'population': 0,
+                    }
+                    for index in range(count)
+                ]
+            )
+            .returning(City.id)
+        )
+        city_ids = list(city_ids)
+        await session.commit()
+
+    return city_ids
+
+
+async def benchmark_ingest(
+    session_factory: async_sessionmaker[AsyncSession],
+    city_ids: list[int],
+    args: Namespace,
+) -> float:
+    writer = WeatherJournalWriter()
+    batches = [
+        generate_weather(f'provider_{provider}', args.days * 24)
+        for provider in range(args.providers)
+    ]
+
+    rows = 0
+    start = time.perf_counter()
+    for city_id in city_ids:
+        for batch in batches:
+            async with session_factory() as session:
+                changed_ranges = await writer.write_table(
+                    session,
+                    WeatherBatch.coerce(batch).with_city_id(city_id),
+                    batch[0].data_source,
+                )
+                await refresh_rollups(session, changed_ranges)
+                await session.commit()
+
+            rows += len(batch)
+    end = time.perf_counter()
+
+    async with session_factory() as session:
+        for table in (
+            WeatherJournal.__tablename__,
+            *(model.__tablename__ for model in ROLLUP_MODELS.values()),
+        ):
+            await session.execute(text(f'ANALYZE {table}'))
+        await session.commit()
+
+    return rows / (end - start)
+
+
+async def benchmark_history_query(
+    session_factory: async_sessionmaker[AsyncSession],
+    city_ids: list[int],
+    args: Namespace,
+    history_query: Callable[[int, datetime, datetime], Select[Any]],
+) -> list[float]:
+    latest_start = max(args.days - QUERY_SPAN.days, 0)
+    timings_ms: list[float] = []
+
+    async with session_factory() as session:
+        for _ in range(args.queries):
+            from_date = START_DATE + timedelta(days=random.randint(0, latest_start))
+            query = history_query(
+                random.choice(city_ids), from_date, from_date + QUERY_SPAN
+            )
+
+            start = time.perf_counter()
+            (await session.execute(query)).all()
+            timings_ms.append((time.perf_counter() - start) * 1000)
+
+    return timings_ms
+
+
+async def cleanup(
+    session_factory: async_sessionmaker[AsyncSession], city_ids: list[int]
+) -> None:
+    async with session_factory() as session:
+        for model in (WeatherJournal, *ROLLUP_MODELS.values()):
+            await session.execute(delete(model).where(model.city_id.in_(city_ids)))
+        await session.execute(delete(City).where(City.id.in_(city_ids)))
+        await session.commit()
+
+
+async def main(args: Namespace) -> None:
+    if args.url is None:
+        from forecast.config import config
+
+        args.url = config.db.connection_string
+
+    engine = create_engine(args.url)
+    session_factory = await connect(engine)
+
+    async with session_factory() as session:
+        is_partitioned = await session.scalar(
+            IS_PARTITIONED_SQL, {'table': WeatherJournal.__tablename__}
+        )
+        await ensure_yearly_partitions(
+            session, START_DATE, START_DATE + timedelta(days=args.days)
+        )
+
+    city_ids = await create_cities(session_factory, args.cities)
+    try:
+        rows_per_second = await benchmark_ingest(session_factory, city_ids, args)
+        journal_timings_ms = await benchmark_history_query(
+            session_factory, city_ids, args, journal_history_query
+        )
+        rollup_timings_ms = await benchmark_history_query(
+            session_factory, city_ids, args, rollup_history_query
+        )
+    finally:
+        if not args.keep:
+            await cleanup(session_factory, city_ids)
+
+        await engine.dispose()
+
+    print(f'Schema: {"partitioned" if is_partitioned else "single table"}')
+    print(
+        f'Ingest: {args.cities * args.providers * args.days * 24} rows, '
+        f'{rows_per_second:.0f} rows/sec'
+    )
+
+    resolution = resolution_for_span(START_DATE, START_DATE + QUERY_SPAN)
+    for name, timings_ms in (
+        ('Journal baseline query', journal_timings_ms),
+        (f'/weather query, {resolution} rollup', rollup_timings_ms),
+    ):
+        timings_ms.sort()
+        print(
+            f'{name} ({args.queries} runs, {QUERY_SPAN.days} day range): '
+            f'mean {statistics.mean(timings_ms):.2f} ms, '
+            f'p50 {timings_ms[len(timings_ms) // 2]:.2f} ms, '
+            f'p95 {timings_ms[int(len(timings_ms) * 0.95)]:.2f} ms'
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main(create_parser().parse_args()))
@@ -0,0 +1,148 @@
+"""
+Measures the cold start import time of the API and the collector entry points with
+`python -X importtime`, fails when one goes over its budget or imports a module it
+shouldn't need to start.
+
+    python -m scripts.import_time_budget
+    python -m scripts.import_time_budget --entry api --runs 10 --top 20
+
+Every run is a fresh interpreter, the reported time is the median of the runs after a
+warmup one, which compiles the bytecode. The budgets are for a dev machine, --scale
+loosens them on slower ones.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+from argparse import ArgumentParser, Namespace
+from typing import NamedTuple
+
+
+class EntryPoint(NamedTuple):
+    module: str
+    budget_ms: float
+    # * The heavy dependencies only the requests / the gathering itself need
+    forbidden: tuple[str, ...]
+
+
+HEAVY_MODULES = ('tensorflow', 'sklearn', 'pandas', 'scipy', 'pyarrow')
+
+ENTRY_POINTS = {
+    'api': EntryPoint('forecast.api.__main__', 1200, (*HEAVY_MODULES, 'aiohttp')),
+    'collector': EntryPoint('forecast.__main__', 800, (*HEAVY_MODULES, 'aiohttp')),
+}
+
+IMPORT_SCRIPT = 'import json, sys, {module}; print(json.dumps(sorted(sys.modules)))'
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+class Run(NamedTuple):
+    total_ms: float
+    imports: list[ImportTime]
+    modules: set[str]
+
+
+def create_parser() -> ArgumentParser:
+    ap = ArgumentParser()
+    ap.add_argument(
+        '--entry', choices=sorted(ENTRY_POINTS), action='append', default=None
+    )
+    ap.add_argument('--runs', type=int, default=5)
+    ap.add_argument('--top', type=int, default=10, help='The slowest imports shown')
+    ap.add_argument('--scale', type=float, default=1.0, help='Multiplies the budgets')
+
+    return ap
+
+
+def parse_import_times(stderr: str) -> list[ImportTime]:
+    """
+    The `import time: self [us] | cumulative | imported package` lines, the header
+    skipped.
+    """
+    result: list[ImportTime] = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        self_us, cumulative_us, module = line.removeprefix('import time:').split('|')
+        if not self_us.strip().isdigit():
+            continue
+
+        result.append(ImportTime(module.strip(), int(self_us), int(cumulative_us)))
+
+    return result
+
+
+def measure(module: str) -> Run:
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', IMPORT_SCRIPT.format(module=module)],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f'Importing {module} failed:\n{process.stderr}')
+
+    imports = parse_import_times(process.stderr)
+    total = next(item for item in imports if item.module == module)
+
+    return Run(
+        total.cumulative_us / 1000,
+        imports,
+        set(json.loads(process.stdout.splitlines()[-1])),
+    )
+
+
+def check(name: str, entry: EntryPoint, args: Namespace) -> bool:
+    measure(entry.module)
+    runs = sorted(
+        (measure(entry.module) for _ in range(args.runs)), key=lambda run: run.total_ms
+    )
+    median = runs[len(runs) // 2]
+    budget = entry.budget_ms * args.scale
+
+    print(
+        f'[{name}] {entry.module}: median {median.total_ms:.0f} ms '
+        f'(min {runs[0].total_ms:.0f}, max {runs[-1].total_ms:.0f}, '
+        f'stdev {statistics.pstdev(run.total_ms for run in runs):.0f}), budget '
+        f'{budget:.0f} ms'
+    )
+    print('  The slowest imports, self / cumulative ms:')
+    for item in sorted(median.imports, key=lambda item: item.self_us, reverse=True)[
+        : args.top
+    ]:
+        print(
+            f'    {item.self_us / 1000:8.1f} {item.cumulative_us / 1000:8.1f}  '
+            f'{item.module}'
+        )
+
+    passed = True
+    if median.total_ms > budget:
+        print(f'  FAIL: {median.total_ms - budget:.0f} ms over the budget')
+        passed = False
+
+    imported = [module for module in entry.forbidden if module in median.modules]
+    if len(imported) > 0:
+        print(f'  FAIL: imports {", ".join(imported)} at startup')
+        passed = False
+
+    return passed
+
+
+def main(args: Namespace) -> int:
+    results = [
+        check(name, ENTRY_POINTS[name], args)
+        for name in args.entry or sorted(ENTRY_POINTS)
+    ]
+
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(create_parser().parse_args()))
@@ -0,0 +1,67 @@
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from forecast.api.dependencies.closest_city_provider import ClosestCityProvider
+from forecast.api.models.weather import BatchLocation
+from forecast.db.models import City
+
+
+def make_city(
+    id: int, name: str, latitude: float, longitude: float, population: int
+) -> City:
+    return City(
+        id=id,
+        name=name,
+        latitude=latitude,
+        longitude=longitude,
+        country_name='Poland',
+        population=population,
+    )
+
+
+@pytest.mark.parametrize(
+    'location',
+    [{}, {'lat': 52.2}, {'city': 'Warsaw', 'lat': 52.2, 'long': 21.0}],
+)
+def test_location_needs_city_or_coordinates(location: dict) -> None:
+    with pytest.raises(ValidationError):
+        BatchLocation.model_validate(location)
+
+
+CITIES = [
+    make_city(1, 'Warsaw', 52.23, 21.01, 1_800_000),
+    make_city(2, 'Kraków', 50.06, 19.94, 800_000),
+    make_city(3, 'Warsaw', 41.24, -85.85, 15_000),
+]
+
+
+async def test_resolve_many() -> None:
+    locations = [
+        BatchLocation.model_validate(location)
+        for location in [
+            {'lat': 50.0, 'long': 20.0},
+            {'city': 'Warsaw'},
+            {'city': 'Nowhere'},
+            {'lat': 41.0, 'long': -86.0},
+        ]
+    ]
+
+    resolved = await ClosestCityProvider().resolve_many(CITIES, locations)
+
+    assert [city.id if city is not None else None for city in resolved] == [
+        2,
+        1,
+        None,
+        3,
+    ]
+
+
+async def test_single_lookup_resolves_the_names_like_the_batch() -> None:
+    provider = ClosestCityProvider()
+
+    city = await provider(CITIES, latitude=None, longitude=None, city_name='Warsaw')
+    assert city.id == 1
+
+    with pytest.raises(HTTPException):
+        await provider(CITIES, latitude=None, longitude=None, city_name='Nowhere')
@@ -0,0 +1,21 @@
+from datetime import datetime
+
+import pytest
+
+from forecast.api.pagination import InvalidCursorError, WeatherCursor
+
+
+def test_cursor_round_trip() -> None:
+    cursor = WeatherCursor(
+        resolution='hourly', city_id=42, date=datetime(2023, 5, 1, 13)
+    )
+
+    token = cursor.encode()
+
+    assert WeatherCursor.decode(token) == cursor
+
+
+@pytest.mark.parametrize('token', ['not a cursor', 'e30=', ''])
+def test_malformed_cursor(token: str) -> None:
+    with pytest.raises(InvalidCursorError):
+        WeatherCursor.decode(token)
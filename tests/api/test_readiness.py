@@ -0,0 +1,38 @@
+import orjson
+from fastapi import Response
+
+from forecast.api.lifespan import Readiness, readiness
+from forecast.api.routes import healthcheck
+
+
+def test_readiness_waits_for_every_step() -> None:
+    steps = Readiness()
+    assert not steps.is_ready
+
+    steps.expect('predictor')
+    steps.done('startup')
+    assert steps.pending == ['predictor']
+
+    steps.done('predictor')
+    assert steps.is_ready
+
+    steps.reset()
+    assert steps.pending == ['startup']
+
+
+async def test_healthcheck_is_unavailable_until_warm() -> None:
+    response = Response()
+    result = await healthcheck(response)
+
+    assert response.status_code == 503
+    assert not result.ok
+
+    readiness.done('startup')
+    try:
+        response = Response()
+        result = await healthcheck(response)
+    finally:
+        readiness.reset()
+
+    assert response.status_code == 200
+    assert orjson.loads(result.model_dump_json()) == {'ok': True, 'pending': []}
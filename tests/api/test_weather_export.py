@@ -0,0 +1,67 @@
+import csv
+import io
+from datetime import datetime
+from typing import Any
+
+import orjson
+import pyarrow as pa
+import pytest
+
+from forecast.api.routes.weather_export import (
+    ENCODERS,
+    EXPORT_COLUMNS,
+    ExportFormat,
+    RowChunk,
+)
+
+ROWS: list[tuple[Any, ...]] = [
+    (datetime(2023, 1, 1, hour), 1.5, 1000.0, 3.0, 90.0, 50.0, None, 0.0, 0.0)
+    for hour in range(3)
+]
+
+
+def export(export_format: ExportFormat) -> bytes:
+    encoder = ENCODERS[export_format]()
+    return b''.join(
+        [
+            encoder.header(),
+            encoder.encode(ROWS[:2]),
+            encoder.encode(ROWS[2:]),
+            encoder.footer(),
+        ]
+    )
+
+
+def test_ndjson_export() -> None:
+    lines = export('ndjson').splitlines()
+
+    assert [orjson.loads(line)['date'] for line in lines] == [
+        '2023-01-01T00:00:00',
+        '2023-01-01T01:00:00',
+        '2023-01-01T02:00:00',
+    ]
+    assert orjson.loads(lines[0])['clouds'] is None
+
+
+def test_csv_export() -> None:
+    rows = list(csv.reader(io.StringIO(export('csv').decode())))
+
+    assert tuple(rows[0]) == EXPORT_COLUMNS
+    assert len(rows) == len(ROWS) + 1
+
+
+@pytest.mark.parametrize('chunks', [[ROWS[:2], ROWS[2:]], []])
+def test_arrow_export(chunks: list[RowChunk]) -> None:
+    encoder = ENCODERS['arrow']()
+    data = b''.join(
+        [
+            encoder.header(),
+            *[encoder.encode(chunk) for chunk in chunks],
+            encoder.footer(),
+        ]
+    )
+
+    table = pa.ipc.open_stream(data).read_all()
+
+    assert table.column_names == list(EXPORT_COLUMNS)
+    assert table.num_rows == sum(len(chunk) for chunk in chunks)
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+import orjson
+
+from forecast.cache import MemoryBackend, RedisBackend, ResponseStore
+from forecast.cache.invalidation import (
+    MAX_PAYLOAD_BYTES,
+    invalidation_payloads,
+    weather_version_keys,
+)
+
+TTL = timedelta(hours=1)
+
+
+class FakePipeline:
+    def __init__(self, redis: 'FakeRedis') -> None:
+        self._redis = redis
+        self._keys: list[str] = []
+
+    async def __aenter__(self) -> 'FakePipeline':
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        return None
+
+    def incr(self, key: str) -> None:
+        self._keys.append(key)
+
+    async def execute(self) -> None:
+        for key in self._keys:
+            self._redis.values[key] = str(int(self._redis.values.get(key, 0)) + 1)
+
+
+class FakeRedis:
+    """A local stand-in for the redis.asyncio client, only what RedisBackend uses."""
+
+    def __init__(self) -> None:
+        self.values: dict[str, Any] = {}
+
+    async def get(self, key: str) -> Any:
+        return self.values.get(key)
+
+    async def set(self, key: str, value: Any, ex: timedelta | None = None) -> None:
+        self.values[key] = value
+
+    async def mget(self, keys: list[str]) -> list[Any]:
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+
+async def test_memory_backend_evicts_the_least_recently_used() -> None:
+    backend = MemoryBackend(max_size_bytes=10)
+
+    await backend.set('a', b'12345', TTL)
+    await backend.set('b', b'12345', TTL)
+    assert await backend.get('a') == b'12345'
+
+    await backend.set('c', b'12345', TTL)
+
+    assert await backend.get('b') is None
+    assert await backend.get('a') == b'12345'
+    assert await backend.get('c') == b'12345'
+
+
+async def test_memory_backend_expires_entries() -> None:
+    backend = MemoryBackend(max_size_bytes=10)
+
+    await backend.set('a', b'1', timedelta(seconds=-1))
+
+    assert await backend.get('a') is None
+    assert len(backend) == 0
+
+
+async def test_invalidation_changes_the_key() -> None:
+    store = ResponseStore(MemoryBackend(1024), ttl=TTL)
+    version_keys = weather_version_keys([1], datetime(2023, 1, 1), datetime(2024, 1, 1))
+
+    key = await store.key('weather', version_keys, (1, 'hourly'))
+    await store.set(key, b'{}')
+    assert await store.key('weather', version_keys, (1, 'hourly')) == key
+
+    await store.invalidate_local(['weather:1:2024'])
+
+    new_key = await store.key('weather', version_keys, (1, 'hourly'))
+    assert new_key != key
+    assert await store.get(new_key) is None
+
+
+async def test_shared_backend_versions_and_entries() -> None:
+    redis = FakeRedis()
+    api_store = ResponseStore(MemoryBackend(1024), RedisBackend(redis), ttl=TTL)
+    other_store = ResponseStore(MemoryBackend(1024), RedisBackend(redis), ttl=TTL)
+
+    key = await api_store.key('cities', ['cities'], ('war',))
+    await api_store.set(key, b'[]')
+
+    # * Another process finds it through the shared backend
+    assert await other_store.key('cities', ['cities'], ('war',)) == key
+    assert await other_store.get(key) == b'[]'
+
+    # * The collector bumps the shared versions
+    await RedisBackend(redis).bump_versions(['cities'])
+
+    assert await api_store.key('cities', ['cities'], ('war',)) != key
+
+
+def test_invalidation_payloads_fit_a_notify() -> None:
+    keys = weather_version_keys(range(2000), datetime(2020, 1, 1), datetime(2024, 1, 1))
+
+    payloads = invalidation_payloads(keys)
+
+    assert len(payloads) > 1
+    assert all(len(payload) <= MAX_PAYLOAD_BYTES for payload in payloads)
+    assert [key for payload in payloads for key in orjson.loads(payload)] == keys
@@ -0,0 +1,44 @@
+import numpy as np
+import orjson
+import pyarrow as pa
+import pytest
+
+from forecast.client_session_classes import decode_json_columns
+
+COLUMNS = {'time': pa.timestamp('us'), 'temperature_2m': pa.float64()}
+
+
+def test_columns_are_decoded_into_arrays() -> None:
+    content = orjson.dumps(
+        {
+            'latitude': 50.45,
+            'hourly_units': {'time': 'iso8601'},
+            'hourly': {
+                'time': ['2023-01-01T00:00', '2023-01-01T01:00'],
+                'temperature_2m': [-1, None],
+                'cloud_cover': [0, 100],
+            },
+        },
+        option=orjson.OPT_INDENT_2,
+    )
+
+    columns = decode_json_columns(content, 'hourly', COLUMNS)
+
+    assert columns['time'].tolist() == [
+        np.datetime64('2023-01-01T00:00', 'us'),
+        np.datetime64('2023-01-01T01:00', 'us'),
+    ]
+    assert columns['temperature_2m'][0] == -1.0
+    assert np.isnan(columns['temperature_2m'][1])
+
+
+def test_a_missing_column_is_an_error() -> None:
+    content = orjson.dumps({'hourly': {'time': ['2023-01-01T00:00']}})
+
+    with pytest.raises(ValueError, match='temperature_2m'):
+        decode_json_columns(content, 'hourly', COLUMNS)
+
+
+def test_an_error_payload_is_an_error() -> None:
+    with pytest.raises(ValueError, match='hourly'):
+        decode_json_columns(b'{"error": true, "reason": "nope"}', 'hourly', COLUMNS)
@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+from forecast.client_session_classes import RateLimitConfig, RateLimiter
+from forecast.client_session_classes.rate_limiter import TokenBucket, parse_retry_after
+
+
+def test_parse_retry_after() -> None:
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_after_the_burst() -> None:
+    bucket = TokenBucket(rate=100, burst=2)
+
+    start = time.perf_counter()
+    for _ in range(6):
+        await bucket.acquire()
+
+    # * The first two are the burst, the other four are 10 ms apart
+    assert time.perf_counter() - start >= 0.035
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_additive_increase_multiplicative_decrease() -> None:
+    limiter = RateLimiter(
+        'test', RateLimitConfig(initial_concurrency=4, max_concurrency=8)
+    )
+
+    for _ in range(4):
+        async with limiter.slot():
+            limiter.record(200, 0.1, None)
+    assert limiter.concurrency_limit == 5
+
+    limiter.record(429, 0.1, '0')
+    # * The responses that were in flight together are a single overload signal
+    limiter.record(429, 0.1, '0')
+    assert limiter.concurrency_limit == 2
+
+    for _ in range(100):
+        limiter.record(200, 0.1, None)
+    assert limiter.concurrency_limit == 8
@@ -0,0 +1,68 @@
+import gzip
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from forecast.client_session_classes import NEVER_EXPIRES, ResponseCache, ttl_for_period
+from forecast.client_session_classes.response_cache import COMPRESS_LEVEL
+
+TTL = timedelta(hours=1)
+
+
+async def test_put_and_read(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path, 1024 * 1024, TTL)
+    key = cache.key('GET', '/stations/lite.json', {'a': 1})
+
+    await cache.put(key, '/stations/lite.json', b'data' * 100, etag='"v1"')
+
+    assert await cache.read(key) == b'data' * 100
+    assert cache.get(key).is_fresh
+    assert cache.get(key).etag == '"v1"'
+    assert cache.get(key).gzipped
+    # * Reloaded from the disk by the next run
+    assert await ResponseCache(tmp_path, 1024 * 1024, TTL).read(key) == b'data' * 100
+
+
+async def test_compressed_bodies_are_stored_as_they_are(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path, 1024 * 1024, TTL)
+    content = gzip.compress(b'2023-01-01,0,1.5\n' * 100)
+
+    await cache.put('csv', '/hourly/2023/33345.csv.gz', content)
+    await cache.put('sniffed', '/hourly/2023/33345', content)
+
+    for key in ('csv', 'sniffed'):
+        assert not cache.get(key).gzipped
+        assert cache.get(key).size == len(content)
+        assert await cache.read(key) == content
+
+
+async def test_expiry(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path, 1024 * 1024, TTL)
+
+    await cache.put('expired', '/a', b'a', timedelta(seconds=-1))
+    await cache.put('immutable', '/b', b'b', NEVER_EXPIRES)
+
+    assert not cache.get('expired').is_fresh
+    assert cache.get('immutable').expires_at is None
+
+    await cache.refresh('expired')
+    assert cache.get('expired').is_fresh
+
+
+async def test_least_recently_used_are_evicted(tmp_path: Path) -> None:
+    entry_size = len(gzip.compress(b'x' * 1000, compresslevel=COMPRESS_LEVEL))
+    cache = ResponseCache(tmp_path, entry_size * 2, TTL)
+
+    await cache.put('first', '/first', b'x' * 1000)
+    await cache.put('second', '/second', b'x' * 1000)
+    await cache.read('first')
+    await cache.put('third', '/third', b'x' * 1000)
+
+    assert cache.get('second') is None
+    assert await cache.read('first') is not None
+    assert await cache.read('third') is not None
+    assert len(list(tmp_path.iterdir())) == 4
+
+
+def test_ttl_for_period() -> None:
+    assert ttl_for_period(datetime(2000, 12, 31)) == NEVER_EXPIRES
+    assert ttl_for_period(datetime.now()) is None
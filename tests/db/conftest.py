@@ -0,0 +1,43 @@
+from collections.abc import AsyncIterator
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from forecast.db.models import City
+from tests.config import config
+
+
+@pytest.fixture
+async def session() -> AsyncIterator[AsyncSession]:
+    """A session on the test db whose changes are all rolled back afterwards."""
+    engine = create_async_engine(config.db.connection_string)
+    try:
+        connection = await engine.connect()
+    except (OSError, ConnectionError) as error:
+        await engine.dispose()
+        pytest.skip(f'The test db is not reachable: {error}')
+
+    transaction = await connection.begin()
+    session = AsyncSession(bind=connection, join_transaction_mode='create_savepoint')
+    try:
+        yield session
+    finally:
+        await session.close()
+        await transaction.rollback()
+        await connection.close()
+        await engine.dispose()
+
+
+@pytest.fixture
+async def city_id(session: AsyncSession) -> int:
+    city = City(
+        name='__test_city',
+        latitude=0.0,
+        longitude=0.0,
+        country_name='Nowhere',
+        population=0,
+    )
+    session.add(city)
+    await session.flush()
+
+    return city.id
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from forecast.db import bulk_writer
+from forecast.db.bulk_writer import Record, WeatherJournalWriter, WrittenCity
+from forecast.db.models import WeatherJournal
+
+START = datetime(2023, 3, 1)
+
+
+def make_records(city_id: int, hours: int, temperature: float = 1.5) -> list[Record]:
+    return [
+        (
+            'meteostat',
+            START + timedelta(hours=hour),
+            temperature,
+            1000.0,
+            2.0,
+            180.0,
+            80.0,
+            None,
+            0.0,
+            None,
+            city_id,
+        )
+        for hour in range(hours)
+    ]
+
+
+async def stored_temperatures(session: AsyncSession, city_id: int) -> list[float]:
+    return list(
+        await session.scalars(
+            select(WeatherJournal.temperature)
+            .where(WeatherJournal.city_id == city_id)
+            .order_by(WeatherJournal.date)
+        )
+    )
+
+
+@pytest.mark.parametrize('path', ['_copy_upsert', '_dialect_upsert'])
+async def test_upsert_reports_only_the_changed_rows(
+    session: AsyncSession, city_id: int, path: str
+) -> None:
+    writer = WeatherJournalWriter()
+    upsert = getattr(writer, path)
+
+    written, _ = await upsert(session, make_records(city_id, 3))
+    assert written == [WrittenCity(city_id, START, START + timedelta(hours=2), 3)]
+
+    # * The same rows again, nothing changed
+    written, _ = await upsert(session, make_records(city_id, 3))
+    assert written == []
+
+    records = make_records(city_id, 3)
+    records[1] = (*records[1][:2], 9.0, *records[1][3:])
+    written, _ = await upsert(session, records)
+
+    changed = START + timedelta(hours=1)
+    assert written == [WrittenCity(city_id, changed, changed, 1)]
+    assert await stored_temperatures(session, city_id) == [1.5, 9.0, 1.5]
+
+
+async def test_upsert_on_conflict_nothing_keeps_the_stored_rows(
+    session: AsyncSession, city_id: int
+) -> None:
+    writer = WeatherJournalWriter(on_conflict='nothing')
+
+    await writer._dialect_upsert(session, make_records(city_id, 2))
+    written, _ = await writer._dialect_upsert(
+        session, make_records(city_id, 3, temperature=9.0)
+    )
+
+    added = START + timedelta(hours=2)
+    assert written == [WrittenCity(city_id, added, added, 1)]
+    assert await stored_temperatures(session, city_id) == [1.5, 1.5, 9.0]
+
+
+async def test_dialect_upsert_splits_the_rows_into_chunks(
+    session: AsyncSession, city_id: int, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # * Well over the bind parameters limit of asyncpg in a single statement
+    records = make_records(city_id, 2 * bulk_writer.DIALECT_UPSERT_CHUNK_ROWS + 10)
+    statements = 0
+    execute = session.execute
+
+    async def counting_execute(*args, **kwargs):
+        nonlocal statements
+        statements += 1
+        return await execute(*args, **kwargs)
+
+    monkeypatch.setattr(session, 'execute', counting_execute)
+
+    written, _ = await WeatherJournalWriter()._dialect_upsert(session, records)
+
+    assert statements == 3
+    assert sum(city.rows for city in written) == len(records)
+    monkeypatch.undo()
+
+    stored = await session.scalar(
+        select(func.count()).where(WeatherJournal.city_id == city_id)
+    )
+    assert stored == len(records)
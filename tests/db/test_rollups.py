@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from forecast.db.bulk_writer import Record, WeatherJournalWriter
+from forecast.db.models import (
+    DailyWeatherRollup,
+    HourlyWeatherRollup,
+    MonthlyWeatherRollup,
+)
+from forecast.db.models.weather_rollup import WeatherRollupMixin
+from forecast.db.rollups import refresh_rollups
+
+
+def make_records(city_id: int, start: datetime, hours: int) -> list[Record]:
+    return [
+        (
+            'meteostat',
+            start + timedelta(hours=hour),
+            float(hour),
+            1000.0,
+            2.0,
+            180.0,
+            80.0,
+            None,
+            0.0,
+            None,
+            city_id,
+        )
+        for hour in range(hours)
+    ]
+
+
+async def stored_samples(
+    session: AsyncSession, model: type[WeatherRollupMixin], city_id: int
+) -> dict[datetime, int]:
+    rows = await session.execute(
+        select(model.date, model.samples).where(model.city_id == city_id)
+    )
+    return dict(rows.tuples().all())
+
+
+async def test_refresh_rollups_only_recomputes_the_changed_ranges(
+    session: AsyncSession, city_id: int
+) -> None:
+    writer = WeatherJournalWriter()
+    first_day, second_day = datetime(2023, 3, 1), datetime(2023, 3, 20)
+
+    changed = await writer.write_records(
+        session, make_records(city_id, first_day, 3), 'meteostat'
+    )
+    await refresh_rollups(session, changed)
+
+    # * Stored, but never reported as changed
+    await writer.write_records(
+        session, make_records(city_id, second_day, 2), 'meteostat'
+    )
+
+    assert await stored_samples(session, HourlyWeatherRollup, city_id) == {
+        first_day + timedelta(hours=hour): 1 for hour in range(3)
+    }
+    assert await stored_samples(session, DailyWeatherRollup, city_id) == {first_day: 3}
+    assert await stored_samples(session, MonthlyWeatherRollup, city_id) == {
+        first_day: 3
+    }
+
+    # * A change within the second day refreshes its whole day and month
+    await refresh_rollups(session, {city_id: (second_day + timedelta(hours=1),) * 2})
+
+    assert await stored_samples(session, HourlyWeatherRollup, city_id) == {
+        **{first_day + timedelta(hours=hour): 1 for hour in range(3)},
+        second_day + timedelta(hours=1): 1,
+    }
+    assert await stored_samples(session, MonthlyWeatherRollup, city_id) == {
+        first_day: 4
+    }
+
+
+async def test_refresh_rollups_is_committed_along_with_the_rows(
+    session: AsyncSession, city_id: int
+) -> None:
+    writer = WeatherJournalWriter()
+    day = datetime(2023, 4, 1)
+
+    savepoint = await session.begin_nested()
+    changed = await writer.write_records(
+        session, make_records(city_id, day, 2), 'meteostat'
+    )
+    await refresh_rollups(session, changed)
+    assert await stored_samples(session, DailyWeatherRollup, city_id) == {day: 2}
+
+    # * Neither the rows nor their rollups outlive the transaction on their own
+    await savepoint.rollback()
+
+    assert await stored_samples(session, DailyWeatherRollup, city_id) == {}
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ('tensorflow', 'sklearn', 'pandas', 'scipy', 'pyarrow')
+
+
+def imported_modules(script: str) -> set[str]:
+    # * A fresh interpreter, the test session has imported everything already
+    process = subprocess.run(
+        [sys.executable, '-c', f'import sys; {script}; print(*sys.modules)'],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(process.stdout.split())
+
+
+@pytest.mark.parametrize(
+    'module',
+    [
+        'forecast.providers',
+        'forecast.providers.models',
+        'forecast.services',
+        'forecast.client_session_classes',
+        'forecast.config',
+        'lib.geo',
+    ],
+)
+def test_package_import_skips_the_heavy_modules(module: str) -> None:
+    imported = imported_modules(f'import {module}')
+
+    assert module in imported
+    assert imported.isdisjoint(HEAVY_MODULES)
+
+
+def test_lazy_export_imports_on_access() -> None:
+    imported = imported_modules(
+        'import forecast.providers.models as models; models.WeatherBatch'
+    )
+
+    assert 'forecast.providers.models.weather_batch' in imported
+    assert 'pyarrow' in imported
+
+
+def test_unknown_lazy_export() -> None:
+    import forecast.providers
+
+    with pytest.raises(AttributeError):
+        forecast.providers.Missing  # noqa: B018
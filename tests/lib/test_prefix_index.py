@@ -0,0 +1,56 @@
+import pytest
+
+from lib.search import PrefixIndex, normalize
+
+
+@pytest.mark.parametrize(
+    ('text', 'expected'),
+    [
+        ('São Paulo', 'sao paulo'),
+        ('sao-paulo', 'sao paulo'),
+        ('Wrocław', 'wroclaw'),
+        ('  Köln ', 'koln'),
+        ('Straße', 'strasse'),
+    ],
+)
+def test_normalize(text: str, expected: str) -> None:
+    assert normalize(text) == expected
+
+
+@pytest.fixture
+def index() -> PrefixIndex:
+    terms = [
+        ['New York', 'United States'],
+        ['Newark', 'United States'],
+        ['York', 'United Kingdom'],
+        ['São Paulo', 'Brazil'],
+        ['Wrocław', 'Poland'],
+    ]
+    weights = [8_000_000, 300_000, 200_000, 12_000_000, 600_000]
+
+    return PrefixIndex(terms, weights)
+
+
+def test_prefix_ranks_by_weight(index: PrefixIndex) -> None:
+    assert index.prefix('new', 10) == [0, 1]
+    assert index.prefix('New', 1) == [0]
+
+
+def test_prefix_matches_any_word(index: PrefixIndex) -> None:
+    assert index.prefix('york', 10) == [0, 2]
+    assert index.prefix('paulo', 10) == [3]
+
+
+def test_prefix_ignores_accents(index: PrefixIndex) -> None:
+    assert index.search('sao pau', 10) == [3]
+    assert index.search('wroclaw', 10) == [4]
+
+
+def test_fuzzy_tolerates_typos(index: PrefixIndex) -> None:
+    assert index.prefix('wroclav', 10) == []
+    assert index.search('wroclav', 10) == [4]
+
+
+def test_no_match(index: PrefixIndex) -> None:
+    assert index.search('zzz', 10) == []
+    assert index.search('  ', 10) == []
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from lib.geo import SpatialIndex, haversine_km
+
+
+def test_nearest_across_the_antimeridian() -> None:
+    index = SpatialIndex.from_points([(0.0, 179.5), (0.0, 178.0), (0.0, -170.0)])
+
+    distance, nearest = index.nearest_one(0.0, -179.9)
+
+    assert nearest == 0
+    assert distance == pytest.approx(haversine_km(0.0, -179.9, 0.0, 179.5))
+
+
+def test_nearest_near_the_pole() -> None:
+    # * In raw degrees the second point is a lot closer, on the sphere it's the other
+    # * way around
+    index = SpatialIndex.from_points([(89.0, 180.0), (85.0, 0.0)])
+
+    _, nearest = index.nearest_one(89.0, 0.0)
+
+    assert nearest == 0
+
+
+def test_batch_nearest_matches_brute_force() -> None:
+    rng = np.random.default_rng(7)
+    points = np.column_stack((rng.uniform(-90, 90, 500), rng.uniform(-180, 180, 500)))
+    queries = np.column_stack((rng.uniform(-90, 90, 50), rng.uniform(-180, 180, 50)))
+    index = SpatialIndex(points[:, 0], points[:, 1])
+
+    distances, indices = index.nearest(queries[:, 0], queries[:, 1], k=3)
+
+    brute_force = haversine_km(
+        queries[:, 0, None], queries[:, 1, None], points[None, :, 0], points[None, :, 1]
+    )
+    np.testing.assert_array_equal(indices, np.argsort(brute_force, axis=1)[:, :3])
+    np.testing.assert_allclose(distances, np.sort(brute_force, axis=1)[:, :3])
+
+
+def test_within_radius() -> None:
+    index = SpatialIndex.from_points([(50.45, 30.52), (50.0, 36.23), (49.84, 24.03)])
+
+    (kyiv_neighbours,) = index.within(50.45, 30.52, radius_km=500)
+
+    assert kyiv_neighbours.tolist() == [0, 1, 2]
+    assert index.within(50.45, 30.52, radius_km=420)[0].tolist() == [0, 1]
@@ -0,0 +1,105 @@
+import math
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from forecast.api.dependencies.prediction_model import PredictorProvider
+from forecast.prediction import (
+    ArtifactStore,
+    PredictorMeta,
+    PredictorWeights,
+    WeatherPredictor,
+)
+from forecast.prediction.model import date_features
+
+DATES = [datetime(2023, 1, 1, hour) for hour in range(24)]
+TARGETS = np.column_stack(
+    (np.linspace(-5, 5, 24), np.linspace(990, 1030, 24), np.ones(24), np.zeros(24))
+)
+
+
+def make_meta(version: str) -> PredictorMeta:
+    return PredictorMeta(
+        version=version,
+        trained_at=datetime(2023, 1, 2),
+        samples=len(DATES),
+        epochs=1,
+        loss=0.1,
+        data_start=DATES[0],
+        data_end=DATES[-1],
+    )
+
+
+def make_weights(gate_biases: tuple[float, float, float, float]) -> PredictorWeights:
+    """
+    A single unit LSTM ignoring its inputs, its hidden state goes into every target.
+    """
+    scaler_x = MinMaxScaler().fit(date_features(DATES))
+    scaler_y = MinMaxScaler().fit(TARGETS)
+
+    return PredictorWeights(
+        lstm_kernel=np.zeros((4, 4), dtype=np.float32),
+        lstm_recurrent_kernel=np.zeros((1, 4), dtype=np.float32),
+        lstm_bias=np.array(gate_biases, dtype=np.float32),
+        dense_kernel=np.ones((1, 4), dtype=np.float32),
+        dense_bias=np.zeros(4, dtype=np.float32),
+        x_scale=scaler_x.scale_,
+        x_min=scaler_x.min_,
+        y_scale=scaler_y.scale_,
+        y_min=scaler_y.min_,
+    )
+
+
+def sigmoid(value: float) -> float:
+    return 1 / (1 + math.exp(-value))
+
+
+def test_forward_pass() -> None:
+    predictor = WeatherPredictor(make_meta('1'), make_weights((0.5, -1.0, 2.0, 0.3)))
+
+    prediction = predictor.predict_many(DATES[:2])
+
+    hidden = sigmoid(0.3) * sigmoid(0.5) * 2.0
+    expected = MinMaxScaler().fit(TARGETS).inverse_transform([[hidden] * 4])
+    assert prediction == pytest.approx(np.repeat(expected, 2, axis=0))
+
+
+def test_store_round_trip(tmp_path: Path) -> None:
+    store = ArtifactStore(tmp_path)
+    weights = make_weights((0.5, -1.0, 2.0, 0.3))
+    store.save(make_meta('20230102T000000000000'), weights)
+    # * Left over by an interrupted training
+    tmp_path.joinpath('.tmp-20230103T000000000000').mkdir()
+
+    assert store.latest_version() == '20230102T000000000000'
+
+    loaded = store.load('20230102T000000000000')
+    assert loaded is not None
+    meta, loaded_weights = loaded
+
+    assert meta == make_meta('20230102T000000000000')
+    assert isinstance(loaded_weights.lstm_kernel, np.memmap)
+    for array, loaded_array in zip(weights, loaded_weights):
+        np.testing.assert_array_equal(array, loaded_array)
+
+
+def test_hot_swap_and_prune(tmp_path: Path) -> None:
+    store = ArtifactStore(tmp_path)
+    provider = PredictorProvider()
+
+    assert not provider.load_latest(store)
+
+    store.save(make_meta('1'), make_weights((0.5, -1.0, 2.0, 0.3)))
+    assert provider.load_latest(store)
+    assert provider().version == '1'
+    assert not provider.load_latest(store)
+
+    store.save(make_meta('2'), make_weights((0.5, -1.0, 1.0, 0.3)))
+    assert provider.load_latest(store)
+    assert provider().version == '2'
+
+    assert store.prune(keep=1) == ['1']
+    assert store.versions() == ['2']
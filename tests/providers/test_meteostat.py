@@ -0,0 +1,116 @@
+import asyncio
+import gzip
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+import pytest
+from aiohttp.client import TCPConnector
+from pydantic_extra_types.coordinate import Coordinate, Latitude, Longitude
+
+from forecast.providers import Meteostat
+from forecast.providers.base import run_process_parser
+from forecast.providers.meteostat import (
+    DEFAULT_CSV_NAMES,
+    StationId,
+    parse_station_years,
+)
+from forecast.providers.models import WeatherBatch
+from lib.geo import SpatialIndex
+
+KYIV = Coordinate(latitude=Latitude(50.45), longitude=Longitude(30.52))
+BROVARY = Coordinate(latitude=Latitude(50.51), longitude=Longitude(30.79))
+LVIV = Coordinate(latitude=Latitude(49.84), longitude=Longitude(24.03))
+
+
+class CountingMeteostat(Meteostat):
+    def __init__(self, connector: TCPConnector) -> None:
+        super().__init__(connector, event_loop=asyncio.get_running_loop())
+
+        self.fetched: list[tuple[StationId, int]] = []
+        self.parsed = 0
+        self._station_ids = np.array(['33345', '33393'])
+        self._stations_index = SpatialIndex.from_points([(50.4, 30.57), (49.81, 23.96)])
+
+    async def _fetch_data_for_year(self, station_id: StationId, year: int) -> bytes:
+        self.fetched.append((station_id, year))
+        await asyncio.sleep(0)
+
+        return hourly_csv(year, 3)
+
+    async def run_parser(self, *args: Any) -> WeatherBatch:
+        self.parsed += 1
+        return await super().run_parser(*args)
+
+
+def hourly_csv(year: int, hours: int) -> bytes:
+    values = ','.join(['1.5'] * (len(DEFAULT_CSV_NAMES) - 2))
+    lines = [f'{year}-01-01,{hour},{values}' for hour in range(hours)]
+
+    return gzip.compress('\n'.join(lines).encode())
+
+
+@pytest.mark.asyncio
+async def test_station_years_are_fetched_once(connector: TCPConnector) -> None:
+    meteostat = CountingMeteostat(connector)
+
+    results = await meteostat.get_historical_weather_batch(
+        [KYIV, BROVARY, LVIV], datetime(2022, 1, 1), datetime(2023, 12, 31)
+    )
+
+    assert sorted(meteostat.fetched) == [
+        ('33345', 2022),
+        ('33345', 2023),
+        ('33393', 2022),
+        ('33393', 2023),
+    ]
+    # * Kyiv and Brovary share the station, its years are only parsed once
+    assert meteostat.parsed == 4
+    assert [len(weather) for weather in results] == [6, 6, 6]
+    # * Every city got its data, nothing is kept around anymore
+    assert len(meteostat._station_years) == 0
+
+
+@pytest.mark.asyncio
+async def test_station_is_kept_until_its_coordinates_are_released(
+    connector: TCPConnector,
+) -> None:
+    meteostat = CountingMeteostat(connector)
+    await meteostat.prepare([KYIV, BROVARY])
+
+    # * The collector fetches a city in several slices
+    for start, end in [
+        (datetime(2022, 1, 1), datetime(2022, 6, 30)),
+        (datetime(2022, 7, 1), datetime(2022, 12, 31)),
+    ]:
+        await meteostat.fetch_historical_weather(KYIV, start, end)
+
+    meteostat.release(KYIV)
+    await meteostat.fetch_historical_weather(
+        BROVARY, datetime(2022, 1, 1), datetime(2022, 12, 31)
+    )
+
+    assert meteostat.fetched == [('33345', 2022)]
+    assert len(meteostat._station_years) == 1
+
+    meteostat.release(BROVARY)
+    assert len(meteostat._station_years) == 0
+
+
+def test_process_parser_round_trip() -> None:
+    buffer = run_process_parser(
+        parse_station_years,
+        [hourly_csv(2022, 24), hourly_csv(2023, 24)],
+        datetime(2022, 1, 1, 12),
+        datetime(2023, 1, 1, 5),
+        'meteostat',
+    )
+    weather = WeatherBatch.from_ipc(buffer).to_weather()
+
+    assert [row.date for row in weather] == [
+        *[datetime(2022, 1, 1, hour) for hour in range(12, 24)],
+        *[datetime(2023, 1, 1, hour) for hour in range(6)],
+    ]
+    assert weather[0].data_source == 'meteostat'
+    assert weather[0].wind_speed == 0.42
+    assert weather[0].clouds is None
@@ -0,0 +1,58 @@
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+
+from forecast.providers.station_catalog import CatalogDiff, StationCatalog
+from lib.geo import SpatialIndex, to_unit_vectors
+
+IDS = np.array(['33345', '33393', '10637'])
+LATITUDES = np.array([50.4, 49.81, 50.05])
+LONGITUDES = np.array([30.57, 23.96, 8.6])
+
+
+def test_catalog_is_loaded_back_memory_mapped(tmp_path: Path) -> None:
+    StationCatalog(tmp_path, timedelta(days=7)).update(IDS, LATITUDES, LONGITUDES)
+
+    catalog = StationCatalog(tmp_path, timedelta(days=7))
+    assert catalog.load()
+    assert not catalog.is_stale
+    assert isinstance(catalog.vectors, np.memmap)
+
+    _, index = SpatialIndex.from_vectors(catalog.vectors).nearest_one(50.45, 30.52)
+    assert catalog.ids[index] == '33345'
+
+
+def test_refresh_reports_the_changes(tmp_path: Path) -> None:
+    catalog = StationCatalog(tmp_path, timedelta(days=7))
+    catalog.update(IDS, LATITUDES, LONGITUDES)
+
+    diff = catalog.update(
+        np.array(['33393', '10637', '72503']),
+        np.array([49.81, 50.1, 40.77]),
+        np.array([23.96, 8.6, -73.87]),
+    )
+
+    assert diff == CatalogDiff(added=1, removed=1, moved=1)
+    np.testing.assert_allclose(
+        catalog.vectors, to_unit_vectors([49.81, 50.1, 40.77], [23.96, 8.6, -73.87])
+    )
+
+
+def test_an_incomplete_catalog_is_not_loaded(tmp_path: Path) -> None:
+    StationCatalog(tmp_path, timedelta(days=7)).update(IDS, LATITUDES, LONGITUDES)
+    np.save(tmp_path.joinpath('ids.npy'), IDS[:2])
+
+    catalog = StationCatalog(tmp_path, timedelta(days=7))
+    assert not catalog.load()
+    assert catalog.is_stale
+
+
+def test_a_partly_replaced_catalog_is_not_loaded(tmp_path: Path) -> None:
+    StationCatalog(tmp_path, timedelta(days=7)).update(IDS, LATITUDES, LONGITUDES)
+    # * As if an update of as many stations stopped after its first file
+    np.save(tmp_path.joinpath('ids.npy'), np.array(['72503', '33393', '10637']))
+
+    catalog = StationCatalog(tmp_path, timedelta(days=7))
+    assert not catalog.load()
+    assert catalog.is_stale
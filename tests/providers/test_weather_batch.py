@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import numpy as np
+
+from forecast.providers.models import Weather, WeatherBatch
+
+WEATHER = [
+    Weather(
+        'open_meteo', datetime(2023, 1, 1, hour), 1.5, 1000, 2.0, 180, 80, 50, 0.1, 0
+    )
+    for hour in range(3)
+]
+
+
+def test_list_adapter_round_trip() -> None:
+    batch = WeatherBatch.coerce(WEATHER)
+
+    assert len(batch) == 3
+    assert batch.to_weather() == WEATHER
+    assert WeatherBatch.coerce(batch) is batch
+
+
+def test_from_columns_fills_the_missing_values() -> None:
+    batch = WeatherBatch.from_columns(
+        'meteostat',
+        date=np.array(['2023-01-01T00', '2023-01-01T01'], dtype='datetime64[h]'),
+        temperature=np.array([1.5, np.nan]),
+        humidity=[80, None],
+    )
+
+    first, second = batch.to_weather()
+    assert first.date == datetime(2023, 1, 1, 0)
+    assert (first.temperature, first.humidity, first.clouds) == (1.5, 80.0, None)
+    assert (second.temperature, second.humidity) == (None, None)
+
+
+def test_between_is_inclusive() -> None:
+    batch = WeatherBatch.from_weather(WEATHER).between(
+        datetime(2023, 1, 1, 1), datetime(2023, 1, 1, 2)
+    )
+
+    assert batch.column('date').tolist() == [
+        np.datetime64('2023-01-01T01:00:00.000000'),
+        np.datetime64('2023-01-01T02:00:00.000000'),
+    ]
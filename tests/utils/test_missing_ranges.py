@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from forecast.utils import missing_ranges
+
+START = datetime(2023, 1, 1)
+END = datetime(2023, 12, 31, 23)
+
+
+def test_nothing_stored() -> None:
+    assert missing_ranges(START, END, []) == [(START, END)]
+
+
+def test_everything_stored() -> None:
+    assert missing_ranges(START, END, [(START, END)]) == []
+    assert (
+        missing_ranges(START, END, [(datetime(2022, 1, 1), datetime(2024, 1, 1))]) == []
+    )
+
+
+def test_trailing_gap() -> None:
+    assert missing_ranges(START, END, [(START, datetime(2023, 6, 1, 5))]) == [
+        (datetime(2023, 6, 1, 6), END)
+    ]
+
+
+def test_leading_and_trailing_gaps() -> None:
+    assert missing_ranges(
+        START, END, [(datetime(2023, 2, 1), datetime(2023, 11, 30, 23))]
+    ) == [
+        (START, datetime(2023, 1, 31, 23)),
+        (datetime(2023, 12, 1), END),
+    ]
+
+
+def test_gaps_in_between() -> None:
+    assert missing_ranges(
+        START,
+        END,
+        [
+            (datetime(2022, 12, 1), datetime(2023, 3, 1, 11)),
+            (datetime(2023, 3, 1, 13), datetime(2023, 6, 30, 23)),
+            (datetime(2023, 8, 1), END),
+        ],
+    ) == [
+        (datetime(2023, 3, 1, 12), datetime(2023, 3, 1, 12)),
+        (datetime(2023, 7, 1), datetime(2023, 7, 31, 23)),
+    ]
+
+
+def test_stored_outside_of_the_window() -> None:
+    assert missing_ranges(
+        START,
+        END,
+        [
+            (datetime(2021, 1, 1), datetime(2021, 12, 31)),
+            (datetime(2024, 2, 1), datetime(2024, 3, 1)),
+        ],
+    ) == [(START, END)]
@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+from forecast.utils import slice_range
+
+START = datetime(2023, 1, 1)
+
+
+def test_no_span_is_a_single_slice() -> None:
+    assert slice_range(START, START + timedelta(days=90), None) == [
+        (START, START + timedelta(days=90))
+    ]
+
+
+def test_slices_are_contiguous_and_bounded() -> None:
+    end = datetime(2023, 3, 15, 12)
+
+    slices = slice_range(START, end, timedelta(days=30))
+
+    assert slices[0][0] == START
+    assert slices[-1][1] == end
+    for (_, previous_end), (next_start, _) in zip(slices, slices[1:]):
+        assert next_start - previous_end == timedelta(hours=1)
+    assert all(
+        slice_end - slice_start < timedelta(days=30)
+        for slice_start, slice_end in slices
+    )
@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+
+from forecast.utils import WorkerPool
+
+
+@pytest.mark.asyncio
+async def test_slow_job_only_holds_its_own_worker() -> None:
+    finished: list[int] = []
+
+    async def handler(job: int) -> None:
+        await asyncio.sleep(0.2 if job == 0 else 0.01)
+        if job == 5:
+            raise ValueError('A failing job')
+        finished.append(job)
+
+    pool = WorkerPool('test', handler, workers=2, report_interval=60)
+    await asyncio.wait_for(pool.run(range(10)), timeout=1)
+
+    # * The other worker went through the rest of the jobs while the first one was busy
+    assert finished[-1] == 0
+    assert pool.completed == 9
+    assert pool.failed == 1
+    assert pool.in_flight == 0
+    assert pool.queue_depth == 0